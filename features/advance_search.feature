@@ -10,7 +10,10 @@ Feature: Flaw advance search testing
       Then I get a list of all flaws
 
     Scenario: Search flaws with selected field and value
-      Given I add lacking data to the flaw which for later search
+      Given the flaw has at least
+        | data            | count |
+        | cvss_scores     | 1     |
+        | acknowledgments | 1     |
       And I go to a public flaw detail page
       When I prepare the advance search keywords
       Given I go to the advanced search page
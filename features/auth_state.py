@@ -0,0 +1,156 @@
+"""
+Snapshot of a logged-in and configured OSIM browser, injected into new
+sessions so scenarios can skip the UI login and the settings page.
+"""
+import json
+import os
+import tempfile
+import urllib.parse
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.wait import WebDriverWait
+
+from features.constants import OSIDB_URL, OSIM_URL
+from features.page_factory_utils import locator_in_page_factory
+from features.pages.home_page import HomePage
+from features.pages.login_page import LoginPage
+from features.session_pool import log_out_session
+
+
+READ_STORAGE_SCRIPT = """
+var storage = {};
+for (var i = 0; i < window.localStorage.length; i++) {
+    var key = window.localStorage.key(i);
+    storage[key] = window.localStorage.getItem(key);
+}
+return storage;
+"""
+
+WRITE_STORAGE_SCRIPT = """
+var storage = arguments[0];
+Object.keys(storage).forEach(function (key) {
+    window.localStorage.setItem(key, storage[key]);
+});
+"""
+
+
+def osim_static_url():
+    # a static file on the OSIM origin, opening it does not start the app
+    return urllib.parse.urljoin(OSIM_URL, "favicon.png")
+
+
+def osidb_static_url():
+    return urllib.parse.urljoin(OSIDB_URL, "osidb/healthy")
+
+
+class AuthStateStore:
+    """
+    Keep the snapshot for the whole run: in memory and, when a path is
+    given, in a file shared by the behave processes of a parallel run
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.state = None
+
+    def load(self):
+        if self.state is None and self.path:
+            try:
+                with open(self.path, "r") as f:
+                    self.state = json.load(f)
+            except FileNotFoundError:
+                pass
+        return self.state
+
+    def save(self, state):
+        self.state = state
+        if not self.path:
+            return
+        # write to a temporary file first, other processes never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def discard(self):
+        self.state = None
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def capture_auth_state(browser):
+    """
+    Snapshot the OSIM and OSIDB cookies (session and refresh token) and the
+    OSIM localStorage (login flag, user and settings) of a logged-in browser
+    """
+    state = {
+        "osim_cookies": browser.get_cookies(),
+        "local_storage": browser.execute_script(READ_STORAGE_SCRIPT),
+        "osidb_cookies": [],
+    }
+    if OSIDB_URL:
+        current_url = browser.current_url
+        browser.get(osidb_static_url())
+        state["osidb_cookies"] = browser.get_cookies()
+        browser.get(current_url)
+
+    return state
+
+
+def inject_auth_state(browser, state):
+    """
+    Put a captured state into a browser and open OSIM. The cookies and storage
+    are set from static pages, so the OSIM app itself is only loaded once.
+    Return False when OSIM still asks for a login.
+    """
+    if state["osidb_cookies"]:
+        browser.get(osidb_static_url())
+        for cookie in state["osidb_cookies"]:
+            browser.add_cookie(cookie)
+
+    browser.get(osim_static_url())
+    for cookie in state["osim_cookies"]:
+        browser.add_cookie(cookie)
+    browser.execute_script(WRITE_STORAGE_SCRIPT, state["local_storage"])
+
+    browser.get(OSIM_URL)
+    return is_logged_in(browser)
+
+
+def is_logged_in(browser):
+    """
+    Wait for the page open in a browser to show either the user menu or
+    the login button, return whether it shows the user menu
+    """
+    home_page = HomePage(browser)
+    login_page = LoginPage(browser)
+    try:
+        WebDriverWait(browser, home_page.timeout).until(EC.any_of(
+            EC.visibility_of_element_located(locator_in_page_factory(home_page, "userBtn")),
+            EC.visibility_of_element_located(locator_in_page_factory(login_page, "loginBtn")),
+        ))
+    except TimeoutException:
+        return False
+
+    return not login_page.is_element_exists(*locator_in_page_factory(login_page, "loginBtn"))
+
+
+def restore_auth_state(browser, store):
+    """
+    Log a browser in with the state captured earlier in the run. Return False
+    when there is no usable state and the UI login is needed.
+    """
+    state = store.load()
+    if state is None:
+        return False
+    if inject_auth_state(browser, state):
+        return True
+
+    # the snapshot expired, the next UI login captures a new one
+    store.discard()
+    log_out_session(browser)
+    return False
@@ -0,0 +1,119 @@
+"""
+Capture HTML snapshots of the OSIM pages used by the page objects, for the
+offline FakeWebDriver. It logs in like the features do and saves the flaw
+list, a flaw detail page, the advanced search and the settings page with
+their form state and the hidden elements marked.
+
+Run it from the osim root directory, with the same environment as the
+features:
+
+    python -m features.capture_snapshots --flaw-id CVE-2024-0001
+
+The snapshots contain the data of the captured flaw, capture them from a
+public flaw only and do not commit them.
+"""
+import argparse
+import json
+import os
+import sys
+import urllib.parse
+
+from features.constants import FLAW_ID_KEY, OSIM_URL, SNAPSHOT_DIR
+
+
+# set on the elements which are not displayed
+HIDDEN_ATTRIBUTE = "data-e2e-hidden"
+
+# serialize a copy of the DOM, keeping what the markup alone does not show
+CAPTURE_SCRIPT = """
+var hiddenAttribute = arguments[0];
+var original = document.documentElement, copy = original.cloneNode(true);
+var originals = original.querySelectorAll('*'), copies = copy.querySelectorAll('*');
+for (var i = 0; i < originals.length; i++) {
+    var node = originals[i], target = copies[i], tag = node.tagName.toLowerCase();
+    if (tag === 'input') {
+        target.setAttribute('value', node.value);
+        node.checked ? target.setAttribute('checked', '') : target.removeAttribute('checked');
+    } else if (tag === 'textarea') {
+        target.textContent = node.value;
+    } else if (tag === 'option') {
+        node.selected ? target.setAttribute('selected', '') : target.removeAttribute('selected');
+    }
+    // options follow the visibility of their select
+    if (tag !== 'option' && tag !== 'optgroup') {
+        var style = window.getComputedStyle(node);
+        if (style.display === 'none' || style.visibility === 'hidden') {
+            target.setAttribute(hiddenAttribute, '');
+        }
+    }
+}
+copy.querySelectorAll('script').forEach(function (node) { node.remove(); });
+return '<!DOCTYPE html>\\n' + copy.outerHTML;
+"""
+
+
+def capture(browser, name, snapshot_dir):
+    with open(os.path.join(snapshot_dir, f"{name}.html"), "w") as f:
+        f.write(browser.execute_script(CAPTURE_SCRIPT, HIDDEN_ATTRIBUTE))
+    return browser.current_url
+
+
+def capture_snapshots(flaw_id, snapshot_dir):
+    from features.pages.flaw_detail_page import FlawDetailPage
+    from features.pages.home_page import HomePage
+    from features.utils import (
+        get_flaw_detail_url,
+        get_flaw_uuid,
+        go_to_advanced_search_page,
+        init_remote_firefox_browser,
+        login_with_valid_account,
+    )
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    browser = login_with_valid_account(init_remote_firefox_browser())
+    urls = {}
+    try:
+        home_page = HomePage(browser)
+        home_page.flaw_list_exist()
+        home_page.wait_page_settled()
+        urls["flaw_list"] = capture(browser, "flaw_list", snapshot_dir)
+
+        browser.get(get_flaw_detail_url(get_flaw_uuid(flaw_id)))
+        FlawDetailPage(browser).wait_flaw_loaded()
+        urls["flaw_detail"] = capture(browser, "flaw_detail", snapshot_dir)
+
+        browser.get(OSIM_URL)
+        home_page.flaw_list_exist()
+        go_to_advanced_search_page(browser)
+        home_page.wait_page_settled()
+        urls["advanced_search"] = capture(browser, "advanced_search", snapshot_dir)
+
+        browser.get(urllib.parse.urljoin(OSIM_URL, "settings"))
+        home_page.wait_page_settled()
+        urls["settings"] = capture(browser, "settings", snapshot_dir)
+    finally:
+        browser.quit()
+
+    with open(os.path.join(snapshot_dir, "index.json"), "w") as f:
+        json.dump(urls, f, indent=2)
+    return urls
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Capture OSIM page snapshots for FakeWebDriver")
+    parser.add_argument(
+        "--flaw-id", default=os.getenv(FLAW_ID_KEY), required=not os.getenv(FLAW_ID_KEY),
+        help="CVE ID or UUID of the flaw whose detail page is captured, FLAW_ID by default")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="where the snapshots are written")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    for name, url in capture_snapshots(args.flaw_id, args.snapshot_dir).items():
+        print(f"{name}: {url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Trace the WebDriver commands sent to the grid. Every command is timed and
+attributed to the behave step and to the page object method which sent it,
+to see which helpers cost the most round-trips against a remote grid.
+
+Enabled with TRACE_WEBDRIVER=true, the profile is written to
+webdriver_profile.json in the JUnit directory.
+"""
+import json
+import os
+import sys
+import time
+
+from features.pages.base import BasePage
+
+
+PROFILE_FILE_NAME = "webdriver_profile.json"
+
+FEATURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# frames of the instrumentation itself are not callers
+SKIPPED_FILES = {
+    os.path.join(FEATURES_DIR, "command_trace.py"),
+    os.path.join(FEATURES_DIR, "step_metrics.py"),
+}
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def command_caller(frame):
+    """
+    Return the outermost and the innermost page object methods of a stack,
+    the helper called by the step and the one sending the command. Without
+    a page object, the closest function of the features is returned.
+    """
+    outermost = innermost = fallback = None
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if isinstance(frame.f_locals.get("self"), BasePage):
+            outermost = frame_name(frame)
+            innermost = innermost or outermost
+        elif fallback is None and filename.startswith(FEATURES_DIR) and filename not in SKIPPED_FILES:
+            module = os.path.splitext(os.path.relpath(filename, FEATURES_DIR))[0].replace(os.sep, ".")
+            fallback = f"{module}.{frame_name(frame)}"
+        frame = frame.f_back
+    if outermost is None:
+        return fallback or "-", fallback or "-"
+    return outermost, innermost
+
+
+class CommandProfile:
+    """
+    Aggregate the traced commands by step, page object methods and command
+    """
+
+    def __init__(self):
+        self.step = None
+        # (step, method, helper, command) -> [count, time]
+        self.entries = {}
+
+    def record(self, command, method, helper, elapsed):
+        entry = self.entries.setdefault((self.step or "-", method, helper, command), [0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def data(self):
+        return [
+            {"step": step, "method": method, "helper": helper, "command": command,
+             "count": count, "time": round(elapsed, 3)}
+            for (step, method, helper, command), (count, elapsed) in self.entries.items()
+        ]
+
+    def write(self, junit_directory, top):
+        data = self.data()
+        os.makedirs(junit_directory, exist_ok=True)
+        with open(os.path.join(junit_directory, PROFILE_FILE_NAME), "w") as f:
+            json.dump(data, f, indent=2)
+        # behave captures the output of the hooks
+        print(profile_report(data, top), file=sys.__stdout__)
+
+
+class CommandTracer:
+    """
+    Stand in for the command executor of a WebDriver, timing the commands
+    it forwards to the wrapped executor
+    """
+
+    def __init__(self, executor, profile):
+        self.executor = executor
+        self.profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def execute(self, command, params):
+        start = time.monotonic()
+        try:
+            return self.executor.execute(command, params)
+        finally:
+            elapsed = time.monotonic() - start
+            method, helper = command_caller(sys._getframe(1))
+            self.profile.record(command, method, helper, elapsed)
+
+
+def trace_commands(driver, profile):
+    driver.command_executor = CommandTracer(driver.command_executor, profile)
+    return driver
+
+
+def totals(data, *fields):
+    result = {}
+    for entry in data:
+        key = tuple(entry[field] for field in fields)
+        total = result.setdefault(key, [0, 0])
+        total[0] += entry["count"]
+        total[1] += entry["time"]
+    return sorted(result.items(), key=lambda item: item[1][0], reverse=True)
+
+
+def profile_report(data, top):
+    lines = ["WebDriver round-trips by page object method (commands, s, most sent):"]
+    commands = totals(data, "method", "command")
+    for (method,), (count, elapsed) in totals(data, "method")[:top]:
+        most_sent = ", ".join([
+            f"{command} {command_count}"
+            for (command_method, command), (command_count, _) in commands if command_method == method
+        ][:3])
+        lines.append(f"  {count:6d} {elapsed:8.3f}  {method}  [{most_sent}]")
+    lines.append("WebDriver round-trips by step (commands, s):")
+    lines.extend(
+        f"  {count:6d} {elapsed:8.3f}  {step}" for (step,), (count, elapsed) in totals(data, "step")[:top])
+    return "\n".join(lines)
+
+
+def merge_command_profiles(source_dir, junit_directory, top):
+    """
+    Merge the profiles of the behave processes of a parallel run
+    """
+    merged = {}
+    found = False
+    for root, _, files in os.walk(source_dir):
+        if PROFILE_FILE_NAME not in files:
+            continue
+        found = True
+        with open(os.path.join(root, PROFILE_FILE_NAME), "r") as f:
+            for entry in json.load(f):
+                key = (entry["step"], entry["method"], entry["helper"], entry["command"])
+                total = merged.setdefault(key, dict(entry, count=0, time=0))
+                total["count"] += entry["count"]
+                total["time"] = round(total["time"] + entry["time"], 3)
+    if not found:
+        return
+
+    data = list(merged.values())
+    os.makedirs(junit_directory, exist_ok=True)
+    with open(os.path.join(junit_directory, PROFILE_FILE_NAME), "w") as f:
+        json.dump(data, f, indent=2)
+    print(profile_report(data, top))
@@ -1,26 +1,16 @@
-import os
-import json
+import re
 
-from features.constants import TMP_DATA_FILE_NAME
+UUID_RE = re.compile(r"[0-9a-f]{8}-(?:[0-9a-f]{4}-){3}[0-9a-f]{12}", flags=re.IGNORECASE)
 
 
-def write_data_to_tmp_data_file(key, value):
-    try:
-        with open(TMP_DATA_FILE_NAME, "r") as f:
-            content = json.load(f)
-    except FileNotFoundError:
-        content = {}
+def is_flaw_uuid(flaw_id):
+    return UUID_RE.fullmatch(flaw_id) is not None
 
-    content[key] = value
-    with open(TMP_DATA_FILE_NAME, "w") as f:
-        json.dump(content, f)
 
-
-def get_data_from_tmp_data_file(key):
-    value = os.getenv(key)
-    if value is not None:
-        return value
-
-    with open(TMP_DATA_FILE_NAME, "r") as f:
-        content = json.load(f)
-        return content[key]
+def get_flaw_uuid_from_url(url):
+    """
+    Get the flaw UUID from the URL of a flaw detail page, None when the
+    page is not opened by UUID
+    """
+    flaw_id = url.rstrip("/").rsplit("/flaws/", 1)[-1]
+    return flaw_id if is_flaw_uuid(flaw_id) else None
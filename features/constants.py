@@ -7,10 +7,54 @@ OSIM_URL = os.getenv("OSIM_URL", "https://localhost:5173/")
 SELENIUM_URL = os.getenv("SELENIUM_URL", "http://127.0.0.1:4444")
 BUGZILLA_API_KEY = os.getenv("BUGZILLA_API_KEY")
 JIRA_API_KEY = os.getenv("JIRA_API_KEY")
-AFFECTS_MODULE_COMPONENT_PAIR = json.loads(os.getenv("AFFECTS_MODULE_COMPONENT_PAIR"))
+try:
+    AFFECTS_MODULE_COMPONENT_PAIR = json.loads(os.getenv("AFFECTS_MODULE_COMPONENT_PAIR", ""))
+except ValueError:
+    # reported by the preflight checks
+    AFFECTS_MODULE_COMPONENT_PAIR = {}
+# update stream of the affects created on a module, looked up in OSIDB for the modules missing
+try:
+    AFFECTS_MODULE_UPDATE_STREAM = json.loads(os.getenv("AFFECTS_MODULE_UPDATE_STREAM", "{}"))
+except ValueError:
+    # reported by the preflight checks
+    AFFECTS_MODULE_UPDATE_STREAM = {}
 TIMEOUT = "10"
+# check OSIM, OSIDB, the grid and the configuration before the run, and how long a check may take
+PREFLIGHT = os.getenv("PREFLIGHT", "true").lower() == "true"
+PREFLIGHT_TIMEOUT = int(os.getenv("PREFLIGHT_TIMEOUT", "5"))
+# number of logged-in browsers kept between scenarios, 0 quits them after each scenario
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+# a session broker keeping logged-in sessions between runs, see session_broker.py
+SESSION_BROKER_URL = os.getenv("SESSION_BROKER_URL")
+# name of the grid sessions, the parallel runner tells its sessions apart by it
+GRID_SESSION_NAME = os.getenv("GRID_SESSION_NAME")
+# seconds between two reads of the free grid slots while the parallel runner waits for one
+GRID_POLL_INTERVAL = float(os.getenv("GRID_POLL_INTERVAL", "2"))
+# seconds a behave process of a parallel run waits for grid slots before it fails
+GRID_WAIT_TIMEOUT = float(os.getenv("GRID_WAIT_TIMEOUT", "900"))
+# log in through the UI once, then inject the captured state into new sessions
+INJECT_AUTH_STATE = os.getenv("INJECT_AUTH_STATE", "false").lower() == "true"
+AUTH_STATE_FILE = os.getenv("AUTH_STATE_FILE")
+# time every WebDriver command and attribute it to page object methods
+TRACE_WEBDRIVER = os.getenv("TRACE_WEBDRIVER", "false").lower() == "true"
+# time every step and page object method, see step_metrics.py
+STEP_METRICS = os.getenv("STEP_METRICS", "false").lower() == "true"
+# number of slowest steps and page object methods reported at the end of a run
+STEP_METRICS_TOP = int(os.getenv("STEP_METRICS_TOP", "10"))
+# check the saved flaws in the UI (ui) or read them from OSIDB (osidb), see flaw_checks.py
+VERIFY_WITH = os.getenv("VERIFY_WITH", "ui")
+# CVE IDs given to the flaws of the tests, a range no real CVE uses
+CVE_TEST_PREFIX = os.getenv("CVE_TEST_PREFIX", "CVE-1999-9")
 CVSS_COMMENT_FLAW_ID = os.getenv("CVSS_COMMENT_FLAW_ID", "CVE-2024-9053")
-# tmp data file related variables
-TMP_DATA_FILE_NAME = "tmp_data.txt"
+# SQLite database of the data handed between steps, and the namespace of this behave process
+TMP_DATA_FILE_NAME = os.getenv("TMP_DATA_FILE", "tmp_data.db")
+TMP_DATA_NAMESPACE = os.getenv("TMP_DATA_NAMESPACE", "default")
+# the behave calls of a run share its ID, the default namespace is emptied when a new run starts
+RUN_ID = os.getenv("RUN_ID", "")
 FLAW_ID_KEY = 'FLAW_ID'
+# public and embargoed flaws created before the run and leased to the scenarios of
+# @leased_public_flaw and @leased_embargoed_flaw features, 0 disables the pool
+FLAW_POOL_SIZE = int(os.getenv("FLAW_POOL_SIZE", "0"))
+# HTML snapshots of the OSIM pages served by FakeWebDriver
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
 EMBARGOED_FLAW_UUID_KEY = 'EMBARGOED_FLAW_UUID'
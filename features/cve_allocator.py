@@ -0,0 +1,98 @@
+"""
+Hand out CVE IDs no flaw uses yet, so creating or updating a flaw with a new
+CVE ID never fails on a duplicate and never waits out a UI timeout.
+
+The IDs are taken from a range reserved for the tests, CVE-1999-9xxxxxxx
+by default (CVE_TEST_PREFIX): eight digit sequence numbers are not used by
+the real CVEs of 1999. Candidates are checked against OSIDB in batches and
+reserved in the run data, so two behave processes of a run never get the
+same one.
+
+The flaw list hides the embargoed flaws the OSIDB user can not see, the
+available-flaws endpoint tells whether such a flaw is still being worked on.
+An embargoed flaw whose work is done can still hold a candidate unnoticed.
+"""
+import random
+
+import requests
+
+from features.constants import CVE_TEST_PREFIX
+from features.osidb_client import OsidbClient
+from features.run_data import run_data
+
+
+# namespace of the run data holding the reserved CVE IDs
+RESERVED_NAMESPACE = "cve_ids"
+
+BATCH_SIZE = 5
+
+# the sequence numbers of a CVE ID have 4 to 8 digits
+SEQUENCE_DIGITS = 8
+
+
+def random_cve_id(prefix=CVE_TEST_PREFIX):
+    digits = SEQUENCE_DIGITS - len(prefix.rsplit("-", 1)[-1])
+    return f"{prefix}{random.randrange(10 ** digits):0{digits}d}"
+
+
+class CveAllocator:
+    """
+    Reserve unused CVE IDs of the test range, checked against OSIDB a
+    batch at a time
+    """
+
+    def __init__(self, client, store, owner, batch_size=BATCH_SIZE):
+        self.client = client
+        self.store = store
+        self.owner = owner
+        self.batch_size = batch_size
+        self.available = []
+
+    def listed(self, candidates):
+        """
+        Return the candidates used by a flaw of the list, in one query
+        """
+        flaws = self.client.get(
+            "osidb/api/v2/flaws", cve_id=",".join(candidates), include_fields="cve_id", limit=len(candidates))
+        return {flaw["cve_id"] for flaw in flaws["results"]}
+
+    def is_worked_on(self, cve_id):
+        try:
+            # 204 when no flaw uses it or its flaw is done, 404 while one is worked on
+            self.client.get(f"osidb/api/v1/available-flaws/{cve_id}")
+        except requests.HTTPError as e:
+            if e.response.status_code == 404:
+                return True
+            raise
+        return False
+
+    def check(self, candidates):
+        """
+        Return the candidates no flaw uses
+        """
+        listed = self.listed(candidates)
+        unlisted = [cve_id for cve_id in candidates if cve_id not in listed]
+        worked_on = self.client.map(self.is_worked_on, unlisted)
+        return [cve_id for cve_id, is_worked_on in zip(unlisted, worked_on) if not is_worked_on]
+
+    def allocate(self):
+        while not self.available:
+            candidates = list({random_cve_id() for _ in range(self.batch_size)})
+            for cve_id in self.check(candidates):
+                if self.store.compare_and_set(cve_id, None, self.owner, namespace=RESERVED_NAMESPACE):
+                    self.available.append(cve_id)
+        return self.available.pop()
+
+
+_allocator = None
+
+
+def allocate_cve():
+    """
+    Return a CVE ID of the test range which no flaw uses
+    """
+    global _allocator
+    if _allocator is None:
+        store = run_data()
+        _allocator = CveAllocator(OsidbClient(), store, store.namespace)
+    return _allocator.allocate()
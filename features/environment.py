@@ -1,3 +1,93 @@
+import functools
+
+from features.auth_state import AuthStateStore
+from features.command_trace import CommandProfile
+from features.constants import (
+    AUTH_STATE_FILE,
+    BROWSER_POOL_SIZE,
+    FLAW_POOL_SIZE,
+    INJECT_AUTH_STATE,
+    PREFLIGHT,
+    SESSION_BROKER_URL,
+    STEP_METRICS,
+    STEP_METRICS_TOP,
+    TMP_DATA_NAMESPACE,
+    TRACE_WEBDRIVER,
+    VERIFY_WITH
+)
+from features.flaw_checks import FlawChecks
+from features.flaw_fixtures import FlawFactory, FlawPool
+from features.osidb_client import OsidbClient
+from features.preflight import preflight
+from features.run_data import run_data, start_run
+from features.session_broker import BrokerSessionPool
+from features.session_pool import SessionPool
+from features.step_metrics import StepMetrics
+from features.utils import init_remote_firefox_browser
+
+
+def before_all(context):
+    start_run()
+    if PREFLIGHT:
+        preflight()
+    context.step_metrics = StepMetrics() if STEP_METRICS else None
+    if context.step_metrics is not None:
+        context.step_metrics.install()
+    context.command_profile = CommandProfile() if TRACE_WEBDRIVER else None
+    if SESSION_BROKER_URL:
+        context.session_pool = BrokerSessionPool(SESSION_BROKER_URL, context.command_profile)
+    else:
+        context.session_pool = SessionPool(
+            functools.partial(init_remote_firefox_browser, context.command_profile), BROWSER_POOL_SIZE)
+    context.auth_state = AuthStateStore(AUTH_STATE_FILE) if INJECT_AUTH_STATE else None
+    context.flaw_factory = FlawFactory(OsidbClient())
+    context.flaw_pool = None
+    if FLAW_POOL_SIZE:
+        context.flaw_pool = FlawPool(context.flaw_factory, run_data(), TMP_DATA_NAMESPACE, FLAW_POOL_SIZE)
+        context.flaw_pool.fill()
+
+
+def before_scenario(context, scenario):
+    if context.step_metrics is not None:
+        context.step_metrics.start_scenario(scenario)
+    context.leased_flaw = None
+    context.flaw_checks = FlawChecks(context.flaw_factory.client) if VERIFY_WITH == "osidb" else None
+    if context.flaw_pool is not None:
+        if "leased_public_flaw" in scenario.effective_tags:
+            context.leased_flaw = context.flaw_pool.lease(embargoed=False)
+        elif "leased_embargoed_flaw" in scenario.effective_tags:
+            context.leased_flaw = context.flaw_pool.lease(embargoed=True)
+
+
+def before_step(context, step):
+    if context.step_metrics is not None:
+        context.step_metrics.start_step(step)
+    if context.command_profile is not None:
+        context.command_profile.step = f"{step.keyword} {step.name}"
+
+
+def after_step(context, step):
+    if context.step_metrics is not None:
+        context.step_metrics.end_step(step)
+    if context.command_profile is not None:
+        context.command_profile.step = None
+
+
 def after_scenario(context, scenario):
     if hasattr(context, "browser"):
-        context.browser.quit()
+        context.session_pool.release(context.browser)
+    if context.leased_flaw is not None:
+        context.flaw_pool.release(context.leased_flaw)
+    # resetting the browser for the next scenario is part of this one
+    if context.step_metrics is not None:
+        context.step_metrics.end_scenario(scenario)
+
+
+def after_all(context):
+    context.session_pool.close()
+    if context.flaw_pool is not None:
+        context.flaw_pool.close()
+    if context.step_metrics is not None:
+        context.step_metrics.write(context.config, STEP_METRICS_TOP)
+    if context.command_profile is not None:
+        context.command_profile.write(context.config.junit_directory, STEP_METRICS_TOP)
@@ -0,0 +1,550 @@
+"""
+An in-process WebDriver answering commands against HTML snapshots of the
+OSIM pages, captured from a live run by features/capture_snapshots.py.
+Page objects can be exercised against it without OSIM, OSIDB or a browser:
+
+    driver = FakeWebDriver()
+    driver.get(get_flaw_detail_url("CVE-2024-0001"))
+    page = FlawDetailPage(driver)
+    page.timeout = 0
+    assert page.get_input_field_value_using_relative_locator("titleText")
+
+Finding elements, reading their text, attributes and properties, typing
+and clicking work on the snapshot. Clicks, typing and scripts are recorded
+in driver.actions, but the page does not react to them apart from form
+state: typed values, selected options and checked boxes. Nothing changes
+by itself, so waits for a change time out at once.
+
+Scripts can not be run in Python: the scripts of the page objects are
+answered by handlers, others raise JavascriptException unless a handler is
+registered in driver.scripts (exact script) or driver.script_patterns
+(regular expression).
+"""
+import json
+import os
+import re
+import urllib.parse
+import uuid
+
+from cssselect import HTMLTranslator
+from lxml import html
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    JavascriptException,
+    NoSuchElementException,
+    NoSuchWindowException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.file_detector import LocalFileDetector
+from selenium.webdriver.remote.locator_converter import LocatorConverter
+from selenium.webdriver.remote.switch_to import SwitchTo
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from features.capture_snapshots import HIDDEN_ATTRIBUTE
+from features.constants import OSIM_URL, SNAPSHOT_DIR
+from features.pages.base import (
+    GENERATION_SCRIPT,
+    READ_TABLE_SCRIPT,
+    SCROLL_INTO_VIEW_SCRIPT,
+    TRACK_REQUESTS_SCRIPT,
+    WAIT_SCRIPT,
+)
+from features.pages.flaw_detail_page import FIELD_INDEX_SCRIPT
+
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# sha256 of the page object scripts answered by a Python mirror below, the
+# tests in features/tests fail when one changes until its mirror is updated
+MIRRORED_SCRIPTS = {
+    "GENERATION_SCRIPT": "9da3e79f0093bc58245e0d4a6be93a4470ce98ed490aca496c042f2cae16b8ec",
+    "READ_TABLE_SCRIPT": "ad5e3f2d5abe3ceb23ad6d2ae3118756bd086457c89067ff53118f3e460af047",
+    "WAIT_SCRIPT": "93bbbbedd479d6160ff598c708f3e8549cb896f9b2dcef5d8045ce416849e434",
+    "FIELD_INDEX_SCRIPT": "3e0550bf84b02b58de81124da2ee3a6d1c1bad4e980ac2bead9284132b0add89",
+}
+
+# snapshot name -> OSIM route, relative to OSIM_URL
+ROUTES = (
+    ("flaw_detail", re.compile(r"^flaws/(?!new$)[^/]+$")),
+    ("advanced_search", re.compile(r"^search$")),
+    ("settings", re.compile(r"^settings$")),
+    ("flaw_list", re.compile(r"^$")),
+)
+
+NEVER_DISPLAYED = {"head", "script", "style", "template", "title", "meta", "link", "noscript"}
+
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "details", "dialog", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "option", "p", "pre", "section", "summary",
+    "table", "tbody", "tfoot", "thead", "tr", "ul",
+}
+
+# controls of the field rows, mirrors FIELD_INDEX_SCRIPT
+FIELD_CONTROLS = (
+    "input, select, textarea, .osim-editable-text-pen, .osim-editable-date-pen, span.form-control")
+FIELD_PARTS = {
+    "input": "input.form-control, input.osim-pill-list-input",
+    "select": "select.form-select",
+    "textarea": "textarea",
+    "editButton": ".osim-editable-text-pen, .osim-editable-date-pen",
+    "valueSpan": ".osim-editable-text-value, .osim-editable-date-value, span.form-control",
+}
+
+
+translator = HTMLTranslator()
+
+
+def css_to_xpath(selector, prefix="descendant::"):
+    return translator.css_to_xpath(selector, prefix=prefix)
+
+
+def route_of(url):
+    """
+    Return the name of the snapshot serving an OSIM URL
+    """
+    osim_path = urllib.parse.urlsplit(OSIM_URL).path
+    path = urllib.parse.urlsplit(url).path
+    if path.startswith(osim_path):
+        path = path[len(osim_path):]
+    path = path.strip("/")
+    for name, pattern in ROUTES:
+        if pattern.match(path):
+            return name
+    return None
+
+
+def hidden_itself(node):
+    if not isinstance(node.tag, str) or node.tag in NEVER_DISPLAYED:
+        return True
+    if node.get(HIDDEN_ATTRIBUTE) is not None or node.get("hidden") is not None:
+        return True
+    if node.tag == "input" and (node.get("type") or "").lower() == "hidden":
+        return True
+    if "d-none" in (node.get("class") or "").split():
+        return True
+    style = (node.get("style") or "").replace(" ", "").lower()
+    return "display:none" in style or "visibility:hidden" in style
+
+
+def is_displayed(node):
+    while node is not None:
+        if hidden_itself(node):
+            return False
+        node = node.getparent()
+    return True
+
+
+def inner_text(node):
+    """
+    Approximate the rendered text of an element: the text of its displayed
+    descendants, one line per block element, whitespace collapsed
+    """
+    if not is_displayed(node):
+        return ""
+
+    parts = []
+
+    def walk(element):
+        if hidden_itself(element):
+            return
+        block = element.tag in BLOCK_TAGS
+        if element.tag == "br" or block:
+            parts.append("\n")
+        elif element.tag in ("td", "th"):
+            parts.append(" ")
+        parts.append(element.text or "")
+        for child in element:
+            walk(child)
+            parts.append(child.tail or "")
+        if block:
+            parts.append("\n")
+
+    walk(node)
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def root_of(node):
+    # lxml keeps the document of a removed node, only its ancestors tell it apart
+    while node.getparent() is not None:
+        node = node.getparent()
+    return node
+
+
+def parent_select(option):
+    node = option.getparent()
+    while node is not None and node.tag != "select":
+        node = node.getparent()
+    return node
+
+
+class FakeWebDriver(WebDriver):
+    """
+    A WebDriver without a browser, serving the snapshots of a directory
+    written by capture_snapshots by route: the flaw detail snapshot is
+    served for every flaw detail URL
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        # no session is started, execute() answers the commands itself
+        self.command_executor = None
+        self.session_id = "fake-session"
+        self._is_remote = False
+        self.caps = {"browserName": "fake"}
+        self.pinned_scripts = {}
+        self.error_handler = ErrorHandler()
+        self._switch_to = SwitchTo(self)
+        self.file_detector = LocalFileDetector()
+        self.locator_converter = LocatorConverter()
+        self._authenticator_id = None
+        self._websocket_connection = None
+        self._script = None
+
+        self.snapshot_dir = snapshot_dir
+        with open(os.path.join(snapshot_dir, "index.json"), "r") as f:
+            self.snapshot_urls = json.load(f)
+        self.actions = []
+        self.cookies = []
+        # lxml keeps one proxy per node while it is referenced, nodes are keys
+        self.elements = {}
+        self.element_ids = {}
+        self.tabs = {}
+        self.handle = self.new_tab()
+
+        self.scripts = {
+            TRACK_REQUESTS_SCRIPT: lambda args: None,
+            SCROLL_INTO_VIEW_SCRIPT: lambda args: None,
+            READ_TABLE_SCRIPT: self.read_table,
+            GENERATION_SCRIPT: self.generation,
+            FIELD_INDEX_SCRIPT: self.field_index,
+            WAIT_SCRIPT: self.wait,
+            "arguments[0].click();": lambda args: self.click(args[0], "script click"),
+            "arguments[0].value = '';": lambda args: self.set_value(args[0], ""),
+            "return arguments[0][arguments[1]]": lambda args: self.property(args[0], args[1]),
+        }
+        self.script_patterns = [
+            (re.compile(r"^/\* getAttribute \*/"), lambda args: self.attribute(args[0], args[1])),
+            (re.compile(r"^/\* isDisplayed \*/"), lambda args: is_displayed(args[0])),
+            (re.compile(r"^arguments\[0\]\.scrollIntoView\(.*\);?$"), lambda args: None),
+            (re.compile(r"^window\.scrollTo\(.*\);?$"), lambda args: None),
+            (re.compile(r"^arguments\[0\]\.style\.visibility='(\w+)'$"), self.set_visibility),
+        ]
+
+        self.commands = {
+            Command.GET: lambda params: self.load(params["url"]),
+            Command.REFRESH: lambda params: self.load(self.tab["url"]),
+            Command.GET_CURRENT_URL: lambda params: self.tab["url"],
+            Command.GET_TITLE: lambda params: self.title(),
+            Command.GET_PAGE_SOURCE: lambda params: html.tostring(self.document(), encoding="unicode"),
+            Command.FIND_ELEMENT: lambda params: self.find(params, single=True),
+            Command.FIND_ELEMENTS: lambda params: self.find(params, single=False),
+            Command.FIND_CHILD_ELEMENT: lambda params: self.find(params, single=True),
+            Command.FIND_CHILD_ELEMENTS: lambda params: self.find(params, single=False),
+            Command.GET_ELEMENT_TEXT: lambda params: inner_text(self.node(params["id"])),
+            Command.GET_ELEMENT_TAG_NAME: lambda params: self.node(params["id"]).tag,
+            Command.GET_ELEMENT_ATTRIBUTE: lambda params: self.node(params["id"]).get(params["name"]),
+            Command.GET_ELEMENT_PROPERTY: lambda params: self.property(self.node(params["id"]), params["name"]),
+            Command.GET_ELEMENT_RECT: lambda params: {"x": 0, "y": 0, "width": 0, "height": 0},
+            Command.IS_ELEMENT_SELECTED: lambda params: self.is_selected(self.node(params["id"])),
+            Command.IS_ELEMENT_ENABLED: lambda params: self.node(params["id"]).get("disabled") is None,
+            Command.CLICK_ELEMENT: lambda params: self.click(self.node(params["id"]), "click"),
+            Command.CLEAR_ELEMENT: lambda params: self.set_value(self.node(params["id"]), "", "clear"),
+            Command.SEND_KEYS_TO_ELEMENT: lambda params: self.send_keys(self.node(params["id"]), params["text"]),
+            Command.W3C_EXECUTE_SCRIPT: lambda params: self.run_script(params["script"], params["args"]),
+            Command.W3C_EXECUTE_SCRIPT_ASYNC: lambda params: self.run_script(params["script"], params["args"]),
+            Command.W3C_GET_CURRENT_WINDOW_HANDLE: lambda params: self.handle,
+            Command.W3C_GET_WINDOW_HANDLES: lambda params: list(self.tabs),
+            Command.NEW_WINDOW: lambda params: {"handle": self.new_tab(), "type": "tab"},
+            Command.SWITCH_TO_WINDOW: lambda params: self.switch_tab(params["handle"]),
+            Command.CLOSE: lambda params: self.close_tab(),
+            Command.QUIT: lambda params: None,
+            Command.GET_ALL_COOKIES: lambda params: list(self.cookies),
+            Command.ADD_COOKIE: lambda params: self.cookies.append(params["cookie"]),
+            Command.DELETE_ALL_COOKIES: lambda params: self.cookies.clear(),
+            Command.SET_TIMEOUTS: lambda params: None,
+        }
+
+    def execute(self, driver_command, params=None):
+        handler = self.commands.get(driver_command)
+        if handler is None:
+            raise WebDriverException(f"FakeWebDriver does not support the {driver_command} command")
+        value = handler(self._wrap_value(params or {}))
+        return {"value": self._unwrap_value(value)}
+
+    def quit(self):
+        self.tabs.clear()
+        self.elements.clear()
+        self.element_ids.clear()
+
+    # tabs and snapshots
+
+    @property
+    def tab(self):
+        return self.tabs[self.handle]
+
+    def new_tab(self):
+        handle = uuid.uuid4().hex
+        self.tabs[handle] = {"url": "about:blank", "document": None, "loads": 0}
+        return handle
+
+    def switch_tab(self, handle):
+        if handle not in self.tabs:
+            raise NoSuchWindowException(f"No tab {handle}")
+        self.handle = handle
+
+    def close_tab(self):
+        del self.tabs[self.handle]
+        return list(self.tabs)
+
+    def load(self, url):
+        self.tab["url"] = url
+        self.tab["loads"] += 1
+        self.tab["document"] = None
+        if url == "about:blank" or not url.startswith(OSIM_URL):
+            return
+        name = route_of(url)
+        if name is None or name not in self.snapshot_urls:
+            raise WebDriverException(f"No snapshot of {url} in {self.snapshot_dir}")
+        self.tab["document"] = html.parse(os.path.join(self.snapshot_dir, f"{name}.html")).getroot()
+
+    def document(self):
+        if self.tab["document"] is None:
+            raise WebDriverException(f"{self.tab['url']} is not an OSIM snapshot")
+        return self.tab["document"]
+
+    def open(self, name):
+        """
+        Open a snapshot at the URL it was captured from
+        """
+        self.load(self.snapshot_urls[name])
+
+    def title(self):
+        titles = self.document().xpath("//title")
+        return titles[0].text_content() if titles else ""
+
+    # elements
+
+    def ref(self, node):
+        element_id = self.element_ids.get(node)
+        if element_id is None:
+            element_id = self.element_ids[node] = uuid.uuid4().hex
+            self.elements[element_id] = node
+        return {ELEMENT_KEY: element_id}
+
+    def node(self, value):
+        element_id = value[ELEMENT_KEY] if isinstance(value, dict) else value
+        node = self.elements.get(element_id)
+        if node is None or root_of(node) is not self.tab["document"]:
+            raise StaleElementReferenceException(f"Element {element_id} is not in the current page")
+        return node
+
+    def find_all(self, by, value, root=None):
+        root = self.document() if root is None else root
+        if by == By.XPATH:
+            nodes = root.xpath(value)
+            return [node for node in nodes if isinstance(node, html.HtmlElement)]
+        if by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+            links = root.xpath("descendant-or-self::a")
+            if by == By.LINK_TEXT:
+                return [link for link in links if inner_text(link) == value]
+            return [link for link in links if value in inner_text(link)]
+        selector = {
+            By.ID: f'[id="{value}"]',
+            By.NAME: f'[name="{value}"]',
+            By.CLASS_NAME: f".{value}",
+            By.TAG_NAME: value,
+        }.get(by, value)
+        prefix = "descendant-or-self::" if root is self.document() else "descendant::"
+        return root.xpath(css_to_xpath(selector, prefix))
+
+    def find(self, params, single):
+        root = self.node(params["id"]) if "id" in params else None
+        nodes = self.find_all(params["using"], params["value"], root)
+        if single:
+            if not nodes:
+                raise NoSuchElementException(f"Unable to locate element: {params['value']}")
+            return self.ref(nodes[0])
+        return [self.ref(node) for node in nodes]
+
+    def property(self, node, name):
+        if name == "value":
+            if node.tag == "textarea":
+                return node.text or ""
+            if node.tag == "select":
+                selected = [option for option in node.iter("option") if self.is_selected(option)]
+                return self.property(selected[0], "value") if selected else ""
+            if node.tag == "option":
+                return node.get("value", inner_text(node))
+            return node.get("value", "")
+        if name in ("checked", "selected"):
+            return self.is_selected(node)
+        if name in ("innerText", "textContent"):
+            return inner_text(node) if name == "innerText" else node.text_content()
+        if name in ("href", "src") and node.get(name) is not None:
+            return urllib.parse.urljoin(self.tab["url"], node.get(name))
+        return node.get(name)
+
+    def attribute(self, node, name):
+        if name in ("value", "href", "src"):
+            return self.property(node, name)
+        if name in ("checked", "selected", "disabled", "readonly", "multiple", "required"):
+            present = self.is_selected(node) if name in ("checked", "selected") else node.get(name) is not None
+            return "true" if present else None
+        return node.get(name)
+
+    def is_selected(self, node):
+        if node.tag == "option":
+            return node.get("selected") is not None
+        return node.get("checked") is not None
+
+    # interactions
+
+    def record(self, action, node, value=None):
+        self.actions.append((action, node.getroottree().getpath(node), value))
+
+    def click(self, node, action):
+        if not is_displayed(node) and action == "click":
+            raise ElementNotInteractableException(f"{node.getroottree().getpath(node)} is not displayed")
+        self.record(action, node)
+        if node.tag == "option":
+            select = parent_select(node)
+            if select is not None and select.get("multiple") is None:
+                for option in select.iter("option"):
+                    option.attrib.pop("selected", None)
+            node.set("selected", "")
+        elif node.tag == "input" and (node.get("type") or "").lower() in ("checkbox", "radio"):
+            if node.get("checked") is None:
+                node.set("checked", "")
+            else:
+                node.attrib.pop("checked")
+
+    def set_value(self, node, value, action=None):
+        if action:
+            self.record(action, node)
+        if node.tag == "textarea":
+            node.text = value
+        else:
+            node.set("value", value)
+
+    def send_keys(self, node, text):
+        self.record("send_keys", node, text)
+        value = self.property(node, "value")
+        control = select_all = False
+        for key in text:
+            if key == Keys.CONTROL:
+                control = True
+            elif key == Keys.NULL:
+                control = False
+            elif control and key.lower() == "a":
+                select_all = True
+            elif key == Keys.BACKSPACE:
+                value = "" if select_all else value[:-1]
+                select_all = False
+            elif Keys.NULL <= key <= Keys.ZENKAKU_HANKAKU:
+                # other special keys do not change the value
+                continue
+            else:
+                value = key if select_all else value + key
+                select_all = False
+        self.set_value(node, value)
+
+    # scripts
+
+    def run_script(self, script, args):
+        args = [self.node(arg) if isinstance(arg, dict) and ELEMENT_KEY in arg else arg for arg in args]
+        handler = self.scripts.get(script)
+        if handler is not None:
+            return handler(args)
+        for pattern, handler in self.script_patterns:
+            match = pattern.match(script)
+            if match:
+                return handler(args, *match.groups()) if match.groups() else handler(args)
+        raise JavascriptException(
+            f"FakeWebDriver does not run this script, register a handler for it: {script.strip()[:80]}")
+
+    def set_visibility(self, args, visibility):
+        node = args[0]
+        style = re.sub(r"visibility\s*:\s*\w+;?", "", node.get("style") or "")
+        node.set("style", f"{style}visibility:{visibility};")
+
+    def read_table(self, args):
+        rows_xpath, columns = args
+        result = []
+        for row in self.find_all(By.XPATH, rows_xpath):
+            values = {}
+            for field, (xpath, name) in columns.items():
+                cells = self.find_all(By.XPATH, xpath, row)
+                if not cells:
+                    values[field] = None
+                elif name:
+                    values[field] = self.property(cells[0], name)
+                else:
+                    values[field] = inner_text(cells[0])
+            result.append(values)
+        return result
+
+    def generation(self, args):
+        element, by, value = args[:3]
+        # the form state is the only change of a snapshot, the locators
+        # are checked anyway, as after a mutation
+        usable = element is not None and is_displayed(element)
+        return {
+            "token": f"{self.handle}:{self.tab['loads']}",
+            "mutations": 0,
+            "usable": usable and self.find_all(by, value)[:1] == [element],
+        }
+
+    def wait(self, args):
+        condition, by, value = args[:3]
+        if condition in ("requests", "quiet"):
+            return {"ok": True, "pending": 0}
+        nodes = self.find_all(by, value)
+        ok = {
+            "present": bool(nodes),
+            "absent": not nodes,
+            "visible": any(is_displayed(node) for node in nodes),
+            "hidden": not any(is_displayed(node) for node in nodes),
+        }[condition]
+        if not ok:
+            # a snapshot never changes, waiting longer does not help
+            raise TimeoutException(f"{value} is never {condition} in the snapshot")
+        return {"ok": True, "pending": 0}
+
+    def field_index(self, args):
+        index = {}
+        for key, xpath in args[0].items():
+            labels = self.find_all(By.XPATH, xpath)
+            if not labels:
+                continue
+            row = labels[0].getparent()
+            depth = 0
+            while row is not None and depth < 3 and not self.find_all(By.CSS_SELECTOR, FIELD_CONTROLS, row):
+                row = row.getparent()
+                depth += 1
+            if row is None or not self.find_all(By.CSS_SELECTOR, FIELD_CONTROLS, row):
+                continue
+
+            field = {"label": self.ref(labels[0]), "row": self.ref(row), "value": None}
+            nodes = {}
+            for part, selector in FIELD_PARTS.items():
+                found = self.find_all(By.CSS_SELECTOR, selector, row)
+                nodes[part] = found[0] if found else None
+                field[part] = self.ref(found[0]) if found else None
+            if nodes["textarea"] is not None:
+                field["value"] = self.property(nodes["textarea"], "value")
+            elif nodes["select"] is not None:
+                selected = [option for option in nodes["select"].iter("option") if self.is_selected(option)]
+                field["value"] = inner_text(selected[0]) if selected else None
+            elif nodes["valueSpan"] is not None:
+                field["value"] = inner_text(nodes["valueSpan"])
+            elif nodes["input"] is not None:
+                field["value"] = self.property(nodes["input"], "value")
+            index[key] = field
+        return index
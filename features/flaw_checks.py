@@ -0,0 +1,84 @@
+"""
+Check that a flaw saved through OSIM holds the expected values by reading it
+from OSIDB, instead of reloading its detail page and reading the form back.
+
+It is used with VERIFY_WITH=osidb. The checks of a step are collected, then
+every flaw they need is fetched once, with only the fields the checks read
+(include_fields). A step checks the one flaw it saved, and the next steps may
+change it again, so the flaws are fetched one after another when the step
+ends. Every failed check is reported, not only the first one. Steps testing
+what the page shows keep reading the page.
+"""
+import datetime
+
+
+def osidb_datetime(value, format):
+    """
+    Format an OSIDB timestamp like OSIM shows it, '' when not set
+    """
+    if not value:
+        return ""
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).strftime(format)
+
+
+def acknowledgment_label(acknowledgment):
+    # as listed by OSIM
+    return f"{acknowledgment['name']} from {acknowledgment['affiliation']}"
+
+
+class FlawChecks:
+    """
+    The checks of a step on flaws read from OSIDB. read() turns the value
+    of a field into the value shown by OSIM.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        # flaw UUID -> [(field, check)]
+        self.checks = {}
+
+    def add(self, flaw_uuid, field, check):
+        self.checks.setdefault(flaw_uuid, []).append((field, check))
+
+    def expect(self, flaw_uuid, field, expected, read=lambda value: value, equal=True):
+        """
+        Expect a field to be, or not to be, a value
+        """
+        def check(value):
+            actual = read(value)
+            if (actual == expected) != equal:
+                return f"{field} should {'' if equal else 'not '}be {expected!r}, got {actual!r}"
+        self.add(flaw_uuid, field, check)
+
+    def expect_item(self, flaw_uuid, field, item, read, present=True):
+        """
+        Expect a list field to have, or not to have, an item read as given
+        """
+        def check(value):
+            items = [read(entry) for entry in value or []]
+            if (item in items) != present:
+                return f"{field} should {'' if present else 'not '}have {item!r}, got {items!r}"
+        self.add(flaw_uuid, field, check)
+
+    def fetch(self, flaw_uuid, fields):
+        return self.client.get(f"osidb/api/v2/flaws/{flaw_uuid}", include_fields=",".join(sorted(fields)))
+
+    def verify(self):
+        """
+        Fetch the flaws and run the checks, raise an AssertionError
+        listing the failed ones
+        """
+        checks, self.checks = self.checks, {}
+        if not checks:
+            return
+        flaw_uuids = list(checks)
+        fields = [{field for field, _ in checks[flaw_uuid]} for flaw_uuid in flaw_uuids]
+        flaws = [self.fetch(flaw_uuid, flaw_fields) for flaw_uuid, flaw_fields in zip(flaw_uuids, fields)]
+
+        errors = [
+            f"flaw {flaw_uuid}: {error}"
+            for flaw_uuid, flaw in zip(flaw_uuids, flaws)
+            for field, check in checks[flaw_uuid]
+            for error in [check(flaw.get(field))] if error
+        ]
+        assert not errors, "\n".join(errors)
@@ -1,38 +1,52 @@
+@leased_embargoed_flaw
 Feature: Flaw detail testing on embargo flaw
 
     Background: Before run scenarios
       Given I am an analyst AND I am logged into OSIM
       * I set the bugzilla api key and jira api key
-      * I go to an embargoed flaw detail page
 
     Scenario: Modify embargoed flaw with past public date
+      Given I go to an embargoed flaw detail page
       When I update the embargoed flaw with a past public date
       Then The embargoed flaw update is failed
 
     Scenario: Modify embargoed flaw with future public date
+      Given I go to an embargoed flaw detail page
       When I update the embargoed flaw with a future public date
       Then The embargoed flaw is updated
 
     Scenario: Add new affect for an embargoed flaw
+      Given I go to an embargoed flaw detail page
       When I add a new affect with valid data
       Then The affect is added
 
     Scenario: Update affects for an embargoed flaw
+      Given the flaw has at least
+        | data            | count |
+        | affects         | 1     |
+      And I go to an embargoed flaw detail page
       When I update the affects of the flaw and click 'Save Changes' button
       Then All changes are saved
 
     Scenario: Delete an affect from a flaw
+      Given the flaw has at least
+        | data            | count |
+        | affects         | 1     |
+      And I go to an embargoed flaw detail page
       When I delete an affect of the flaw
       Then The affect is deleted
 
     Scenario: Bulk delete affects from a flaw
+      Given I go to an embargoed flaw detail page
       When I bulk delete selected affects of the flaw
       Then The selected affects are deleted
 
     Scenario: Make flaw public and add public date
+      Given I go to an embargoed flaw detail page
       When I unembargo this flaw and add public date
       Then Flaw is unembargoed and have public date
 
     Scenario: Reject a flaw
+      Given I go to an embargoed flaw detail page
       When I click reject button to reject a flaw
       Then The flaw is rejected
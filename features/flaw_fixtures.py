@@ -0,0 +1,323 @@
+"""
+Create flaws and their comments, acknowledgments, references and CVSS scores
+through the OSIDB API, for scenarios which need a flaw to exist but do not test
+how it is created. The flaw creation itself is tested through the UI in the
+flaw_create features.
+
+A scenario describes the flaw it needs with a spec, e.g. from a step table:
+
+    | data            | count |
+    | acknowledgments | 1     |
+    | cvss_scores     | 1     |
+    | affects         | 2     |
+
+Affects use the modules and components of AFFECTS_MODULE_COMPONENT_PAIR, so
+trackers can be filed for them, and the update stream of their module from
+AFFECTS_MODULE_UPDATE_STREAM or of an existing affect on it.
+"""
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from features.constants import AFFECTS_MODULE_COMPONENT_PAIR, AFFECTS_MODULE_UPDATE_STREAM, FLAW_ID_KEY
+from features.cve_allocator import allocate_cve
+from features.run_data import CreatedFlaw, PooledFlaw, cache_flaw_uuid, end_lease, lease_flaw
+from features.utils import generate_random_text
+
+# prefix of the run data namespaces holding the flaw pools, one by OSIDB URL,
+# shared by the behave processes
+POOL_NAMESPACE = "flaw_pool"
+
+DEFAULT_SPEC = {
+    "embargoed": False,
+    "cve_id": True,
+    "comments": 0,
+    "acknowledgments": 0,
+    "references": 0,
+    # the RH CVSSv3 score shown on the flaw detail page, a flaw has one at most
+    "cvss_scores": 0,
+    "affects": 0,
+}
+
+CVSS3_METRICS = (
+    ("AV", "NALP"), ("AC", "LH"), ("PR", "NLH"), ("UI", "NR"),
+    ("S", "UC"), ("C", "LH"), ("I", "NLH"), ("A", "NLH"),
+)
+
+
+def flaw_spec(table=None, **fields):
+    """
+    Return the spec of a flaw: the defaults updated with the given fields
+    and the counts of related data from a behave table
+    """
+    spec = dict(DEFAULT_SPEC, **fields)
+    for row in table or ():
+        if row["data"] not in RELATED_DATA:
+            raise ValueError(f"Unknown flaw data '{row['data']}', use one of {', '.join(RELATED_DATA)}")
+        spec[row["data"]] = int(row["count"])
+    return spec
+
+
+def generate_cvss3_vector():
+    metrics = "/".join(f"{name}:{random.choice(values)}" for name, values in CVSS3_METRICS)
+    return f"CVSS:3.1/{metrics}"
+
+
+def flaw_payload(spec):
+    payload = {
+        "title": generate_random_text(),
+        "comment_zero": generate_random_text(),
+        "components": [generate_random_text()],
+        "impact": "LOW",
+        "source": "REDHAT",
+        "embargoed": spec["embargoed"],
+    }
+    if not spec["embargoed"]:
+        public_date = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+        payload["unembargo_dt"] = public_date.isoformat()
+    if spec["cve_id"]:
+        payload["cve_id"] = allocate_cve()
+        payload["statement"] = generate_random_text()
+    return payload
+
+
+def comment_payload(flaw):
+    return {"text": generate_random_text(), "is_private": False, "embargoed": flaw["embargoed"]}
+
+
+def acknowledgment_payload(flaw):
+    return {
+        "name": generate_random_text(),
+        "affiliation": generate_random_text(),
+        "from_upstream": False,
+        "embargoed": flaw["embargoed"],
+    }
+
+
+def reference_payload(flaw):
+    return {
+        "url": f"https://www.{generate_random_text().lower()}.com",
+        "description": generate_random_text(),
+        "type": "EXTERNAL",
+        "embargoed": flaw["embargoed"],
+    }
+
+
+def cvss_score_payload(flaw):
+    return {
+        "cvss_version": "V3",
+        "issuer": "RH",
+        "vector": generate_cvss3_vector(),
+        "comment": generate_random_text(),
+        "embargoed": flaw["embargoed"],
+    }
+
+
+def affect_payload(flaw, ps_module, ps_component, ps_update_stream):
+    return {
+        "flaw": flaw["uuid"],
+        "ps_module": ps_module,
+        "ps_component": ps_component,
+        "ps_update_stream": ps_update_stream,
+        "affectedness": "AFFECTED",
+        "resolution": "DELEGATED",
+        "impact": "LOW",
+        "embargoed": flaw["embargoed"],
+    }
+
+
+def affect_payloads(flaw, count, update_stream):
+    """
+    Return the payloads of count new affects of a flaw, on the configured
+    module/component pairs it does not have yet, then on random components.
+    update_stream gives the update stream of a module.
+    """
+    existing = {(affect["ps_module"], affect["ps_component"]) for affect in flaw["affects"]}
+    pairs = [
+        (module, component) for module, components in AFFECTS_MODULE_COMPONENT_PAIR.items()
+        for component in components if (module, component) not in existing
+    ]
+    random.shuffle(pairs)
+    modules = list(AFFECTS_MODULE_COMPONENT_PAIR)
+    while len(pairs) < count:
+        pairs.append((random.choice(modules), generate_random_text()))
+    return [
+        affect_payload(flaw, module, component, update_stream(module)) for module, component in pairs[:count]
+    ]
+
+
+def rh_cvss3_scores(flaw):
+    return [
+        score for score in flaw["cvss_scores"]
+        if score["issuer"] == "RH" and score["cvss_version"] == "V3"
+    ]
+
+
+def one_by_one(payload):
+    # payloads of count items of a kind created one request each
+    return lambda flaw, count: [payload(flaw) for _ in range(count)]
+
+
+# spec key -> (payloads builder, existing data on a flaw, path creating one item or None for the bulk path)
+RELATED_DATA = {
+    "comments": (one_by_one(comment_payload), lambda flaw: flaw["comments"], "comments"),
+    "acknowledgments": (one_by_one(acknowledgment_payload), lambda flaw: flaw["acknowledgments"], "acknowledgments"),
+    "references": (one_by_one(reference_payload), lambda flaw: flaw["references"], "references"),
+    "cvss_scores": (one_by_one(cvss_score_payload), rh_cvss3_scores, "cvss_scores"),
+    # created at once, as OSIM does
+    "affects": (affect_payloads, lambda flaw: flaw["affects"], None),
+}
+
+AFFECTS_BULK_PATH = "osidb/api/v2/affects/bulk"
+
+
+class FlawFactory:
+    """
+    Create flaws matching a spec through an OsidbClient
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.update_streams = dict(AFFECTS_MODULE_UPDATE_STREAM)
+
+    def update_stream(self, ps_module):
+        """
+        Return the configured update stream of a module, else the one of
+        an existing affect on it
+        """
+        if ps_module not in self.update_streams:
+            affects = self.client.get(
+                "osidb/api/v2/affects", ps_module=ps_module, limit=1, include_fields="ps_update_stream")["results"]
+            if not affects or not affects[0]["ps_update_stream"]:
+                raise ValueError(
+                    f"No update stream known for {ps_module}, set it in AFFECTS_MODULE_UPDATE_STREAM")
+            self.update_streams[ps_module] = affects[0]["ps_update_stream"]
+        return self.update_streams[ps_module]
+
+    def get(self, flaw_id):
+        """
+        Get a flaw by its UUID or CVE ID
+        """
+        return self.client.get(f"osidb/api/v2/flaws/{flaw_id}")
+
+    def create(self, spec=None):
+        spec = spec or flaw_spec()
+        flaw = self.client.post("osidb/api/v2/flaws", flaw_payload(spec))
+
+        if flaw["cve_id"]:
+            cache_flaw_uuid(flaw["cve_id"], flaw["uuid"])
+        return self.ensure(flaw["uuid"], spec)
+
+    def ensure(self, flaw_id, spec):
+        """
+        Add the related data a flaw misses to match the counts of a spec,
+        return the updated flaw
+        """
+        flaw = self.get(flaw_id)
+        added = False
+        for name, (payloads, existing, path) in RELATED_DATA.items():
+            missing = spec.get(name, 0) - len(existing(flaw))
+            if missing <= 0:
+                continue
+            if path is None:
+                self.client.post(AFFECTS_BULK_PATH, payloads(flaw, missing, self.update_stream))
+            else:
+                for payload in payloads(flaw, missing):
+                    self.client.post(f"osidb/api/v1/flaws/{flaw['uuid']}/{path}", payload)
+            added = True
+
+        return self.get(flaw["uuid"]) if added else flaw
+
+
+class FlawPool:
+    """
+    Public and embargoed flaws created before the run and leased to one
+    scenario each, so scenarios changing a flaw can run concurrently on
+    their own one. A leased flaw is never given back, it is replaced by a
+    new one: every scenario starts from a new flaw and adds the data it
+    needs with "the flaw has at least". The pool lives in the run data,
+    shared by the behave processes of a run, and leases are taken with
+    compare-and-set. The flaws replacing the leased ones are created in
+    the background while the next scenarios run.
+    """
+
+    def __init__(self, factory, store, owner, size):
+        self.factory = factory
+        self.store = store
+        self.owner = owner
+        self.size = size
+        # the flaws of another OSIDB can not be leased
+        self.namespace = f"{POOL_NAMESPACE}:{factory.client.base_url}"
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def pooled_flaws(self):
+        return [
+            flaw for flaw in self.store.items(namespace=self.namespace).values()
+            if isinstance(flaw, PooledFlaw)
+        ]
+
+    def add(self, embargoed, owner=None):
+        flaw = self.factory.create(flaw_spec(embargoed=embargoed))
+        pooled = PooledFlaw(flaw["cve_id"] or flaw["uuid"], flaw["uuid"], embargoed, owner)
+        self.store.set(pooled.uuid, pooled, namespace=self.namespace)
+        return pooled
+
+    def refill(self, embargoed):
+        try:
+            self.add(embargoed)
+        except Exception as e:
+            # the pool grows again when a lease finds no flaw
+            print(f"Can not add a flaw to the pool: {e}", file=sys.stderr, flush=True)
+
+    def fill(self):
+        """
+        Create the missing flaws of the pool, in the first process of the
+        run only. Flaws leased by an interrupted run of this process may
+        have been changed, they are dropped.
+        """
+        for pooled in self.pooled_flaws():
+            if pooled.owner == self.owner:
+                self.store.delete(pooled.uuid, namespace=self.namespace)
+        # a plain behave run fills the pool it kept from its previous run
+        filler = self.store.compare_and_set("filled_by", None, self.owner, namespace=self.namespace) or \
+            self.store.get("filled_by", namespace=self.namespace) == self.owner
+        if not filler:
+            return
+        for embargoed in (False, True):
+            existing = [flaw for flaw in self.pooled_flaws() if flaw.embargoed == embargoed]
+            for _ in range(self.size - len(existing)):
+                self.add(embargoed)
+
+    def take(self, embargoed):
+        for pooled in self.pooled_flaws():
+            if pooled.embargoed != embargoed or pooled.owner is not None:
+                continue
+            leased = pooled._replace(owner=self.owner)
+            if self.store.compare_and_set(pooled.uuid, pooled, leased, namespace=self.namespace):
+                return leased
+        # every flaw is leased, the pool grows
+        return self.add(embargoed, owner=self.owner)
+
+    def lease(self, embargoed):
+        """
+        Lease a flaw and make it the FLAW_ID of the scenario, over the
+        FLAW_ID of the environment
+        """
+        pooled = self.take(embargoed)
+        flaw = CreatedFlaw(pooled.flaw_id, pooled.uuid, pooled.embargoed)
+        lease_flaw(FLAW_ID_KEY, flaw)
+        return flaw
+
+    def release(self, flaw):
+        """
+        Drop a leased flaw, which the scenario may have changed, and add
+        a new one to the pool in the background
+        """
+        end_lease(FLAW_ID_KEY)
+        self.store.delete(flaw.uuid, namespace=self.namespace)
+        self.executor.submit(self.refill, flaw.embargoed)
+
+    def close(self):
+        # the flaws being added are kept for the next scenarios and runs
+        self.executor.shutdown(wait=True)
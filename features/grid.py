@@ -0,0 +1,113 @@
+"""
+Read the free slots of the Selenium grid and admit the behave processes of a
+parallel run only when the grid has a slot for each of their sessions, so a
+session is never left waiting for a slot until it times out.
+
+The sessions of a run are named after it (se:name), the slots they hold are
+told apart from the ones used by other clients of the grid.
+"""
+import threading
+import time
+import urllib.parse
+
+import requests
+
+from features.constants import GRID_POLL_INTERVAL, GRID_WAIT_TIMEOUT, PREFLIGHT_TIMEOUT, SELENIUM_URL
+
+
+class NoGridSlot(Exception):
+    pass
+
+
+def grid_status(url=SELENIUM_URL, timeout=PREFLIGHT_TIMEOUT):
+    response = requests.get(urllib.parse.urljoin(url, "/status"), timeout=timeout)
+    response.raise_for_status()
+    return response.json()["value"]
+
+
+def grid_slots(status, browser=None):
+    """
+    Return the slots of the nodes which are up, only the ones
+    of a browser if given
+    """
+    return [
+        slot for node in status.get("nodes", []) if node.get("availability", "UP") == "UP"
+        for slot in node.get("slots", [])
+        if browser is None or slot.get("stereotype", {}).get("browserName") == browser
+    ]
+
+
+def free_slots(status):
+    """
+    Return the number of free slots by browser
+    """
+    free = {}
+    for slot in grid_slots(status):
+        browser = slot.get("stereotype", {}).get("browserName", "")
+        free[browser] = free.get(browser, 0) + (slot.get("session") is None)
+    return free
+
+
+def session_name(slot):
+    session = slot.get("session") or {}
+    return session.get("capabilities", {}).get("se:name", "")
+
+
+class GridSlots:
+    """
+    Admit processes while the slots of a browser not held by other clients
+    cover the sessions of the processes already admitted. A process is
+    counted from its admission, its sessions may not be created yet.
+    """
+
+    def __init__(self, run_name, browser, sessions_per_process=1, url=SELENIUM_URL,
+                 poll_interval=GRID_POLL_INTERVAL, timeout=GRID_WAIT_TIMEOUT):
+        self.run_name = run_name
+        self.browser = browser
+        self.sessions_per_process = sessions_per_process
+        self.url = url
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.admitted = 0
+
+    def is_ours(self, slot):
+        return session_name(slot).startswith(f"{self.run_name}/")
+
+    def capacity(self):
+        """
+        Return the slots of the browser which are up and this run can use
+        """
+        slots = grid_slots(grid_status(self.url), self.browser)
+        others = sum(1 for slot in slots if slot.get("session") is not None and not self.is_ours(slot))
+        return len(slots), len(slots) - others
+
+    def acquire(self):
+        """
+        Wait for the slots of a process, raise NoGridSlot when the grid
+        does not have them within the timeout
+        """
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while True:
+                slots, capacity = self.capacity()
+                if capacity < self.sessions_per_process and not self.admitted:
+                    # a process needing more sessions than the grid has still runs, alone
+                    capacity = self.sessions_per_process if capacity > 0 else 0
+                if (self.admitted + 1) * self.sessions_per_process <= capacity:
+                    self.admitted += 1
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if not slots:
+                        raise NoGridSlot(f"no {self.browser} node of the grid at {self.url} is up")
+                    raise NoGridSlot(
+                        f"no free {self.browser} slot after {self.timeout:g}s, {slots - capacity} of {slots} "
+                        f"used by other clients of the grid")
+                # a released process wakes the waiting ones, other clients are polled
+                self.condition.wait(min(self.poll_interval, remaining))
+
+    def release(self):
+        with self.condition:
+            self.admitted -= 1
+            self.condition.notify_all()
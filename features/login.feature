@@ -1,3 +1,4 @@
+@ui_login
 Feature: Check login and logout
 
     Scenario: Can successfully log out after login
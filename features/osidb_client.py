@@ -0,0 +1,195 @@
+"""
+A client of the OSIDB REST API. The API token is obtained with the Kerberos
+ticket of the user (SPNEGO), cached and refreshed before it expires. The
+tokens are shared by the threads of a process through one cache per OSIDB,
+and by the behave processes of a run through the run data. The connections
+are pooled in one session per OSIDB.
+"""
+import base64
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from features.constants import OSIDB_URL
+from features.run_data import TOKEN_NAMESPACE, run_data
+
+
+# refresh the access token when it expires sooner than this, in seconds
+TOKEN_REFRESH_MARGIN = 30
+# lifetime assumed for an access token which does not tell its expiry
+DEFAULT_TOKEN_LIFETIME = 300
+# connections kept open to an OSIDB, enough for the threads of a process
+POOL_SIZE = 16
+REQUEST_TIMEOUT = 30
+
+_lock = threading.Lock()
+_sessions = {}
+_token_caches = {}
+
+
+def spnego_auth():
+    try:
+        from requests_gssapi import HTTPSPNEGOAuth
+    except ImportError:
+        raise RuntimeError("requests-gssapi is needed to get an OSIDB token, pip install -r requirements.txt")
+    return HTTPSPNEGOAuth()
+
+
+def token_expiry(access):
+    """
+    Read the expiry of a JWT access token, without verifying it
+    """
+    try:
+        payload = access.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return time.time() + DEFAULT_TOKEN_LIFETIME
+
+
+def session_for(base_url):
+    with _lock:
+        if base_url not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Content-Type"] = "application/json"
+            _sessions[base_url] = session
+        return _sessions[base_url]
+
+
+def token_cache_for(base_url):
+    session = session_for(base_url)
+    with _lock:
+        if base_url not in _token_caches:
+            _token_caches[base_url] = TokenCache(base_url, session)
+        return _token_caches[base_url]
+
+
+class TokenCache:
+    """
+    The access and refresh tokens of an OSIDB. A token found expiring is
+    refreshed by one thread while the others wait for it, a token obtained
+    or refreshed by another process of the run is used as is.
+    """
+
+    def __init__(self, base_url, session, store=None):
+        self.base_url = base_url
+        self.session = session
+        self.store = store
+        self.lock = threading.Lock()
+        self.tokens = None
+
+    @staticmethod
+    def valid(tokens):
+        return tokens is not None and tokens["expires"] - time.time() > TOKEN_REFRESH_MARGIN
+
+    def shared(self):
+        return (self.store or run_data()).get(self.base_url, namespace=TOKEN_NAMESPACE)
+
+    def share(self, tokens):
+        (self.store or run_data()).set(self.base_url, tokens, namespace=TOKEN_NAMESPACE)
+
+    def obtain(self):
+        response = self.session.get(
+            urllib.parse.urljoin(self.base_url, "auth/token"), auth=spnego_auth(), timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def refresh(self, refresh_token):
+        response = self.session.post(
+            urllib.parse.urljoin(self.base_url, "auth/token/refresh"),
+            json={"refresh": refresh_token}, timeout=REQUEST_TIMEOUT)
+        if not response.ok:
+            # the refresh token expired as well
+            return None
+        # a rotated refresh token replaces the one given
+        return {"refresh": refresh_token, **response.json()}
+
+    def access_token(self, renew=False):
+        """
+        Return a valid access token, a new one with renew
+        """
+        tokens = self.tokens
+        if not renew and self.valid(tokens):
+            return tokens["access"]
+
+        with self.lock:
+            if self.tokens is not tokens and self.valid(self.tokens):
+                return self.tokens["access"]
+            shared = self.shared()
+            if not renew and self.valid(shared):
+                self.tokens = shared
+                return shared["access"]
+
+            current = self.tokens or shared
+            new = self.refresh(current["refresh"]) if current and current.get("refresh") else None
+            if new is None:
+                new = self.obtain()
+            new["expires"] = token_expiry(new["access"])
+            self.tokens = new
+            self.share(new)
+            return new["access"]
+
+
+def get_osidb_token():
+    return token_cache_for(OSIDB_URL).access_token()
+
+
+class OsidbClient:
+    """
+    A small client of the OSIDB REST API, used to prepare test data
+    without going through the OSIM UI
+    """
+
+    def __init__(self, base_url=OSIDB_URL):
+        self.base_url = base_url
+        self.session = session_for(base_url)
+        self.tokens = token_cache_for(base_url)
+
+    def url(self, path):
+        return urllib.parse.urljoin(self.base_url, path)
+
+    def request(self, method, path, **kwargs):
+        # the token is only fetched once data is actually needed
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        headers = {"Authorization": f"Bearer {self.tokens.access_token()}"}
+        response = self.session.request(method, self.url(path), headers=headers, **kwargs)
+        if response.status_code == 401:
+            # revoked or expired early
+            headers["Authorization"] = f"Bearer {self.tokens.access_token(renew=True)}"
+            response = self.session.request(method, self.url(path), headers=headers, **kwargs)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    def get(self, path, **params):
+        return self.request("GET", path, params=params)
+
+    def post(self, path, data):
+        return self.request("POST", path, json=data)
+
+    def map(self, fn, *iterables):
+        """
+        Call fn on the items at once, up to a request per pooled
+        connection, and return the results in the order of the items.
+        The threads needing a token wait for the one fetching it.
+        """
+        args = list(zip(*iterables))
+        if len(args) <= 1:
+            return [fn(*arg) for arg in args]
+        with ThreadPoolExecutor(max_workers=min(len(args), POOL_SIZE)) as executor:
+            return list(executor.map(lambda arg: fn(*arg), args))
+
+    def get_flaws(self, flaw_ids, include_fields):
+        """
+        Get flaws by CVE ID or UUID at once, with only the given fields,
+        in the order of the IDs
+        """
+        fields = ",".join(include_fields)
+        return self.map(lambda flaw_id: self.get(f"osidb/api/v2/flaws/{flaw_id}", include_fields=fields), flaw_ids)
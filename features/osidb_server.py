@@ -0,0 +1,801 @@
+"""
+A local stand-in for OSIDB, so the features can run without the shared
+instance. The routes and the shape of the records are read from
+openapi-osidb.yml, the flaws, affects, trackers, comments, acknowledgments,
+references and CVSS scores live in memory and are created, listed, updated
+and deleted like in OSIDB. CVSS 2 and 3 scores are computed from their
+vector. Any token is accepted.
+
+Run it from the osim root directory:
+
+    python -m features.osidb_server --port 8000
+
+then point OSIDB_URL and the OSIDB backend of OSIM (OSIM_BACKENDS_OSIDB)
+at it. The data is lost when it stops.
+"""
+import argparse
+import datetime
+import decimal
+import functools
+import json
+import math
+import re
+import sys
+import threading
+import traceback
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+
+DEFAULT_SPEC = "openapi-osidb.yml"
+
+# the records kept in memory, by schema name without the API version
+KINDS = (
+    "Flaw", "Affect", "Tracker", "FlawComment", "FlawAcknowledgment",
+    "FlawReference", "FlawCVSS", "AffectCVSS", "FlawCollaborator",
+)
+
+# schemas embedding the records of another name
+KIND_ALIASES = {"Comment": "FlawComment"}
+
+# path segment of a parent record -> its kind, e.g. /flaws/{flaw_id}/comments
+PARENT_KINDS = {"flaws": "Flaw", "affects": "Affect", "trackers": "Tracker"}
+
+# set on new records, before the values of the request
+KIND_DEFAULTS = {
+    "Flaw": {"classification": {"workflow": "DEFAULT", "state": "NEW"}},
+    "Tracker": {"status": "New", "type": "JIRA"},
+    "FlawCVSS": {"issuer": "RH"},
+    "AffectCVSS": {"issuer": "RH"},
+}
+
+# records whose score OSIDB computes from their vector
+CVSS_KINDS = ("FlawCVSS", "AffectCVSS")
+
+# weights of the base metrics, by CVSS version, metric and value
+CVSS3_WEIGHTS = {
+    "AV": {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2},
+    "AC": {"L": 0.77, "H": 0.44},
+    "PR": {"N": 0.85, "L": 0.62, "H": 0.27},
+    "UI": {"N": 0.85, "R": 0.62},
+    "S": {"U": None, "C": None},
+    "C": {"H": 0.56, "L": 0.22, "N": 0},
+    "I": {"H": 0.56, "L": 0.22, "N": 0},
+    "A": {"H": 0.56, "L": 0.22, "N": 0},
+}
+# privileges required weigh more when the scope changes
+CVSS3_CHANGED_SCOPE_PR = {"N": 0.85, "L": 0.68, "H": 0.5}
+CVSS2_WEIGHTS = {
+    "AV": {"L": 0.395, "A": 0.646, "N": 1.0},
+    "AC": {"H": 0.35, "M": 0.61, "L": 0.71},
+    "Au": {"M": 0.45, "S": 0.56, "N": 0.704},
+    "C": {"N": 0, "P": 0.275, "C": 0.660},
+    "I": {"N": 0, "P": 0.275, "C": 0.660},
+    "A": {"N": 0, "P": 0.275, "C": 0.660},
+}
+
+# fields of a list response other than filters
+LIST_PARAMETERS = {"limit", "offset", "order", "search", "include_fields", "exclude_fields"}
+
+MAX_DEPTH = 3
+
+
+def now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def kind_of(schema_name):
+    """
+    FlawV1, FlawCVSSV2 and Flaw are the same records
+    """
+    kind = re.sub(r"V\d+$", "", schema_name)
+    kind = KIND_ALIASES.get(kind, kind)
+    return kind if kind in KINDS else None
+
+
+def base_metrics(vector, weights):
+    """
+    Return the weight of each base metric of a CVSS vector, the other
+    metrics are ignored
+    """
+    metrics = dict(part.split(":", 1) for part in vector.split("/") if ":" in part)
+    missing = [name for name in weights if metrics.get(name) not in weights[name]]
+    if missing:
+        raise ValueError(f"Invalid CVSS vector {vector}, base metrics {', '.join(missing)} are missing or wrong")
+    return {name: weights[name][metrics[name]] for name in weights}, metrics
+
+
+def cvss3_score(vector):
+    """
+    The base score of a CVSS 3.0 or 3.1 vector, see
+    https://www.first.org/cvss/v3.1/specification-document
+    """
+    if not vector.startswith(("CVSS:3.0/", "CVSS:3.1/")):
+        raise ValueError(f"Invalid CVSS vector {vector}, CVSS:3.0/ or CVSS:3.1/ expected")
+    weights, metrics = base_metrics(vector, CVSS3_WEIGHTS)
+    changed = metrics["S"] == "C"
+    if changed:
+        weights["PR"] = CVSS3_CHANGED_SCOPE_PR[metrics["PR"]]
+
+    def roundup(value):
+        if vector.startswith("CVSS:3.0/"):
+            return math.ceil(value * 10) / 10
+        # CVSS 3.1 rounds integers to avoid floating point errors
+        value = round(value * 100000)
+        return value / 100000 if value % 10000 == 0 else (math.floor(value / 10000) + 1) / 10
+
+    severity = 1 - (1 - weights["C"]) * (1 - weights["I"]) * (1 - weights["A"])
+    if changed:
+        impact = 7.52 * (severity - 0.029) - 3.25 * (severity - 0.02) ** 15
+    else:
+        impact = 6.42 * severity
+    exploitability = 8.22 * weights["AV"] * weights["AC"] * weights["PR"] * weights["UI"]
+    if impact <= 0:
+        return 0.0
+    return roundup(min((1.08 if changed else 1) * (impact + exploitability), 10))
+
+
+def cvss2_score(vector):
+    """
+    The base score of a CVSS 2.0 vector, see
+    https://www.first.org/cvss/v2/guide
+    """
+    weights, _ = base_metrics(vector, CVSS2_WEIGHTS)
+    impact = 10.41 * (1 - (1 - weights["C"]) * (1 - weights["I"]) * (1 - weights["A"]))
+    exploitability = 20 * weights["AV"] * weights["AC"] * weights["Au"]
+    score = (0.6 * impact + 0.4 * exploitability - 1.5) * (1.176 if impact else 0)
+    return float(decimal.Decimal(str(round(score, 10))).quantize(decimal.Decimal("0.1"), decimal.ROUND_HALF_UP))
+
+
+def cvss_score(version, vector):
+    """
+    The score OSIDB computes for a CVSS vector. Scoring CVSS 4.0 needs the
+    lookup tables of its specification, V4 scores are left at 0.
+    """
+    if version == "V3":
+        return cvss3_score(vector or "")
+    if version == "V2":
+        return cvss2_score(vector or "")
+    return 0.0
+
+
+class ApiError(Exception):
+    def __init__(self, status, payload=None):
+        super().__init__(status)
+        self.status = status
+        self.payload = payload
+
+
+class Spec:
+    """
+    The parts of the OpenAPI document the stand-in needs
+    """
+
+    def __init__(self, path):
+        with open(path, "r") as f:
+            self.document = yaml.safe_load(f)
+        self.schemas = self.document["components"]["schemas"]
+        self.version = self.document["info"]["version"]
+
+    @staticmethod
+    def ref_name(schema):
+        ref = (schema or {}).get("$ref")
+        return ref.rsplit("/", 1)[-1] if ref else None
+
+    def unwrap(self, schema):
+        """
+        Return the schema name of a body, responses are allOf a record
+        and the API metadata
+        """
+        schema = schema or {}
+        if "allOf" in schema:
+            schema = schema["allOf"][0]
+        return self.ref_name(schema)
+
+    def properties(self, name):
+        return self.schemas.get(name, {}).get("properties", {})
+
+    def required(self, name):
+        properties = self.properties(name)
+        return [
+            field for field in self.schemas.get(name, {}).get("required", [])
+            if not properties.get(field, {}).get("readOnly")
+        ]
+
+    def linked_schema(self, prop):
+        """
+        Return the schema of a record embedded in a property and whether
+        the property holds a list of them
+        """
+        if prop.get("type") == "array":
+            return self.ref_name(prop.get("items")), True
+        if "allOf" in prop:
+            return self.ref_name(prop["allOf"][0]), False
+        return self.ref_name(prop), False
+
+    def default(self, prop, depth=0):
+        name = self.ref_name(prop) or ("allOf" in prop and self.ref_name(prop["allOf"][0]))
+        if prop.get("nullable"):
+            return None
+        if name:
+            schema = self.schemas.get(name, {})
+            if "enum" in schema:
+                return schema["enum"][0]
+            if depth >= MAX_DEPTH:
+                return {}
+            return {field: self.default(value, depth + 1) for field, value in self.properties(name).items()}
+        kind = prop.get("type")
+        if kind == "array":
+            return []
+        if kind == "object":
+            return {}
+        if kind == "boolean":
+            return False
+        if kind in ("integer", "number"):
+            return 0
+        if "enum" in prop:
+            return prop["enum"][0]
+        return ""
+
+    def body_schema(self, operation):
+        content = operation.get("requestBody", {}).get("content", {})
+        media = content.get("application/json") or next(iter(content.values()), {})
+        schema = media.get("schema") or {}
+        # the bulk endpoints take a list of records
+        if schema.get("type") == "array":
+            return self.ref_name(schema.get("items"))
+        return self.unwrap(schema)
+
+    def response_schema(self, operation):
+        responses = operation.get("responses", {})
+        response = responses.get("200") or responses.get("201") or {}
+        media = response.get("content", {}).get("application/json", {})
+        schema = media.get("schema") or {}
+        name = self.unwrap(schema)
+        if name is None and schema.get("type") == "array":
+            name = self.ref_name(schema.get("items"))
+        if name and name.startswith("Paginated") and name.endswith("List"):
+            name = self.ref_name(self.properties(name)["results"]["items"])
+        return name
+
+
+class Route:
+    """
+    A path of the OpenAPI document. The kind of its records comes from the
+    response schema, the parent from a path like /flaws/{flaw_id}/comments.
+    """
+
+    def __init__(self, spec, template, operations):
+        self.template = template
+        self.operations = operations
+        self.pattern = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template) + "/?$")
+
+        segments = template.strip("/").split("/")
+        self.item_parameter = None
+        if segments[-1].startswith("{"):
+            self.item_parameter = segments.pop()[1:-1]
+        self.parent_kind = self.parent_parameter = None
+        if len(segments) >= 3 and segments[-2].startswith("{"):
+            self.parent_kind = PARENT_KINDS.get(segments[-3])
+            self.parent_parameter = segments[-2][1:-1]
+
+        self.schemas = {}
+        for method, operation in operations.items():
+            if isinstance(operation, dict):
+                self.schemas[method.upper()] = spec.response_schema(operation)
+        self.kind = next(filter(None, map(kind_of, filter(None, self.schemas.values()))), None)
+
+    @property
+    def specificity(self):
+        # /affects/bulk before /affects/{uuid}
+        return (self.template.count("{"), -len(self.template))
+
+    def filters(self, method):
+        operation = self.operations.get(method.lower(), {})
+        return {
+            parameter["name"] for parameter in operation.get("parameters", [])
+            if parameter.get("in") == "query" and parameter["name"] not in LIST_PARAMETERS
+        }
+
+
+class Store:
+    """
+    The records of the stand-in, by kind and UUID
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.records = {kind: {} for kind in KINDS}
+        self.integrations = {"bugzilla": None, "jira": None}
+        self.tracker_count = 0
+
+    def create(self, kind, values):
+        timestamp = now()
+        record = dict(KIND_DEFAULTS.get(kind, {}))
+        record.update(values)
+        record.update(uuid=str(uuid.uuid4()), created_dt=timestamp, updated_dt=timestamp)
+        if kind == "Tracker":
+            self.tracker_count += 1
+            record.setdefault("external_system_id", f"OSIM-{self.tracker_count}")
+        self.records[kind][record["uuid"]] = record
+        return record
+
+    def update(self, record, values):
+        record.update({
+            field: value for field, value in values.items()
+            if field not in ("uuid", "created_dt")
+        })
+        record["updated_dt"] = now()
+        return record
+
+    def find(self, kind, identifier):
+        record = self.records[kind].get(identifier)
+        if record is None and kind == "Flaw":
+            record = next(
+                (flaw for flaw in self.records[kind].values() if flaw.get("cve_id") == identifier), None)
+        if record is None:
+            raise ApiError(404, {"detail": "No Flaw matches the given query." if kind == "Flaw" else "Not found."})
+        return record
+
+    def children(self, parent_kind, parent, kind):
+        """
+        Records linked to a parent by its UUID, either in a field named
+        after the parent kind or in the plural one, e.g. Tracker.affects
+        """
+        field = parent_kind.lower()
+        return [
+            record for record in self.records[kind].values()
+            if record.get(field) == parent["uuid"] or parent["uuid"] in (record.get(f"{field}s") or [])
+        ]
+
+    def serialize(self, kind, record, schema_name, depth=0):
+        result = {}
+        for name, prop in self.spec.properties(schema_name).items():
+            if prop.get("writeOnly"):
+                continue
+            linked_schema, many = self.spec.linked_schema(prop)
+            linked_kind = kind_of(linked_schema) if linked_schema else None
+            if linked_kind and linked_kind != kind and depth < MAX_DEPTH:
+                linked = [
+                    self.serialize(linked_kind, child, linked_schema, depth + 1)
+                    for child in self.children(kind, record, linked_kind)
+                ]
+                result[name] = linked if many else next(iter(linked), None)
+            elif name in record:
+                result[name] = record[name]
+            else:
+                result[name] = self.spec.default(prop)
+        return result
+
+
+def lookup(value, path):
+    """
+    Follow a filter path like acknowledgments__name through embedded
+    records, lists are searched element by element
+    """
+    values = [value]
+    for field in path:
+        found = []
+        for item in values:
+            item = item.get(field) if isinstance(item, dict) else None
+            found.extend(item if isinstance(item, list) else [item])
+        values = found
+    return values
+
+
+def as_text(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else str(value)
+
+
+def matches(record, name, expected):
+    *path, operator = name.split("__")
+    if operator not in ("exact", "gt", "gte", "lt", "lte", "date", "in", "icontains", "isempty", "isnull"):
+        path.append(operator)
+        operator = "exact"
+    values = lookup(record, path)
+    if operator == "isempty" or operator == "isnull":
+        empty = all(value in (None, "", [], {}) for value in values)
+        return empty == (expected.lower() == "true")
+    texts = [as_text(value) for value in values]
+    if operator == "in":
+        return bool(set(texts) & set(expected.split(",")))
+    if operator == "icontains":
+        return any(expected.lower() in text.lower() for text in texts)
+    if operator == "date":
+        return any(text[:10] == expected for text in texts)
+    compare = {
+        "exact": lambda text: text == expected,
+        "gt": lambda text: text > expected,
+        "gte": lambda text: text >= expected,
+        "lt": lambda text: text < expected,
+        "lte": lambda text: text <= expected,
+    }[operator]
+    return any(compare(text) for text in texts if text)
+
+
+def order_key(record, path, descending):
+    """
+    Sort numbers as numbers and empty values last, first when descending,
+    like PostgreSQL. A record with several values, e.g. for
+    cvss_scores__score, sorts by the first one in that order.
+    """
+    values = [value for value in lookup(record, path) if value not in (None, "")]
+    if not values:
+        return (1, 0, "")
+    first = max if descending else min
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        return (0, first(values), "")
+    return (0, 0, first(as_text(value) for value in values))
+
+
+def search_text(record):
+    return json.dumps(record).lower()
+
+
+def project(result, query):
+    """
+    Keep the fields of include_fields and drop the ones of exclude_fields
+    """
+    if "include_fields" in query:
+        include = query["include_fields"][-1].split(",")
+        result = {field: result.get(field) for field in include if field in result}
+    if "exclude_fields" in query:
+        exclude = set(query["exclude_fields"][-1].split(","))
+        result = {field: value for field, value in result.items() if field not in exclude}
+    return result
+
+
+class OsidbStandIn:
+    """
+    Answer the requests of OSIM and the features from the in-memory store
+    """
+
+    def __init__(self, spec_path=DEFAULT_SPEC):
+        self.spec = Spec(spec_path)
+        self.store = Store(self.spec)
+        self.lock = threading.Lock()
+        self.routes = sorted(
+            (Route(self.spec, template, operations) for template, operations in self.spec.document["paths"].items()),
+            key=lambda route: route.specificity,
+        )
+        self.special = {
+            "/auth/token": self.token,
+            "/auth/token/refresh": self.refresh_token,
+            "/auth/token/verify": self.verify_token,
+            "/osidb/whoami": self.whoami,
+            "/osidb/healthy": self.healthy,
+            "/osidb/api/v1/status": self.status,
+            "/osidb/integrations": self.integrations,
+            "/osidb/api/v1/available-flaws/{cve_id}": self.available_flaw,
+            "/osidb/api/v2/affects/bulk": functools.partial(self.bulk_affects, "/osidb/api/v2/affects/bulk"),
+            "/trackers/api/v1/file": self.tracker_suggestions,
+            "/trackers/api/v2/file": self.tracker_suggestions,
+        }
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Return the status and the JSON payload of a request
+        """
+        for route in self.routes:
+            match = route.pattern.match(path)
+            if match is None:
+                continue
+            if path.startswith(("/osidb/api/", "/trackers/api/")) and \
+                    not headers.get("Authorization", "").startswith("Bearer "):
+                raise ApiError(401, {"detail": "Authentication credentials were not provided."})
+            params = match.groupdict()
+            with self.lock:
+                if route.template in self.special:
+                    return self.special[route.template](method, params, query, body)
+                if method.lower() not in route.operations:
+                    raise ApiError(405, {"detail": f'Method "{method}" not allowed.'})
+                if route.kind is None:
+                    raise ApiError(501, {"detail": f"{route.template} is not served by the stand-in."})
+                return self.crud(route, method, params, query, body)
+        raise ApiError(404, {"detail": "Not found."})
+
+    def meta(self):
+        return {"dt": now(), "env": "local", "revision": "", "version": self.spec.version}
+
+    def schema(self, route, method):
+        return route.schemas.get(method) or route.schemas.get("GET") or route.kind
+
+    def output(self, route, method, record):
+        return self.store.serialize(route.kind, record, self.schema(route, method))
+
+    def crud(self, route, method, params, query, body):
+        parent = None
+        if route.parent_kind:
+            parent = self.store.find(route.parent_kind, params[route.parent_parameter])
+
+        if route.item_parameter is None:
+            if method == "GET":
+                return 200, self.list(route, parent, query)
+            if method == "POST":
+                values = self.validated(route, method, body)
+                if parent is not None:
+                    values[route.parent_kind.lower()] = parent["uuid"]
+                record = self.store.create(route.kind, values)
+                return 201, dict(self.output(route, method, record), **self.meta())
+            raise ApiError(405, {"detail": f'Method "{method}" not allowed.'})
+
+        record = self.store.find(route.kind, params[route.item_parameter])
+        if method == "GET":
+            return 200, dict(project(self.output(route, method, record), query), **self.meta())
+        if method in ("PUT", "PATCH"):
+            values = self.validated(route, method, body, partial=method == "PATCH", current=record)
+            self.store.update(record, values)
+            return 200, dict(self.output(route, method, record), **self.meta())
+        if method == "DELETE":
+            del self.store.records[route.kind][record["uuid"]]
+            return 200, self.meta()
+        raise ApiError(405, {"detail": f'Method "{method}" not allowed.'})
+
+    def validated(self, route, method, body, partial=False, current=None):
+        operation = route.operations[method.lower()]
+        # the parent of a nested record comes from the path
+        exempt = ("flaw", "affect", (route.parent_kind or "").lower())
+        return self.checked(route.kind, self.spec.body_schema(operation), body, partial, current, exempt)
+
+    def checked(self, kind, schema, body, partial=False, current=None, exempt=()):
+        """
+        Return the writable values of a request body for a record of a
+        kind, raise ApiError with the errors of the body
+        """
+        if not isinstance(body, dict):
+            raise ApiError(400, {"non_field_errors": ["Invalid data. Expected a dictionary."]})
+        errors = {}
+        if schema and not partial:
+            errors.update({
+                field: ["This field is required."]
+                for field in self.spec.required(schema)
+                if field not in body and field not in exempt
+            })
+        if kind == "Flaw" and body.get("cve_id"):
+            taken = any(
+                flaw.get("cve_id") == body["cve_id"] and flaw is not current
+                for flaw in self.store.records["Flaw"].values()
+            )
+            if taken:
+                errors["cve_id"] = ["Flaw with this cve id already exists."]
+        if errors:
+            raise ApiError(400, errors)
+        properties = self.spec.properties(schema) if schema else {}
+        values = {
+            field: value for field, value in body.items()
+            if not properties or (field in properties and not properties[field].get("readOnly"))
+        }
+        if kind in CVSS_KINDS and ("vector" in values or "cvss_version" in values):
+            scored = dict(current or {}, **values)
+            try:
+                values["score"] = cvss_score(scored.get("cvss_version"), scored.get("vector"))
+            except ValueError as e:
+                raise ApiError(400, {"vector": [str(e)]})
+        return values
+
+    def list(self, route, parent, query):
+        records = self.store.records[route.kind].values()
+        if parent is not None:
+            records = self.store.children(route.parent_kind, parent, route.kind)
+        results = [self.output(route, "GET", record) for record in records]
+
+        filters = route.filters("GET")
+        for name, values in query.items():
+            if name in filters:
+                results = [result for result in results if matches(result, name, values[-1])]
+        if "search" in query:
+            text = query["search"][-1].lower()
+            results = [result for result in results if text in search_text(result)]
+        if "order" in query:
+            for field in reversed(query["order"][-1].split(",")):
+                descending = field.startswith("-")
+                path = field.lstrip("-").split("__")
+                results.sort(key=lambda result: order_key(result, path, descending), reverse=descending)
+
+        count = len(results)
+        offset = int(query.get("offset", ["0"])[-1])
+        limit = int(query.get("limit", [str(count or 1)])[-1])
+        page = results[offset:offset + limit]
+        page = [project(result, query) for result in page]
+
+        def page_url(page_offset):
+            return f"{route.template}?" + urllib.parse.urlencode(
+                dict({name: values[-1] for name, values in query.items()}, limit=limit, offset=page_offset))
+
+        return dict(
+            count=count,
+            next=page_url(offset + limit) if offset + limit < count else None,
+            previous=page_url(max(offset - limit, 0)) if offset else None,
+            results=page,
+            **self.meta(),
+        )
+
+    def token(self, method, params, query, body):
+        return 200, {"access": str(uuid.uuid4()), "refresh": str(uuid.uuid4())}
+
+    def refresh_token(self, method, params, query, body):
+        return 200, {"access": str(uuid.uuid4())}
+
+    def verify_token(self, method, params, query, body):
+        return 200, {}
+
+    def whoami(self, method, params, query, body):
+        user = self.spec.default({"$ref": "#/components/schemas/User"})
+        user.update(username="osim", email="osim@example.com", groups=["data-prodsec", "data-topsecret"])
+        return 200, dict(user, **self.meta())
+
+    def healthy(self, method, params, query, body):
+        return 200, {}
+
+    def status(self, method, params, query, body):
+        return 200, dict(
+            osidb_data={"flaw_count": len(self.store.records["Flaw"])},
+            osidb_service={},
+            **self.meta(),
+        )
+
+    def integrations(self, method, params, query, body):
+        if method == "PATCH":
+            self.store.integrations.update({
+                name: value for name, value in (body or {}).items() if name in self.store.integrations
+            })
+            return 204, None
+        # OSIDB does not give the tokens back
+        return 200, dict({
+            name: None if value is None else "*" * len(value)
+            for name, value in self.store.integrations.items()
+        }, **self.meta())
+
+    def available_flaw(self, method, params, query, body):
+        if not re.match(r"^CVE-\d{4}-\d{4,}$", params["cve_id"]):
+            raise ApiError(400, {"detail": "Invalid CVE ID."})
+        exists = any(flaw.get("cve_id") == params["cve_id"] for flaw in self.store.records["Flaw"].values())
+        return (404, {}) if exists else (204, None)
+
+    def bulk_affects(self, template, method, params, query, body):
+        """
+        Create, update or delete affects at once. Every item is checked
+        before any change and the affects are answered with the schema of
+        the version of the path.
+        """
+        affects = self.store.records["Affect"]
+        if method == "DELETE":
+            for affect_uuid in body or []:
+                affects.pop(affect_uuid, None)
+            return 200, self.meta()
+        operation = self.spec.document["paths"][template].get(method.lower())
+        if operation is None:
+            raise ApiError(405, {"detail": f'Method "{method}" not allowed.'})
+        if not isinstance(body, list):
+            raise ApiError(400, {"non_field_errors": ["Expected a list of items."]})
+
+        schema = self.spec.body_schema(operation)
+        records, checked, errors = [], [], []
+        for item in body:
+            try:
+                record = None
+                if method != "POST" and isinstance(item, dict) and "uuid" in item:
+                    record = self.store.find("Affect", item["uuid"])
+                checked.append(self.checked("Affect", schema, item, current=record))
+                records.append(record)
+                errors.append({})
+            except ApiError as e:
+                errors.append(e.payload)
+        if any(errors):
+            raise ApiError(400, errors)
+
+        response = self.spec.response_schema(operation)
+        output = self.spec.linked_schema(self.spec.properties(response)["results"])[0]
+        results = []
+        for record, values in zip(records, checked):
+            if record is None:
+                record = self.store.create("Affect", values)
+            else:
+                self.store.update(record, values)
+            results.append(self.store.serialize("Affect", record, output))
+        return 200, dict(results=results, **self.meta())
+
+    def tracker_suggestions(self, method, params, query, body):
+        streams_components = []
+        for flaw_uuid in (body or {}).get("flaw_uuids", []):
+            flaw = self.store.find("Flaw", flaw_uuid)
+            for affect in self.store.children("Flaw", flaw, "Affect"):
+                selection = {
+                    "ps_update_stream": affect.get("ps_update_stream", ""),
+                    "selected": True, "acked": True, "aus": False, "eus": False,
+                }
+                streams_components.append({
+                    "affect": self.store.serialize("Affect", affect, "AffectV1"),
+                    "offer": {selection["ps_update_stream"]: selection},
+                    "ps_component": affect.get("ps_component", ""),
+                    "ps_update_stream": selection["ps_update_stream"],
+                    "selected": True,
+                })
+        return 200, {"streams_components": streams_components, "not_applicable": []}
+
+
+class Handler(BaseHTTPRequestHandler):
+    stand_in = None
+
+    def cors_headers(self):
+        self.send_header("Access-Control-Allow-Origin", self.headers.get("Origin", "*"))
+        self.send_header("Access-Control-Allow-Credentials", "true")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, PUT, PATCH, DELETE, OPTIONS")
+        self.send_header(
+            "Access-Control-Allow-Headers",
+            self.headers.get("Access-Control-Request-Headers",
+                             "Authorization, Content-Type, Bugzilla-Api-Key, Jira-Api-Key"))
+
+    def respond(self, status, payload):
+        content = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.cors_headers()
+        if content:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_OPTIONS(self):
+        self.respond(200, None)
+
+    def dispatch(self):
+        url = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else None
+            status, payload = self.stand_in.handle(
+                self.command, url.path.rstrip("/") or "/", urllib.parse.parse_qs(url.query), self.headers, body)
+        except json.JSONDecodeError as e:
+            status, payload = 400, {"detail": f"JSON parse error - {e}"}
+        except ApiError as e:
+            status, payload = e.status, e.payload
+        except ValueError as e:
+            # e.g. a limit or an offset which is not a number
+            status, payload = 400, {"detail": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            status, payload = 500, {"detail": f"Server error - {e!r}"}
+        self.respond(status, payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = dispatch
+
+
+def serve(port, spec_path=DEFAULT_SPEC, host="0.0.0.0", quiet=False):
+    handler = type("StandInHandler", (Handler,), {"stand_in": OsidbStandIn(spec_path)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.quiet = quiet
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run an in-memory OSIDB stand-in for the features")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--spec", default=DEFAULT_SPEC, help="the OSIDB OpenAPI document")
+    parser.add_argument("--quiet", action="store_true", help="do not log the requests")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = serve(args.port, args.spec, args.host, args.quiet)
+    print(f"OSIDB stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
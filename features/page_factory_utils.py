@@ -1,3 +1,10 @@
+def locator_in_page_factory(page_factory_obj, key):
+    """
+    Return the (By, value) tuple of a page factory locator, for use
+    with selenium expected conditions
+    """
+    locator_type, search_value = page_factory_obj.locators[key]
+    return page_factory_obj.TYPE_OF_LOCATORS[locator_type.lower()], search_value
 
 
 def find_elements_in_page_factory(page_factory_obj, key):
@@ -5,10 +12,7 @@ def find_elements_in_page_factory(page_factory_obj, key):
     Find WebElements in page factory, because page factory can
     only find WebElement
     """
-    locator_type = page_factory_obj.locators[key][0]
-    search_value = page_factory_obj.locators[key][1]
-    elements = page_factory_obj.driver.find_elements(
-        page_factory_obj.TYPE_OF_LOCATORS[locator_type.lower()], search_value)
+    elements = page_factory_obj.driver.find_elements(*locator_in_page_factory(page_factory_obj, key))
 
     return elements
 
@@ -18,9 +22,6 @@ def find_element_in_page_factory(page_factory_obj, key):
     Find WebElements in page factory, because page factory can
     only find WebElement
     """
-    locator_type = page_factory_obj.locators[key][0]
-    search_value = page_factory_obj.locators[key][1]
-    element = page_factory_obj.driver.find_element(
-        page_factory_obj.TYPE_OF_LOCATORS[locator_type.lower()], search_value)
+    element = page_factory_obj.driver.find_element(*locator_in_page_factory(page_factory_obj, key))
 
     return element
@@ -1,13 +1,27 @@
-import time
+import urllib.parse
 
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
 
+from features.osidb_client import OsidbClient
 from features.pages.base import BasePage
-from features.pages.flaw_detail_page import FlawDetailPage
+
+
+def rh_cvss_v3_score(flaw):
+    # the score shown by the CVSS field of the flaw form, as JavaScript prints it
+    scores = [
+        cvss["score"] for cvss in flaw["cvss_scores"]
+        if cvss["issuer"] == "RH" and cvss["cvss_version"] == "V3"
+    ]
+    return f"{scores[0]:g}" if scores else ""
+
+
+# the OSIDB fields read for an extended sort field, and the value the flaw form shows
+EXTENDED_SORT_VALUES = {
+    "cvss_scores__score": ("cvss_scores", rh_cvss_v3_score),
+    "cwe_id": ("cwe_id", lambda flaw: flaw["cwe_id"] or ""),
+    "major_incident_state": ("major_incident_state", lambda flaw: flaw["major_incident_state"] or ""),
+    "source": ("source", lambda flaw: flaw["source"] or ""),
+}
 
 
 class AdvancedSearchPage(BasePage):
@@ -87,54 +101,22 @@ class AdvancedSearchPage(BasePage):
             self.driver.execute_script("arguments[0].value = '';", filter_input)
             filter_input.send_keys(value)
 
-    def get_specified_field_search_result(self, field_name, n=5):
-        flaws = self.driver.find_elements(By.XPATH, "//tbody[@class='table-group-divider']/tr")
-        count = 0
-        result = []
-
-        flaw_detail_page = FlawDetailPage(self.driver)
-
-        wait = WebDriverWait(self.driver, 10)
-
-        for flaw in flaws:
-            if count == n:
-                break
-            tds = flaw.find_elements(By.XPATH, './td')
-            if len(tds) < 6:
-                continue
-
-            # Store the ID of the original window
-            original_window = self.driver.current_window_handle
+    def get_result_flaw_ids(self, n=5):
+        """
+        Return the CVE IDs or UUIDs of the first n flaws of the results
+        """
+        flaws = self.read_table(
+            "//tbody[@class='table-group-divider']/tr", {"link": ("td[1]/a", "href"), "last": "td[6]"})
+        # rows with less than 6 cells are not flaws
+        links = [flaw["link"] for flaw in flaws if flaw["last"] is not None][:n]
+        return [urllib.parse.unquote(urllib.parse.urlsplit(link).path.rstrip("/").rsplit("/", 1)[-1])
+                for link in links]
 
-            link = tds[0].find_element(By.XPATH, './a')
-
-            # open link with a new tab
-            (ActionChains(self.driver).key_down(Keys.LEFT_CONTROL).
-             click(link).key_up(Keys.LEFT_CONTROL).perform())
-
-            # Wait for the new window or tab
-            wait.until(EC.number_of_windows_to_be(2))
-
-            # switch to new tab
-            self.driver.switch_to.window(self.driver.window_handles[1])
-            time.sleep(5)
-
-            # get data
-            value = ""
-            if field_name == "cvss_scores__score":
-                value = flaw_detail_page.get_cvssV3_score()
-            elif field_name == "cwe_id":
-                value = flaw_detail_page.get_input_field_value_using_relative_locator("cweidText")
-            elif field_name == "major_incident_state":
-                value = flaw_detail_page.get_select_value_using_relative_locator("incidentStateText")
-            elif field_name == "source":
-                value = flaw_detail_page.get_select_value_using_relative_locator("sourceText")
-
-            # close tab and back to search page
-            self.driver.close()
-            self.driver.switch_to.window(original_window)
-
-            result.append(value)
-            count += 1
-
-        return result
+    def get_specified_field_search_result(self, field_name, n=5):
+        """
+        Return the values of an extended sort field for the first n flaws
+        of the results, read from OSIDB at once
+        """
+        include_field, read = EXTENDED_SORT_VALUES[field_name]
+        flaws = OsidbClient().get_flaws(self.get_result_flaw_ids(n), [include_field])
+        return [read(flaw) for flaw in flaws]
@@ -1,12 +1,324 @@
+import functools
+import json
+import string
 import time
+import weakref
 
-from selenium.webdriver.common.by import By
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.remote.command import Command
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from seleniumpagefactory.Pagefactory import PageFactory
 
-from features.page_factory_utils import find_elements_in_page_factory
+from features.page_factory_utils import find_elements_in_page_factory, locator_in_page_factory
+
+
+# how long the DOM must stay unchanged to be considered settled
+QUIET_MS = 300
+# a single wait script runs below the default WebDriver script timeout (30s),
+# longer waits are split into several calls
+WAIT_SCRIPT_CHUNK = 20
+# OSIM error toasts and form validation messages, a wait watching them fails
+# as soon as a new one is shown
+ERROR_NOTIFICATIONS = ".osim-toast.text-bg-danger, .invalid-feedback.d-block"
+
+# requests whose URL is kept by the tracker, the most recent ones
+TRACKED_URLS = 100
+# WebDriver commands loading a new page, the tracker is installed after them
+LOADING_COMMANDS = (Command.GET, Command.REFRESH, Command.GO_BACK, Command.GO_FORWARD)
+
+# count fetch and XHR requests in flight and keep their URLs, installed once per page
+TRACK_REQUESTS_SCRIPT = """
+if (!window.__e2eRequests) {
+    var tracker = window.__e2eRequests = {pending: 0, urls: []};
+    var finished = function () { tracker.pending--; };
+    var sent = function (url) {
+        tracker.urls.push(new URL(String(url), window.location.href).href);
+        if (tracker.urls.length > %d) {
+            tracker.urls.shift();
+        }
+    };
+    var originalFetch = window.fetch;
+    window.fetch = function (resource) {
+        tracker.pending++;
+        try {
+            sent(resource instanceof Request ? resource.url : resource);
+            return originalFetch.apply(this, arguments).finally(finished);
+        } catch (e) {
+            finished();
+            throw e;
+        }
+    };
+    var originalOpen = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__e2eUrl = url;
+        return originalOpen.apply(this, arguments);
+    };
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        tracker.pending++;
+        sent(this.__e2eUrl);
+        this.addEventListener('loadend', finished, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+}
+""" % TRACKED_URLS
+
+SENT_REQUESTS_SCRIPT = "return window.__e2eRequests ? window.__e2eRequests.urls.slice() : [];"
+
+# the errors shown before an action are not caused by it, the waits after it ignore them
+MARK_ERRORS_SEEN_SCRIPT = """
+var seenErrors = window.__e2eSeenErrors = window.__e2eSeenErrors || new WeakSet();
+document.querySelectorAll(%s).forEach(function (node) { seenErrors.add(node); });
+""" % json.dumps(ERROR_NOTIFICATIONS)
+
+# clicks go through this script, so the requests they start are tracked
+# and the errors they cause are told apart
+SCROLL_INTO_VIEW_SCRIPT = TRACK_REQUESTS_SCRIPT + MARK_ERRORS_SEEN_SCRIPT + "arguments[0].scrollIntoView(true);"
+
+WAIT_SCRIPT = TRACK_REQUESTS_SCRIPT + """
+var condition = arguments[0], by = arguments[1], value = arguments[2],
+    timeout = arguments[3], quietMs = arguments[4], errorSelector = arguments[5],
+    done = arguments[arguments.length - 1];
+var requests = window.__e2eRequests;
+
+function find() {
+    switch (by) {
+        case 'xpath':
+            var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) {
+                nodes.push(snapshot.snapshotItem(i));
+            }
+            return nodes;
+        case 'id':
+            var node = document.getElementById(value);
+            return node ? [node] : [];
+        case 'class name':
+            return Array.from(document.getElementsByClassName(value));
+        case 'name':
+            return Array.from(document.getElementsByName(value));
+        case 'tag name':
+            return Array.from(document.getElementsByTagName(value));
+        case 'link text':
+            return Array.from(document.links).filter(function (a) { return a.innerText.trim() === value; });
+        default:
+            return Array.from(document.querySelectorAll(value));
+    }
+}
+
+function isVisible(node) {
+    var style = window.getComputedStyle(node);
+    return style.visibility !== 'hidden' && style.display !== 'none' && node.getClientRects().length > 0;
+}
+
+function errorNodes() {
+    return errorSelector ? Array.from(document.querySelectorAll(errorSelector)) : [];
+}
+
+// errors shown before the last click are not caused by the action waited for,
+// the ones shown since, also before the wait started, are
+var seenErrors = window.__e2eSeenErrors || new WeakSet();
+
+function newError() {
+    var awaited = errorSelector ? find() : [];
+    var texts = errorNodes().filter(function (node) {
+        return !seenErrors.has(node) && isVisible(node)
+            // waiting for the error itself
+            && !awaited.some(function (other) { return node.contains(other) || other.contains(node); });
+    }).map(function (node) { return node.innerText.trim(); });
+    return texts.length ? texts.join('\\n') : null;
+}
+
+var lastMutation = Date.now();
+
+function satisfied() {
+    var settled = requests.pending === 0 && document.readyState === 'complete';
+    switch (condition) {
+        case 'requests': return settled;
+        case 'quiet': return settled && Date.now() - lastMutation >= quietMs;
+        case 'present': return find().length > 0;
+        case 'visible': return find().some(isVisible);
+        case 'absent': return find().length === 0;
+        case 'hidden': return !find().some(isVisible);
+    }
+}
+
+var deadline = Date.now() + timeout, resolved = false, observer, interval;
+
+function check() {
+    var ok = satisfied(), error = ok ? null : newError();
+    if (resolved || (!ok && error === null && Date.now() < deadline)) {
+        return;
+    }
+    resolved = true;
+    observer.disconnect();
+    clearInterval(interval);
+    done({ok: ok, pending: requests.pending, error: error});
+}
+
+observer = new MutationObserver(function () {
+    lastMutation = Date.now();
+    check();
+});
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+interval = setInterval(check, 50);
+check();
+"""
+
+# a document and route generation, bumped by the OSIM router, and a count
+# of DOM mutations. A cached element is reused while it is attached and
+# visible, after a mutation only if its locator still finds it first, as a
+# re-sort or re-render reusing the nodes moves positions and texts.
+GENERATION_SCRIPT = """
+if (!window.__e2eGeneration) {
+    var generation = window.__e2eGeneration = {
+        page: Math.random().toString(36).slice(2), route: 0, mutations: 0};
+    var routeChanged = function () { generation.route++; };
+    ['pushState', 'replaceState'].forEach(function (name) {
+        var original = history[name];
+        history[name] = function () {
+            var result = original.apply(this, arguments);
+            routeChanged();
+            return result;
+        };
+    });
+    window.addEventListener('popstate', routeChanged);
+    window.addEventListener('hashchange', routeChanged);
+    new MutationObserver(function () { generation.mutations++; }).observe(
+        document, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+var element = arguments[0], by = arguments[1], value = arguments[2], mutations = arguments[3];
+var generation = window.__e2eGeneration;
+var usable = !!element && element.isConnected && element.getClientRects().length > 0
+    && window.getComputedStyle(element).visibility !== 'hidden';
+var matches = usable && mutations === generation.mutations;
+if (usable && !matches) {
+    var first = null;
+    if (by === 'xpath') {
+        first = document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } else if (by === 'css selector' || by === 'tag name') {
+        first = document.querySelector(value);
+    } else if (by === 'id') {
+        first = document.getElementById(value);
+    } else if (by === 'name') {
+        first = document.getElementsByName(value)[0] || null;
+    } else if (by === 'class name') {
+        first = document.getElementsByClassName(value)[0] || null;
+    }
+    matches = first === element;
+}
+return {token: generation.page + ':' + generation.route, mutations: generation.mutations, usable: usable && matches};
+"""
+
+# driver -> {(page class, locator name, locator): (generation token, mutations, element)}
+ELEMENT_CACHES = weakref.WeakKeyDictionary()
+
+# resolved template locators kept, by page class, template name and parameters,
+# only for parameters taking numbers or choices
+RESOLVED_LOCATORS = 1024
+
+# rows xpath, {field: [xpath relative to a row, property or null for the text]}
+READ_TABLE_SCRIPT = """
+var rows = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+var columns = arguments[1], result = [];
+for (var i = 0; i < rows.snapshotLength; i++) {
+    var row = rows.snapshotItem(i), values = {};
+    Object.keys(columns).forEach(function (field) {
+        var cell = document.evaluate(
+            columns[field][0], row, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        var property = columns[field][1];
+        if (cell === null) {
+            values[field] = null;
+        } else if (property) {
+            values[field] = cell[property] !== undefined ? cell[property] : cell.getAttribute(property);
+        } else {
+            values[field] = cell.innerText.trim();
+        }
+    });
+    result.push(values);
+}
+return result;
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(page_class, name):
+    """
+    Parse a locator template of a page class once. A template is
+    (TYPE, value) or (TYPE, value, {parameter: {choice: fragment}}), where
+    the value has str.format fields and a parameter with choices takes the
+    name of a fragment, e.g. a column name for the xpath of its cell.
+    Return (By, [(literal, parameter)], parameters, choices).
+    """
+    # the templates of a page add to the ones of its base classes
+    template = next(
+        (vars(cls)["templates"][name] for cls in page_class.__mro__ if name in vars(cls).get("templates", {})),
+        None)
+    if template is None:
+        raise KeyError(f"No locator template {name} in {page_class.__name__}")
+    locator_type, value, *choices = template
+    choices = choices[0] if choices else {}
+    parts = [(literal, field) for literal, field, _, _ in string.Formatter().parse(value)]
+    parameters = frozenset(field for _, field in parts if field is not None)
+    if set(choices) - parameters or not all(parameter.isidentifier() for parameter in parameters):
+        raise ValueError(f"Invalid locator template {page_class.__name__}.{name}: {value}")
+    return page_class.TYPE_OF_LOCATORS[locator_type.lower()], parts, parameters, choices
+
+
+def fill_template(page_class, name, params):
+    """
+    Return the (By, value) locator of a template for the parameters,
+    given as sorted (parameter, value) pairs
+    """
+    by, parts, parameters, choices = compile_template(page_class, name)
+    params = dict(params)
+    if set(params) != parameters:
+        raise TypeError(
+            f"{page_class.__name__}.{name} takes {sorted(parameters)}, got {sorted(params)}")
+    values = {parameter: str(value) for parameter, value in params.items()}
+    for parameter, fragments in choices.items():
+        if params[parameter] not in fragments:
+            raise ValueError(f"{page_class.__name__}.{name}: {parameter} is one of {list(fragments)}")
+        values[parameter] = fragments[params[parameter]]
+    return by, "".join(literal + (values[field] if field is not None else "") for literal, field in parts)
+
+
+resolve_template = functools.lru_cache(maxsize=RESOLVED_LOCATORS)(fill_template)
+
+
+class RequestTrackingExecutor:
+    """
+    Stand in for the command executor of a WebDriver, installing the
+    request tracker as soon as a command loading a page returns, before a
+    later command can start a request. WebDriver can not run a script before
+    the scripts of the page, the requests OSIM starts while the page loads
+    are not counted.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
+
+    def execute(self, command, params):
+        response = self.executor.execute(command, params)
+        if command in LOADING_COMMANDS:
+            self.executor.execute(Command.W3C_EXECUTE_SCRIPT, {
+                "sessionId": params.get("sessionId"), "script": TRACK_REQUESTS_SCRIPT, "args": []})
+        return response
+
+
+def track_requests(driver):
+    driver.command_executor = RequestTrackingExecutor(driver.command_executor)
+    return driver
+
+
+class OsimErrorShown(TimeoutException):
+    """
+    OSIM showed an error while waiting for something else, the wait would
+    only run to its timeout
+    """
 
 
 class BasePage(PageFactory):
@@ -15,16 +327,65 @@ class BasePage(PageFactory):
     this class
     """
 
+    # parametrized locators, resolved with loc()
+    templates = {
+        "textContaining": ("XPATH", '//*[contains(text(), "{value}")]'),
+    }
+
     def __init__(self, driver):
         self.driver = driver
         self.timeout = 60
 
+    def __getattr__(self, loc):
+        """
+        Resolve a page factory locator once per page and route. The element
+        found is reused by every page object of the driver while OSIM stays
+        on the same route and the element is still attached and visible,
+        and, once the DOM changed, still the first one found by the locator.
+        Otherwise it is found again with the page factory waits.
+        """
+        if loc not in getattr(type(self), "locators", {}):
+            return super().__getattr__(loc)
+
+        locator = locator_in_page_factory(self, loc)
+        key = (type(self), loc, locator)
+        cache = ELEMENT_CACHES.setdefault(self.driver, {})
+        cached = cache.get(key)
+        try:
+            state = self.driver.execute_script(
+                GENERATION_SCRIPT, cached[2] if cached else None, *locator, cached[1] if cached else None)
+        except StaleElementReferenceException:
+            cached = None
+            state = self.driver.execute_script(GENERATION_SCRIPT, None, *locator, None)
+
+        if cached and cached[0] == state["token"] and state["usable"]:
+            cache[key] = (state["token"], state["mutations"], cached[2])
+            return cached[2]
+
+        element = super().__getattr__(loc)
+        cache[key] = (state["token"], state["mutations"], element)
+        return element
+
+    def loc(self, name, **params):
+        """
+        Return the (By, value) locator of a template of the page filled with
+        the parameters, e.g. self.loc("affectCell", row=3, column="module").
+        The templates are parsed once and the locators filled with numbers
+        or choices are cached, the ones filled with free text, e.g. a message,
+        are used once. The locators dict of the page is left as is.
+        """
+        choices = compile_template(type(self), name)[3]
+        params = tuple(sorted(params.items()))
+        if all(isinstance(value, int) or parameter in choices for parameter, value in params):
+            return resolve_template(type(self), name, params)
+        return fill_template(type(self), name, params)
+
     def click_button_with_js(self, btn_element):
         if not isinstance(btn_element, WebElement):
             element = getattr(self, btn_element)
         else:
             element = btn_element
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+        self.driver.execute_script(SCROLL_INTO_VIEW_SCRIPT, element)
         self.driver.execute_script("arguments[0].click();", element)
 
     def click_btn(self, btn_element):
@@ -32,7 +393,7 @@ class BasePage(PageFactory):
             element = getattr(self, btn_element)
         else:
             element = btn_element
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
+        self.driver.execute_script(SCROLL_INTO_VIEW_SCRIPT, element)
         element.click_button()
 
     def clear_text_with_js(self, element_name):
@@ -44,26 +405,99 @@ class BasePage(PageFactory):
         self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
         self.driver.execute_script("arguments[0].value = '';", element)
 
+    def mark_errors_seen(self):
+        """
+        Ignore the errors shown so far in the next waits, for actions
+        which do not go through click_btn or click_button_with_js
+        """
+        self.driver.execute_script(MARK_ERRORS_SEEN_SCRIPT)
+
     def wait_msg(self, msg_element):
-        element = getattr(self, msg_element)
-        element.visibility_of_element_located(self.timeout)
+        self.wait_in_browser("visible", msg_element, watch_errors=True)
 
     def check_text_exist(self, value):
-        self.check_element_exists(By.XPATH, f'//*[contains(text(), "{value}")]')
+        self.check_element_exists(*self.loc("textContaining", value=value))
 
     def is_checkbox_selected(self, checkbox):
         element = find_elements_in_page_factory(self, checkbox)
         return element[0].is_selected()
 
     def check_element_exists(self, by, value):
-        return WebDriverWait(self.driver, self.timeout).until(
-            EC.presence_of_element_located((by, value))
-        )
+        self.wait_in_browser("present", (by, value), watch_errors=True)
+        return self.driver.find_element(by, value)
 
     def is_element_exists(self, by, value):
         results = self.driver.find_elements(by, value)
         return bool(results)
 
+    def read_table(self, rows_xpath, columns, row_type=None):
+        """
+        Read table rows in one WebDriver call. columns maps a field to the
+        xpath of its cell in a row, or to (xpath, property) to read e.g. the
+        href of a link instead of the text. A missing cell reads as None.
+        Return the rows as dicts, or as row_type namedtuples.
+        """
+        columns = {
+            field: list(column) if isinstance(column, tuple) else [column, None]
+            for field, column in columns.items()
+        }
+        rows = self.driver.execute_script(READ_TABLE_SCRIPT, rows_xpath, columns)
+        if row_type is None:
+            return rows
+        return [row_type(**row) for row in rows]
+
+    def wait_in_browser(self, condition, locator=None, timeout=None, quiet_ms=QUIET_MS, watch_errors=False):
+        """
+        Wait inside the browser, in one WebDriver call, until:
+        - requests: no fetch or XHR request is in flight
+        - quiet: no request is in flight and the DOM did not change for quiet_ms
+        - present, absent, visible, hidden: the elements matching a locator,
+          a page factory locator name or a (By, value) tuple, are in that state
+        Requests are counted once the driver loaded a page, see
+        track_requests(), or from the first click or wait on a page loaded
+        otherwise, e.g. by a link. With
+        watch_errors, an OSIM error toast or validation message shown since
+        the last click, before or during the wait, raises OsimErrorShown at
+        once.
+        """
+        if locator is None:
+            by = value = None
+        elif isinstance(locator, str):
+            by, value = locator_in_page_factory(self, locator)
+        else:
+            by, value = locator
+
+        timeout = self.timeout if timeout is None else timeout
+        end = time.monotonic() + timeout
+        while True:
+            remaining = max(end - time.monotonic(), 0)
+            chunk = min(remaining, WAIT_SCRIPT_CHUNK)
+            result = self.driver.execute_async_script(
+                WAIT_SCRIPT, condition, by, value, int(chunk * 1000), quiet_ms,
+                ERROR_NOTIFICATIONS if watch_errors else None)
+            if result["ok"]:
+                return
+            if result.get("error"):
+                raise OsimErrorShown(f"OSIM showed an error while waiting for {condition} {value or ''}: "
+                                     f"{result['error']}")
+            if remaining <= WAIT_SCRIPT_CHUNK:
+                raise TimeoutException(
+                    f"Waited {timeout}s for {condition} {value or ''}, "
+                    f"{result['pending']} requests still in flight")
+
+    def sent_requests(self):
+        """
+        Return the URLs of the last requests sent by the page, oldest first.
+        Requests are tracked from the first click or wait on a page.
+        """
+        return self.driver.execute_script(SENT_REQUESTS_SCRIPT)
+
+    def wait_page_settled(self, timeout=None):
+        """
+        Wait until OSIM finished loading data and rendering it
+        """
+        self.wait_in_browser("quiet", timeout=timeout)
+
     def open_new_tab(self, url):
         # Store the ID of the original window
         original_window = self.driver.current_window_handle
@@ -71,7 +505,7 @@ class BasePage(PageFactory):
         # switch to new tab
         self.driver.switch_to.new_window('tab')
         self.driver.get(url)
-        time.sleep(3)
+        self.wait_page_settled()
 
         return original_window
 
@@ -1,5 +1,4 @@
 import random
-import time
 from collections import namedtuple
 
 from selenium.webdriver.common.by import By
@@ -8,7 +7,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.relative_locator import locate_with
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
 from seleniumpagefactory.Pagefactory import ElementNotVisibleException, ElementNotFoundException
 from selenium.webdriver.remote.webelement import WebElement
 
@@ -24,12 +23,98 @@ Affect = namedtuple(
 Tracker = namedtuple(
     "Tracker", ["bug_id", "module", "product_stream", "status", "resolution", "created_date", "updated_date"])
 
+AFFECT_ROWS = "(//tbody)[1]/tr"
+AFFECT_COLUMNS = {
+    "module": "td[3]/span",
+    "component": "td[4]/span",
+    "affectedness": "td[6]/span",
+    "resolution": "td[7]/span",
+    "impact": "td[8]/span",
+    "cvss": "td[9]/span",
+}
+
+# the controls of an affect row being edited
+AFFECT_CONTROLS = {
+    "module": "td[3]/input",
+    "component": "td[4]/input",
+    "affectedness": "td[6]/select",
+    "resolution": "td[7]/select",
+    "impact": "td[8]/select",
+    "cvssCalculator": "td[9]/div/i",
+    "eraseCvssBtn": "td[9]/div/div/div/div/button[@class='erase-button input-group-text']",
+    "editBtn": "td[last()]/button[@title='Edit affect']",
+    "commitBtn": "td[last()]/button[@title='Commit edit']",
+}
+
+TRACKER_ROWS = "//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr"
+TRACKER_COLUMNS = {
+    "bug_id": ("td[1]/a", "href"),
+    "module": "td[2]",
+    "product_stream": "td[3]",
+    "status": "td[4]",
+    "resolution": "td[5]",
+    "created_date": "td[6]",
+    "updated_date": "td[7]",
+}
+
+# locators of the form labels indexed by FIELD_INDEX_SCRIPT
+FIELD_LABELS = (
+    "titleText", "componentsText", "cveidText", "cweidText", "impactText", "sourceText",
+    "incidentStateText", "reportedDateText", "publicDateText", "publicDateFutureText",
+    "ownerText", "stateText", "embargoedText", "cvssV3Text",
+    "comment#0Text", "descriptionText", "statementText", "mitigationText",
+)
+
+# label xpaths by key -> the controls in the row of each label and its value
+FIELD_INDEX_SCRIPT = """
+var labels = arguments[0], index = {};
+var CONTROLS = 'input, select, textarea, .osim-editable-text-pen, .osim-editable-date-pen, span.form-control';
+Object.keys(labels).forEach(function (key) {
+    var label = document.evaluate(
+        labels[key], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (label === null) {
+        return;
+    }
+    // the closest ancestor of the label holding a control is the field row
+    var row = label.parentElement;
+    for (var depth = 0; row && depth < 3 && !row.querySelector(CONTROLS); depth++) {
+        row = row.parentElement;
+    }
+    if (!row || !row.querySelector(CONTROLS)) {
+        return;
+    }
+    var field = {
+        label: label,
+        row: row,
+        input: row.querySelector('input.form-control, input.osim-pill-list-input'),
+        select: row.querySelector('select.form-select'),
+        textarea: row.querySelector('textarea'),
+        editButton: row.querySelector('.osim-editable-text-pen, .osim-editable-date-pen'),
+        valueSpan: row.querySelector('.osim-editable-text-value, .osim-editable-date-value, span.form-control'),
+        value: null
+    };
+    if (field.textarea) {
+        field.value = field.textarea.value;
+    } else if (field.select) {
+        var option = field.select.options[field.select.selectedIndex];
+        field.value = option ? option.text.trim() : null;
+    } else if (field.valueSpan) {
+        field.value = field.valueSpan.innerText.trim();
+    } else if (field.input) {
+        field.value = field.input.value;
+    }
+    index[key] = field;
+});
+return index;
+"""
+
 
 class FlawDetailPage(BasePage):
 
     def __init__(self, driver):
         self.driver = driver
         self.timeout = 60
+        self.field_index_cache = None
 
     locators = {
         "createFlawLink": ("LINK_TEXT", "Create Flaw"),
@@ -210,6 +295,38 @@ class FlawDetailPage(BasePage):
         'embargoedText': ("XPATH", "//span[text()=' Embargoed']"),
     }
 
+    templates = {
+        "affectRow": ("XPATH", AFFECT_ROWS + "[{row}]"),
+        "affectCell": ("XPATH", AFFECT_ROWS + "[{row}]/{column}", {"column": AFFECT_COLUMNS}),
+        "affectControl": ("XPATH", AFFECT_ROWS + "[{row}]/{control}", {"control": AFFECT_CONTROLS}),
+        "cvssFactorBtns": (
+            "XPATH",
+            '(//div[@class="btn-group-vertical btn-group-sm osim-factor-severity-select"])[{factor}]'
+            '/button[position()>1]'),
+        "divText": ("XPATH", '//div[text()="{value}"]'),
+        "spanText": ("XPATH", "//span[text()='{value}']"),
+        "spanContaining": ("XPATH", '//span[contains(text(), "{value}")]'),
+        "cvssScoresSavedMsg": ("XPATH", "//div[text()='{count} CVSS score(s) saved on {count} affect(s).']"),
+        "affectFileTrackerBtn": ("XPATH", "//span[@title='{component}']/ancestor::tr/td[9]/div/button"),
+        "manageSelectedTrackersBtn": ("XPATH", "//button[@title='Manage trackers for {count} selected affect(s)']"),
+        "unfiledTrackerProductStream": (
+            "XPATH", "//div[@class='osim-tracker-list mb-2']/label[{row}]/span/span[1]"),
+        "unfiledTrackerCheckBox": ("XPATH", "//div[@class='osim-tracker-list mb-2']/label[{row}]/input"),
+        "selectedTrackerProductStream": (
+            "XPATH", "//div[@class='osim-tracker-list mt-2']/label/span/span[1][text()='{product_stream}']"),
+        "selectedTrackerCheckBox": (
+            "XPATH",
+            "//div[@class='osim-tracker-list mt-2']/label/span/span[1][text()='{product_stream}']/../../input"),
+        "trackerManagerFlawTab": ("XPATH", "//span[text()='{flaw_id}']/ancestor::button"),
+        "deselectAllTrackerBtn": ("XPATH", "(//button[text()=' Deselect All']/i)[{tab}]"),
+        "inspectTrackersBtn": ("XPATH", "//span[text()='Inspect {count} Trackers to File']/ancestor::button"),
+        "trackerInspection": (
+            "XPATH",
+            "(//table[@class='osim-trackers-inspector'])[1]/tr/td[text()='{product_stream}']/../td[2]/{result}",
+            {"result": {"affects": "span[1]", "flaws": "span[2]"}}),
+        "trackerStatusFilterCheckBox": ("XPATH", "(//span[text()='{status}'])[last()]/ancestor::a/input"),
+    }
+
     # Data is from OSIDB allowed sources:
     # https://github.com/RedHatProductSecurity/osidb/blob/master/osidb/models.py#L419
     allowed_sources = [
@@ -255,9 +372,59 @@ class FlawDetailPage(BasePage):
         button_element = getattr(self, 'add' + comment_type + 'CommentBtn')
         button_element.visibility_of_element_located()
 
+    def field_index(self, refresh=False):
+        """
+        Map the form labels to their controls and values, built in one
+        script call instead of a relative locator search per field. The
+        controls are only used through with_field_control, which indexes
+        the form again when it was rendered again since.
+        """
+        if refresh or self.field_index_cache is None:
+            labels = {key: self.locators[key][1] for key in FIELD_LABELS}
+            self.field_index_cache = self.driver.execute_script(FIELD_INDEX_SCRIPT, labels)
+        return self.field_index_cache
+
+    def field_control(self, label, control):
+        """
+        Return a control of the field of a label: "input", "select",
+        "textarea", "editButton" or "valueSpan". It may be stale, use
+        with_field_control to act on it.
+        """
+        for refresh in (False, True):
+            field = self.field_index(refresh).get(label)
+            # an input may only be rendered once the field is edited
+            if field is not None and field[control] is not None:
+                return field[control]
+        raise NoSuchElementException(f"No {control} found for {label}")
+
+    def with_field_control(self, label, control, action):
+        """
+        Run an action on a field control, indexing the form again when it
+        was rendered again since the last index
+        """
+        try:
+            return action(self.field_control(label, control))
+        except StaleElementReferenceException:
+            self.field_index(refresh=True)
+            return action(self.field_control(label, control))
+
+    def read_field_values(self):
+        """
+        Read the value of every indexed field at once
+        """
+        return {label: field["value"] for label, field in self.field_index(refresh=True).items()}
+
     def save_button_exist(self):
         self.saveBtn.visibility_of_element_located()
 
+    def wait_flaw_loaded(self):
+        """
+        The form is only rendered once the flaw is fetched, then wait for
+        the rest of its data
+        """
+        self.wait_in_browser("visible", "saveBtn")
+        self.wait_page_settled()
+
     def set_comment_value(self, comment_type, value):
         self.componentsText.execute_script("arguments[0].scrollIntoView(true);")
         comment_text_element = getattr(self, 'new' + comment_type + 'CommentText')
@@ -277,26 +444,25 @@ class FlawDetailPage(BasePage):
                 self.click_btn(field_btn)
                 self.switch_element_visibility(bottom_footer, 'visible')
                 self.switch_element_visibility(bottom_bar, 'visible')
-        field_element = getattr(self, field + 'Text')
-        field_input = self.driver.find_elements(
-            locate_with(By.TAG_NAME, "textarea").near(field_element))[0]
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", field_element)
-        if value:
-            self.driver.execute_script("arguments[0].value = '';", field_input)
-            field_input.send_keys(value)
-        else:
-            field_input.send_keys(Keys.CONTROL + 'a', Keys.BACKSPACE)
+            # the textarea is only rendered after the button click
+            self.field_index(refresh=True)
+
+        def set_text(field_input):
+            self.driver.execute_script("arguments[0].scrollIntoView(true);", field_input)
+            if value:
+                self.driver.execute_script("arguments[0].value = '';", field_input)
+                field_input.send_keys(value)
+            else:
+                field_input.send_keys(Keys.CONTROL + 'a', Keys.BACKSPACE)
+
+        self.with_field_control(field + 'Text', "textarea", set_text)
 
     def get_document_text_field(self, field):
         if field != 'comment#0':
             field_btn = field + 'Btn'
             if find_elements_in_page_factory(self, field_btn):
                 return ''
-        field_element = getattr(self, field + 'Text')
-        field_input = self.driver.find_elements(
-            locate_with(By.TAG_NAME, "textarea").near(field_element))[0]
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", field_element)
-        return field_input.getAttribute("value")
+        return self.read_field_values().get(field + 'Text')
 
     def set_acknowledgement(self, name, affiliation):
         self.driver.execute_script("arguments[0].scrollIntoView(true);", self.addAcknowledgementNameSpan)
@@ -311,51 +477,52 @@ class FlawDetailPage(BasePage):
         affiliation_input.send_keys(affiliation)
 
     def click_save_acknowledgment_btn(self):
+        self.mark_errors_seen()
         self.driver.execute_script("arguments[0].click();", self.saveAcknowledgmentBtn)
 
     def check_acknowledgement_not_exist(self, value):
         return WebDriverWait(self.driver, self.timeout).until(
-            EC.invisibility_of_element_located((By.XPATH, f'//div[text()="{value}"]'))
+            EC.invisibility_of_element_located(self.loc("divText", value=value))
         )
 
-    def get_select_element(self, field):
+    def with_select_element(self, field, action):
+        """
+        Run an action on the select of a field, given by its page factory
+        name ending in Select or by the label of its form field
+        """
         if field.endswith('Select'):
-            return getattr(self, field)
-        text_element = getattr(self, field + "Text")
-        field_select_list = self.driver.find_elements(
-            locate_with(By.XPATH, "//select[@class='form-select is-invalid']").
-            near(text_element))
-        if not field_select_list:
-            field_select_list = self.driver.find_elements(
-                locate_with(By.XPATH, "//select[@class='form-select']").
-                near(text_element))
-        return field_select_list[0]
+            return action(getattr(self, field))
+        label = field if field.endswith('Text') else field + "Text"
+        return self.with_field_control(label, "select", action)
 
     def get_select_value(self, field):
-        if not isinstance(field, WebElement):
-            field_select = self.get_select_element(field)
-        else:
-            field_select = field
-        all_values = field_select.get_all_list_item()
-        selected_item = field_select.get_list_selected_item()
-        current_value = selected_item[0] if selected_item else None
-        return all_values, current_value
+        def read(field_select):
+            all_values = field_select.get_all_list_item()
+            selected_item = field_select.get_list_selected_item()
+            current_value = selected_item[0] if selected_item else None
+            return all_values, current_value
+
+        if isinstance(field, WebElement):
+            return read(field)
+        return self.with_select_element(field, read)
 
     def set_select_value(self, field):
-        field_select = self.get_select_element(field)
-        all_values, current_value = self.get_select_value(field_select)
-        if field == 'source':
-            all_values = self.allowed_sources
-        if current_value in all_values:
-            all_values.remove(current_value)
-        if "" in all_values:
-            all_values.remove("")
-        if all_values:
-            updated_value = "REDHAT" if "REDHAT" in all_values else all_values[0]
-            field_select.select_element_by_text(updated_value)
-        else:
-            updated_value = current_value
-        return updated_value
+        def select(field_select):
+            all_values, current_value = self.get_select_value(field_select)
+            if field == 'source':
+                all_values = self.allowed_sources
+            if current_value in all_values:
+                all_values.remove(current_value)
+            if "" in all_values:
+                all_values.remove("")
+            if all_values:
+                updated_value = "REDHAT" if "REDHAT" in all_values else all_values[0]
+                field_select.select_element_by_text(updated_value)
+            else:
+                updated_value = current_value
+            return updated_value
+
+        return self.with_select_element(field, select)
 
     def click_first_edit_btn(self, element):
         first_ack_edit_btn = self.driver.find_elements(
@@ -397,15 +564,12 @@ class FlawDetailPage(BasePage):
         first_ack_edit_affiliation_input.send_keys(affiliation)
 
     def set_components_field(self, value):
-        field_input = self.driver.find_elements(
-            locate_with(By.XPATH, "//input[@class='osim-pill-list-input no-drag']").
-            to_right_of(self.componentsText))[0]
-
         component_element_list = self.driver.find_elements(By.XPATH, "//i[@class='bi bi-x-square ms-1']")
         for component_element in component_element_list:
             component_element.click()
 
-        field_input.send_keys(value)
+        # removing the components renders the field again
+        self.with_field_control("componentsText", "input", lambda field_input: field_input.send_keys(value))
 
     def set_contributors_field(self, value):
         field_input = self.driver.find_elements(
@@ -431,8 +595,7 @@ class FlawDetailPage(BasePage):
         field_input.click()
         # (//div[@class="btn-group-vertical btn-group-sm osim-factor-severity-select"])[1]/button[position()>1]
         for i in range(1, 9):
-            items = self.driver.find_elements(
-                By.XPATH, f'(//div[@class="btn-group-vertical btn-group-sm osim-factor-severity-select"])[{i}]/button[position()>1]')
+            items = self.driver.find_elements(*self.loc("cvssFactorBtns", factor=i))
 
             item = random.choice(items)
             item.click()
@@ -440,40 +603,23 @@ class FlawDetailPage(BasePage):
         return self.get_cvssV3_score()
 
     def set_input_field(self, field, value):
-        try:
-            text_element = getattr(self, field + "Text")
-        except ElementNotFoundException:
+        label = field + "Text"
+        if label not in self.field_index() and label not in self.field_index(refresh=True):
             if field == "publicDate":
-                text_element = self.publicDateFutureText
+                label = "publicDateFutureText"
             else:
-                raise
-
-        # find edit button and input using relative locators
-        if "Date" not in field:
-            edit_btn = self.driver.find_elements(
-                locate_with(By.XPATH, "//button[@class='osim-editable-text-pen input-group-text']").
-                to_right_of(text_element))[0]
-        else:
-            edit_btn = self.driver.find_elements(
-                locate_with(By.XPATH, "//button[@class='osim-editable-date-pen input-group-text']").
-                to_right_of(text_element))[0]
-
-        self.click_button_with_js(edit_btn)
+                raise ElementNotFoundException(f"No field {field} found")
 
-        field_input_list = self.driver.find_elements(
-            locate_with(By.XPATH, "//input[@class='form-control']").near(text_element))
-        if not field_input_list:
-            field_input_list = self.driver.find_elements(
-                locate_with(By.XPATH, "//input[@class='form-control is-invalid']").
-                near(text_element))
+        self.with_field_control(label, "editButton", self.click_button_with_js)
 
-        field_input = field_input_list[0]
+        def set_text(field_input):
+            if value == '':
+                field_input.send_keys(Keys.CONTROL + 'a', Keys.BACKSPACE)
+            else:
+                self.driver.execute_script("arguments[0].value = '';", field_input)
+            field_input.send_keys(value)
 
-        if value == '':
-            field_input.send_keys(Keys.CONTROL + 'a', Keys.BACKSPACE)
-        else:
-            self.driver.execute_script("arguments[0].value = '';", field_input)
-        field_input.send_keys(value)
+        self.with_field_control(label, "input", set_text)
 
     def get_input_value(self, field):
         field_value = getattr(self, field + 'Value')
@@ -482,7 +628,7 @@ class FlawDetailPage(BasePage):
 
     def check_value_not_exist(self, value):
         return WebDriverWait(self.driver, self.timeout).until(
-            EC.invisibility_of_element_located((By.XPATH, f'//span[contains(text(), "{value}")]'))
+            EC.invisibility_of_element_located(self.loc("spanContaining", value=value))
         )
 
     def get_text_value(self, field):
@@ -509,6 +655,7 @@ class FlawDetailPage(BasePage):
                 del_btn = self.driver.find_element(By.XPATH, del_btn_xpath)
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", del_btn)
                 self.driver.execute_script("arguments[0].click();", del_btn)
+                self.mark_errors_seen()
                 self.referenceDelConfirmBtn.click_button()
                 self.wait_msg("referenceDeletedMsg")
                 self.close_all_toast_msg()
@@ -585,23 +732,20 @@ class FlawDetailPage(BasePage):
         """
         # find specified affect field elements
         try:
-            affect_edit_btn = self.driver.find_element(
-                By.XPATH, f"(//tbody)[1]/tr[{row}]/td[last()]/button[@title='Edit affect']")
+            affect_edit_btn = self.driver.find_element(*self.loc("affectControl", row=row, control="editBtn"))
         except NoSuchElementException:
             pass
         else:
             self.click_button_with_js(affect_edit_btn)
 
-        commit_edit_btn = self.driver.find_element(
-            By.XPATH, f"(//tbody)[1]/tr[{row}]/td[last()]/button[@title='Commit edit']")
-        module_input = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[3]/input")
-        component_input = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[4]/input")
-        affectedness_select = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[6]/select")
-        resolution_select = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[7]/select")
-        impact_select = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[8]/select")
-        cvss_calculator_icon = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{row}]/td[9]/div/i")
-        erase_cvss_button = self.driver.find_element(
-            By.XPATH, f"(//tbody)[1]/tr[{row}]/td[9]/div/div/div/div/button[@class='erase-button input-group-text']")
+        commit_edit_btn = self.driver.find_element(*self.loc("affectControl", row=row, control="commitBtn"))
+        module_input = self.driver.find_element(*self.loc("affectControl", row=row, control="module"))
+        component_input = self.driver.find_element(*self.loc("affectControl", row=row, control="component"))
+        affectedness_select = self.driver.find_element(*self.loc("affectControl", row=row, control="affectedness"))
+        resolution_select = self.driver.find_element(*self.loc("affectControl", row=row, control="resolution"))
+        impact_select = self.driver.find_element(*self.loc("affectControl", row=row, control="impact"))
+        cvss_calculator_icon = self.driver.find_element(*self.loc("affectControl", row=row, control="cvssCalculator"))
+        erase_cvss_button = self.driver.find_element(*self.loc("affectControl", row=row, control="eraseCvssBtn"))
 
         # Set new affect inputs: PS module, PS component, CVSSv3
         self.clear_text_with_js(module_input)
@@ -630,8 +774,7 @@ class FlawDetailPage(BasePage):
         self.click_button_with_js(erase_cvss_button)
         for i in range(1, 9):
             #
-            items = self.driver.find_elements(
-                By.XPATH, f'(//div[@class="btn-group-vertical btn-group-sm osim-factor-severity-select"])[{8+i}]/button[position()>1]')
+            items = self.driver.find_elements(*self.loc("cvssFactorBtns", factor=8+i))
 
             item = random.choice(items)
             self.click_button_with_js(item)
@@ -639,24 +782,17 @@ class FlawDetailPage(BasePage):
         # commit edit
         self.click_button_with_js(commit_edit_btn)
 
-    def get_affect_value(self, row=1):
-        module = f"(//tbody)[1]/tr[{row}]/td[3]/span"
-        component = f"(//tbody)[1]/tr[{row}]/td[4]/span"
-        affectedness = f"(//tbody)[1]/tr[{row}]/td[6]/span"
-        resolution = f"(//tbody)[1]/tr[{row}]/td[7]/span"
-        impact = f"(//tbody)[1]/tr[{row}]/td[8]/span"
-        cvss = f"(//tbody)[1]/tr[{row}]/td[9]/span"
-
-        affect = Affect(
-            module=self.driver.find_element(By.XPATH, module).get_text(),
-            component=self.driver.find_element(By.XPATH, component).get_text(),
-            affectedness=self.driver.find_element(By.XPATH, affectedness).get_text(),
-            resolution=self.driver.find_element(By.XPATH, resolution).get_text(),
-            impact=self.driver.find_element(By.XPATH, impact).get_text(),
-            cvss=self.driver.find_element(By.XPATH, cvss).get_text()
-        )
+    def get_affects(self):
+        """
+        Get all the displayed affects
+        """
+        return self.read_table(AFFECT_ROWS, AFFECT_COLUMNS, Affect)
 
-        return affect
+    def get_affect_value(self, row=1):
+        affects = self.read_table(self.loc("affectRow", row=row)[1], AFFECT_COLUMNS, Affect)
+        if not affects:
+            raise NoSuchElementException(f"No affect in row {row}")
+        return affects[0]
 
     def add_new_affect(self, module=None, component=None, affectedness_value='NEW', save=True):
         self.click_button_with_js('addNewAffectBtn')
@@ -704,33 +840,32 @@ class FlawDetailPage(BasePage):
         return random.choice(module_list)
 
     def set_select_specific_value(self, field, value):
-        select_element = getattr(self, field)
-        if not field.endswith('Select'):
-            select_element = self.driver.find_elements(
-                locate_with(By.XPATH, "//select[@class='form-select']").near(select_element))[0]
-
         bottom_footer = find_elements_in_page_factory(self, 'bottomFooter')[0]
         bottom_bar = find_elements_in_page_factory(self, 'bottomBar')[0]
         self.switch_element_visibility(bottom_footer, 'hidden')
         self.switch_element_visibility(bottom_bar, 'hidden')
 
-        time.sleep(2)
-
-        select_element.execute_script("arguments[0].scrollIntoView(true);")
+        self.wait_page_settled()
         self.close_all_toast_msg()
-        select_element.select_element_by_value(value)
+
+        def select(select_element):
+            select_element.execute_script("arguments[0].scrollIntoView(true);")
+            select_element.select_element_by_value(value)
+
+        self.with_select_element(field, select)
         self.switch_element_visibility(bottom_footer, 'visible')
         self.switch_element_visibility(bottom_bar, 'visible')
 
     def get_field_value_using_relative_locator(self, field, path):
+        if field in FIELD_LABELS:
+            return self.read_field_values().get(field)
         element = getattr(self, field)
         state_element = self.driver.find_elements(
             locate_with(By.XPATH, path).near(element))[0]
         return state_element.get_text()
 
     def get_input_field_value_using_relative_locator(self, field):
-        return self.get_field_value_using_relative_locator(
-            field, "//span[@class='osim-editable-text-value form-control']")
+        return self.read_field_values().get(field)
 
     def get_displayed_affects_number(self):
         affect_rows = find_elements_in_page_factory(self, "affectRows")
@@ -765,18 +900,17 @@ class FlawDetailPage(BasePage):
         reason_text_area.send_keys(value)
 
     def get_select_value_using_relative_locator(self, field):
-        element = getattr(self, field)
-        field_select = self.driver.find_elements(
-            locate_with(By.XPATH, "//select[@class='form-select']").near(element))
-        if not field_select:
-            field_select = self.driver.find_elements(
-                locate_with(By.XPATH, "//select[@class='form-select is-invalid']").near(element))
-        selected_item = field_select[0].get_list_selected_item()
-        current_value = selected_item[0] if selected_item else None
-        return current_value
+        return self.read_field_values().get(field)
 
     def get_valid_search_keywords_from_created_flaw(self):
         public_flaw_result = {}
+        values = self.read_field_values()
+
+        def document_text(field):
+            # a document text field which is not set only shows its add button
+            if find_elements_in_page_factory(self, field + 'Btn'):
+                return ''
+            return values.get(field + 'Text')
 
         # get public flaw search value
         self.click_acknowledgments_dropdown_btn()
@@ -788,23 +922,22 @@ class FlawDetailPage(BasePage):
         public_flaw_result["affects__affectedness"] = first_affect.affectedness
         public_flaw_result["affects__ps_component"] = first_affect.component
         public_flaw_result["affects__ps_module"] = first_affect.module
-        public_flaw_result["cve_description"] = self.get_document_text_field('description')
+        public_flaw_result["cve_description"] = document_text('description')
         public_flaw_result['requires_cve_description'] = self.get_select_value('reviewStatusSelect')[1]
-        public_flaw_result['cve_id'] = self.get_input_field_value_using_relative_locator("cveidText")
-        public_flaw_result["source"] = self.get_select_value_using_relative_locator("sourceText")
+        public_flaw_result['cve_id'] = values.get("cveidText")
+        public_flaw_result["source"] = values.get("sourceText")
         public_flaw_result["cvss_scores__score"] = self.get_cvssV3_score()
         public_flaw_result["cvss_scores__vector"] = self.get_cvssV3_vector()
-        public_flaw_result["cwe_id"] = self.get_input_field_value_using_relative_locator("cweidText")
-        public_flaw_result["embargoed"] = "true" if "Yes" in self.get_embargoed_value() else "false"
+        public_flaw_result["cwe_id"] = values.get("cweidText")
+        public_flaw_result["embargoed"] = "true" if "Yes" in (values.get("embargoedText") or "") else "false"
         # "affects__trackers__errata__advisory_name",
-        public_flaw_result['workflow_state'] = self.get_field_value_using_relative_locator(
-            'stateText', "//span[@class='form-control rounded-0']")
-        public_flaw_result["impact"] = self.get_select_value_using_relative_locator("impactText")
-        public_flaw_result["major_incident_state"] = self.get_select_value_using_relative_locator("incidentStateText")
-        public_flaw_result["mitigation"] = self.get_document_text_field("mitigation")
-        public_flaw_result['owner'] = self.get_input_field_value_using_relative_locator('ownerText')
-        public_flaw_result["statement"] = self.get_document_text_field("statement")
-        public_flaw_result['title'] = self.get_input_field_value_using_relative_locator('titleText')
+        public_flaw_result['workflow_state'] = values.get('stateText')
+        public_flaw_result["impact"] = values.get("impactText")
+        public_flaw_result["major_incident_state"] = values.get("incidentStateText")
+        public_flaw_result["mitigation"] = document_text("mitigation")
+        public_flaw_result['owner'] = values.get('ownerText')
+        public_flaw_result["statement"] = document_text("statement")
+        public_flaw_result['title'] = values.get('titleText')
         # "affects__trackers__external_system_id",
         # "uuid"
 
@@ -821,10 +954,10 @@ class FlawDetailPage(BasePage):
             _, value = self.get_select_value('reviewStatusSelect')
             return value
         if field == "embargoed":
-            return self.get_field_value_using_relative_locator('embargoedText', "//span[@class='form-control']")
+            return self.read_field_values().get('embargoedText')
 
     def check_owner_value_exist(self, value):
-        return self.driver.find_element(By.XPATH, f"//span[text()='{value}']")
+        return self.driver.find_element(*self.loc("spanText", value=value))
 
     def close_all_toast_msg(self):
         notifications = find_elements_in_page_factory(self, 'toastMsgCloseBtn')
@@ -832,7 +965,7 @@ class FlawDetailPage(BasePage):
             return
         for toast_msg in notifications:
             self.click_button_with_js(toast_msg)
-        time.sleep(1)
+        self.wait_page_settled()
 
     def set_cvss_score_explanation(self, value):
         cvss_comment_dropdown = self.driver.find_elements(
@@ -875,25 +1008,16 @@ class FlawDetailPage(BasePage):
             return None
 
     def get_affect_filter_result(self, filter):
-        affect_rows = find_elements_in_page_factory(self, "affectRows")
-        filter_result = []
-        for row_index in range(1, len(affect_rows) + 1):
-            affect = self.get_affect_value(row_index)
-            filter_result.append(getattr(affect, filter))
-        return filter_result
+        return [getattr(affect, filter) for affect in self.get_affects()]
 
     def bulk_update_affects(self):
         from features.utils import generate_random_text
         # get all affect
-        affects = find_elements_in_page_factory(self, "affectRows")
+        affects = self.get_affects()
 
         # get current module and affectedness
-        module_list, affectedness_list = [], []
-        for i in range(len(affects)):
-            current_affectedness = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{i+1}]/td[6]/span").text
-            affectedness_list.append(current_affectedness)
-            current_module = self.driver.find_element(By.XPATH, f"(//tbody)[1]/tr[{i+1}]/td[3]/span").text
-            module_list.append(current_module)
+        module_list = [affect.module for affect in affects]
+        affectedness_list = [affect.affectedness for affect in affects]
 
         self.click_button_with_js('allAffectsCheckBox')
         self.click_button_with_js("bulkEditAffectBtn")
@@ -921,8 +1045,7 @@ class FlawDetailPage(BasePage):
         self.click_btn('saveBtn')
         self.wait_msg('flawSavedMsg')
         self.wait_msg('affectUpdateMsg')
-        self.check_element_exists(
-            By.XPATH, f"//div[text()='{len(affects)} CVSS score(s) saved on {len(affects)} affect(s).']")
+        self.check_element_exists(*self.loc("cvssScoresSavedMsg", count=len(affects)))
 
         return check_result
 
@@ -954,11 +1077,7 @@ class FlawDetailPage(BasePage):
                 self.click_button_with_js("increaseAffectPerPage")
 
     def get_sorted_affects(self, field):
-        affect_rows = find_elements_in_page_factory(self, "affectRows")
-        affects = []
-        for row_index in range(1, len(affect_rows) + 1):
-            affects.append(self.get_affect_value(row_index))
-        return [getattr(affect, field) for affect in affects]
+        return [getattr(affect, field) for affect in self.get_affects()]
 
     def change_affect_state_for_filter(self):
         # add state
@@ -967,14 +1086,13 @@ class FlawDetailPage(BasePage):
         # modified state
         # get original value of component field
         original_component_value = self.driver.find_element(
-            By.XPATH, "(//tbody)[1]/tr[2]/td[4]/span").text
+            *self.loc("affectCell", row=2, column="component")).text
 
-        second_affect_edit_btn = self.driver.find_element(
-            By.XPATH, "(//tbody)[1]/tr[2]/td[last()]/button[@title='Edit affect']")
+        second_affect_edit_btn = self.driver.find_element(*self.loc("affectControl", row=2, control="editBtn"))
         self.click_button_with_js(second_affect_edit_btn)
-        second_affect_commit_btn = self.driver.find_element(
-            By.XPATH, "(//tbody)[1]/tr[2]/td[last()]/button[@title='Commit edit']")
-        second_affect_component_input = self.driver.find_element(By.XPATH, "(//tbody)[1]/tr[2]/td[4]/input")
+        second_affect_commit_btn = self.driver.find_element(*self.loc("affectControl", row=2, control="commitBtn"))
+        second_affect_component_input = self.driver.find_element(
+            *self.loc("affectControl", row=2, control="component"))
         self.clear_text_with_js(second_affect_component_input)
         second_affect_component_input.send_keys(original_component_value+'-update')
 
@@ -1010,32 +1128,24 @@ class FlawDetailPage(BasePage):
         assert self.get_displayed_affects_number() == 1
 
     def get_embargoed_value(self):
-        try:
-            value = self.get_field_value_using_relative_locator(
-                'embargoedText', "//span[@class='form-control has-button']")
-        except IndexError:
-            value = self.get_field_value_using_relative_locator(
-                'embargoedText', "//span[@class='form-control']")
-
-        return value
+        return self.read_field_values().get('embargoedText')
 
     def get_unfiled_tracker_number(self):
         return len(self.driver.find_elements(By.XPATH, "//div[@class='osim-tracker-list mb-2']/label"))
 
     def get_unfiled_tracker_product_stream(self, row=1):
-        return self.driver.find_element(
-            By.XPATH, f"//div[@class='osim-tracker-list mb-2']/label[{row}]/span/span[1]").get_text()
+        return self.driver.find_element(*self.loc("unfiledTrackerProductStream", row=row)).get_text()
 
     def get_selected_tracker_number(self):
         return len(self.driver.find_elements(By.XPATH, "//div[@class='osim-tracker-list mt-2']/label"))
 
     def wait_trackers_loaded_in_tracker_manager(self):
-        time.sleep(2)
         self.check_element_exists(By.XPATH, "//div[@class='osim-tracker-list-container ms-3 mt-2 pb-3']")
+        self.wait_page_settled()
         self.check_value_not_exist("Querying available trackers…")
 
     def select_unfiled_tracker(self, row=1):
-        self.driver.find_element(By.XPATH, f"//div[@class='osim-tracker-list mb-2']/label[{row}]/input").click()
+        self.driver.find_element(*self.loc("unfiledTrackerCheckBox", row=row)).click()
 
     def file_tracker(self, row=1):
         # get tracker's product stream
@@ -1043,6 +1153,7 @@ class FlawDetailPage(BasePage):
         # select first tracker
         self.select_unfiled_tracker(row=row)
         # file tracker
+        self.mark_errors_seen()
         self.driver.find_element(By.XPATH, "//button[text()=' File 1 Trackers ']").click()
         # confirm if current flaw is low impact
         try:
@@ -1055,7 +1166,7 @@ class FlawDetailPage(BasePage):
         self.close_all_toast_msg()
         # close tracker manager window
         self.click_button_with_js(self.trackerManagerCloseBtn)
-        time.sleep(2)
+        self.wait_page_settled()
 
         return product_stream
 
@@ -1063,7 +1174,7 @@ class FlawDetailPage(BasePage):
         """
         Click plus(+) button of an affect to file tracker
         """
-        plus_button = self.driver.find_element(By.XPATH, f"//span[@title='{component}']/ancestor::tr/td[9]/div/button")
+        plus_button = self.driver.find_element(*self.loc("affectFileTrackerBtn", component=component))
         self.click_button_with_js(plus_button)
         self.wait_trackers_loaded_in_tracker_manager()
         # click deselectAll button
@@ -1074,12 +1185,8 @@ class FlawDetailPage(BasePage):
     def file_tracker_for_selected_affects(self):
         n = self.get_displayed_affects_number()
         self.click_button_with_js('allAffectsCheckBox')
-        manage_tracker_btn = self.driver.find_element(
-            By.XPATH, f"//button[@title='Manage trackers for {n} selected affect(s)']")
-        module_component_pairs = []
-        for i in range(n):
-            affect = self.get_affect_value(i+1)
-            module_component_pairs.append(f"{affect.module}/{affect.component}")
+        manage_tracker_btn = self.driver.find_element(*self.loc("manageSelectedTrackersBtn", count=n))
+        module_component_pairs = [f"{affect.module}/{affect.component}" for affect in self.get_affects()[:n]]
 
         self.click_button_with_js(manage_tracker_btn)
         for v in module_component_pairs:
@@ -1107,46 +1214,33 @@ class FlawDetailPage(BasePage):
         return product_stream
 
     def is_tracker_selected(self, product_stream):
-        self.check_element_exists(
-            By.XPATH, f"//div[@class='osim-tracker-list mt-2']/label/span/span[1][text()='{product_stream}']")
+        self.check_element_exists(*self.loc("selectedTrackerProductStream", product_stream=product_stream))
 
         tracker_check_box = self.driver.find_element(
-            By.XPATH, f"//div[@class='osim-tracker-list mt-2']/label/span/span[1][text()='{product_stream}']/../../input")
+            *self.loc("selectedTrackerCheckBox", product_stream=product_stream))
 
         return tracker_check_box.is_selected()
 
     def get_tracker_number_of_displayed_tracker_list(self):
-        return len(self.driver.find_elements(
-            By.XPATH, "//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr"))
+        return len(self.driver.find_elements(By.XPATH, TRACKER_ROWS))
 
-    def get_tracker_value(self, row=1):
-        bug_id = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[1]/a"
-        module = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[2]"
-        product_stream = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[3]"
-        status = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[4]"
-        resolution = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[5]"
-        created_date = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[6]"
-        updated_date = f"//div[@class='osim-tracker-card pb-2 pt-0 pe-2 ps-2 bg-dark']/table/tbody/tr[{row}]/td[7]"
-
-        tracker = Tracker(
-            bug_id=self.driver.find_element(By.XPATH, bug_id).get_attribute('href'),
-            module=self.driver.find_element(By.XPATH, module).text,
-            product_stream=self.driver.find_element(By.XPATH, product_stream).text,
-            status=self.driver.find_element(By.XPATH, status).text,
-            resolution=self.driver.find_element(By.XPATH, resolution).text,
-            created_date=self.driver.find_element(By.XPATH, created_date).text,
-            updated_date=self.driver.find_element(By.XPATH, updated_date).text
-        )
+    def get_trackers(self):
+        """
+        Get all the trackers displayed in the tracker list
+        """
+        return self.read_table(TRACKER_ROWS, TRACKER_COLUMNS, Tracker)
 
-        return tracker
+    def get_tracker_value(self, row=1):
+        trackers = self.read_table(f"{TRACKER_ROWS}[{row}]", TRACKER_COLUMNS, Tracker)
+        if not trackers:
+            raise NoSuchElementException(f"No tracker in row {row}")
+        return trackers[0]
 
     def get_value_list_of_displayed_tracker_list(self, field):
-        n = self.get_tracker_number_of_displayed_tracker_list()
-        return [
-            getattr(self.get_tracker_value(i+1), field) for i in range(n)]
+        return [getattr(tracker, field) for tracker in self.get_trackers()]
 
     def click_flaw_tab_in_tracker_manager(self, flaw_id):
-        flaw_tab_btn = self.driver.find_element(By.XPATH, f"//span[text()='{flaw_id}']/ancestor::button")
+        flaw_tab_btn = self.driver.find_element(*self.loc("trackerManagerFlawTab", flaw_id=flaw_id))
         self.click_button_with_js(flaw_tab_btn)
 
     def click_flaw_deselect_all_in_tracker_manager(self, flaw_id):
@@ -1157,13 +1251,12 @@ class FlawDetailPage(BasePage):
                 index = i+1
                 break
 
-        deselect_all_btn = self.driver.find_element(By.XPATH, f"(//button[text()=' Deselect All']/i)[{index}]")
+        deselect_all_btn = self.driver.find_element(*self.loc("deselectAllTrackerBtn", tab=index))
 
         self.click_button_with_js(deselect_all_btn)
 
     def click_inspect_trackers_to_file_btn(self, tracker_number):
-        inspect_btn = self.driver.find_element(
-            By.XPATH, f"//span[text()='Inspect {tracker_number} Trackers to File']/ancestor::button")
+        inspect_btn = self.driver.find_element(*self.loc("inspectTrackersBtn", count=tracker_number))
 
         self.click_button_with_js(inspect_btn)
 
@@ -1172,11 +1265,9 @@ class FlawDetailPage(BasePage):
         get specific tracker's inspection results
         """
         affect_info = self.driver.find_element(
-            By.XPATH,
-            f"(//table[@class='osim-trackers-inspector'])[1]/tr/td[text()='{product_stream}']/../td[2]/span[1]").text
+            *self.loc("trackerInspection", product_stream=product_stream, result="affects")).text
         flaw_info = self.driver.find_element(
-            By.XPATH,
-            f"(//table[@class='osim-trackers-inspector'])[1]/tr/td[text()='{product_stream}']/../td[2]/span[2]").text
+            *self.loc("trackerInspection", product_stream=product_stream, result="flaws")).text
 
         affect_number = int(affect_info.split()[0])
         flaw_number = int(flaw_info.split()[0])
@@ -1184,4 +1275,4 @@ class FlawDetailPage(BasePage):
         return affect_number, flaw_number
 
     def select_tracker_status_filter_by_test(self, status):
-        self.driver.find_element(By.XPATH, f"(//span[text()='{status}'])[last()]/ancestor::a/input").click()
+        self.driver.find_element(*self.loc("trackerStatusFilterCheckBox", status=status)).click()
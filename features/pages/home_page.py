@@ -1,12 +1,58 @@
-import random
-from selenium.webdriver.common.by import By
+import urllib.parse
+
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.relative_locator import locate_with
+from selenium.webdriver.support.ui import WebDriverWait
 
+from features.flaw_checks import osidb_datetime
+from features.osidb_client import OsidbClient
 from features.page_factory_utils import find_elements_in_page_factory
 from features.pages.base import BasePage
 
 
+FLAW_LIST_PATH = "/osidb/api/v2/flaws"
+
+# the cell of a sortable column in a flaw list row, see IssueQueueItem.vue, and the value
+# it shows for an OSIDB flaw. The SRP status cell is rendered even when its column is hidden.
+FLAW_LIST_COLUMNS = {
+    "id": ("td[1]", lambda flaw: flaw["cve_id"] or flaw["uuid"]),
+    "impact": ("td[2]", lambda flaw: flaw["impact"] or ""),
+    "created": ("td[3]", lambda flaw: osidb_datetime(flaw["created_dt"], "%Y-%m-%d %H:%M")),
+    "title": ("td[4]", lambda flaw: flaw["title"] or ""),
+    "state": ("td[6]", lambda flaw: (flaw["classification"] or {}).get("state") or ""),
+    "owner": ("td[7]", lambda flaw: flaw["owner"] or ""),
+}
+
+# the OSIDB fields read for the flaw list columns
+FLAW_LIST_FIELDS = "cve_id,uuid,impact,created_dt,title,classification,owner"
+
+# the OSIDB order of the flaw list OSIM asks for when sorted by a column, ascending
+FLAW_LIST_ORDER = {
+    "id": ("cve_id", "uuid"),
+    "impact": ("impact",),
+    "created": ("created_dt",),
+    "title": ("title",),
+    "state": ("workflow_state",),
+    "owner": ("owner",),
+}
+
+# flaws OSIDB may list among the shown ones, created by other scenarios since OSIM listed them
+FLAW_LIST_SLACK = 50
+
+# the sorted column of a flaw list and its order, from the caret of its header
+SORT_STATE_SCRIPT = """
+var headers = document.querySelectorAll('thead.sticky-top th');
+for (var i = 0; i < headers.length; i++) {
+    var caret = headers[i].querySelector('i.bi');
+    if (caret && !caret.classList.contains('opacity-0')) {
+        return [headers[i].textContent.trim().toLowerCase(),
+                caret.classList.contains('bi-caret-up-fill') ? 'asce' : 'desc'];
+    }
+}
+return null;
+"""
+
+
 class HomePage(BasePage):
 
     def __init__(self, driver):
@@ -48,6 +94,10 @@ class HomePage(BasePage):
         "ownerBtn": ("XPATH", "//thead[@class='sticky-top']/tr/th[contains(text(), 'Owner')]")
     }
 
+    templates = {
+        "flawListCell": ("XPATH", "//div[@class='osim-incident-list']/table/tbody/tr[{row}]/td[{column}]"),
+    }
+
     def logout(self):
         self.userBtn.click_button()
         self.logoutBtn.click_button()
@@ -126,24 +176,70 @@ class HomePage(BasePage):
 #         login_user = self.userBtn.get_text()
 #         assert assignee_value_element.get_text() == login_user.strip(), 'Bulk assign failed'
 
-    def get_sort_flaws(self, field, sort_fields):
-        sorted_numbers = sorted(random.sample(range(1, 50), 3))
-        field_column = sort_fields.index(field) + 1
-        for number in sorted_numbers:
-            locator = f"//tr[@class='osim-issue-queue-item'][{number}]/td[{field_column}]"
-            self.locators[f"{field}{number}Text"] = ("XPATH", locator)
-        return sorted_numbers
-
-    def get_sort_field_values(self, field, sort_fields):
-        sorted_numbers = self.get_sort_flaws(field, sort_fields)
-        value = []
-        for number in sorted_numbers:
-            value.append(self.get_field_value(f"{field}{number}"))
-        return value
+    def sort_flaw_list(self, field, order):
+        """
+        Click the header of a column until the flaw list is sorted by it in
+        an order, 'desc' or 'asce', and wait for the list to be rendered
+        """
+        # a header cycles through descending, ascending and not sorted
+        for _ in range(3):
+            if self.driver.execute_script(SORT_STATE_SCRIPT) == [field, order]:
+                break
+            self.click_btn(field + "Btn")
+            self.wait_page_settled()
+        else:
+            assert False, f"The flaw list can not be sorted by {field} in {order} order"
+
+    def load_more_flaws(self, pages=1):
+        """
+        Load more pages of the flaw list, as long as there are more flaws
+        """
+        for _ in range(pages):
+            if not find_elements_in_page_factory(self, "loadMoreFlawsBtn"):
+                break
+            self.click_button_with_js("loadMoreFlawsBtn")
+            self.wait_page_settled()
+
+    def get_flaw_list_rows(self, field):
+        """
+        Return the ID and the value of a column of all the flaws loaded in
+        the list
+        """
+        rows = self.read_table(
+            "//tr[contains(@class, 'osim-issue-queue-item')]",
+            {"id": FLAW_LIST_COLUMNS["id"][0], field: FLAW_LIST_COLUMNS[field][0]})
+        return [(row["id"], row[field]) for row in rows]
+
+    def get_flaw_list_query(self):
+        """
+        Return the parameters of the last request OSIM made for the first
+        page of the flaw list
+        """
+        for url in reversed(self.sent_requests()):
+            url = urllib.parse.urlsplit(url)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            if url.path.endswith(FLAW_LIST_PATH) and query.get("offset", "0") == "0":
+                return query
+        raise AssertionError("OSIM did not request the flaw list")
+
+    def get_osidb_flaw_list_rows(self, field, order, count):
+        """
+        Return the ID and the value of a column of the first flaws OSIDB
+        lists for the query OSIM made, sorted by the column in an order,
+        'desc' or 'asce'. Flaws created since OSIM listed them may come
+        first, up to FLAW_LIST_SLACK more than count are read.
+        """
+        query = self.get_flaw_list_query()
+        prefix = "-" if order == "desc" else ""
+        expected = ",".join(prefix + name for name in FLAW_LIST_ORDER[field])
+        assert query.get("order") == expected, \
+            f"OSIM listed the flaws by {query.get('order')!r}, not {expected!r}"
+        query = dict(query, offset=0, limit=count + FLAW_LIST_SLACK, include_fields=FLAW_LIST_FIELDS)
+        flaws = OsidbClient().get(FLAW_LIST_PATH.lstrip("/"), **query)["results"]
+        return [(FLAW_LIST_COLUMNS["id"][1](flaw), FLAW_LIST_COLUMNS[field][1](flaw)) for flaw in flaws]
 
     def get_specified_cell_value(self, row, column):
-        locator = f"//div[@class='osim-incident-list']/table/tbody/tr[{row}]/td[{column}]"
-        return self.driver.find_element(By.XPATH, locator).text
+        return self.driver.find_element(*self.loc("flawListCell", row=row, column=column)).text
 
     def get_jira_username(self):
         # Get the current username
@@ -154,3 +250,10 @@ class HomePage(BasePage):
             value = user_name.split('|')[1].strip()
 
         return value
+
+    def wait_jira_username(self, timeout=None):
+        """
+        Wait until the user menu shows the Jira username, which OSIM gets
+        from Jira once a Jira API key is saved
+        """
+        WebDriverWait(self.driver, timeout or self.timeout).until(lambda driver: "|" in self.userBtn.text)
@@ -1,4 +1,3 @@
-from selenium.webdriver.support.relative_locator import locate_with
 from selenium.webdriver.common.by import By
 
 from features.pages.base import BasePage
@@ -11,14 +10,14 @@ class SettingsPage(BasePage):
         self.timeout = 15
 
     locators = {
-        "jiraApiKeyText": ("XPATH", "//span[text()='JIRA API Key']"),
+        "jiraApiKeyText": ("XPATH", "//span[text()='JIRA API Token']"),
         "bugzillaApiKeyText": ("XPATH", "//span[text()='Bugzilla API Key']"),
     }
 
     def set_api_key(self, type, value):
         key_text = getattr(self, type + 'ApiKeyText')
-        key_input = self.driver.find_elements(
-            locate_with(By.TAG_NAME, "input").below(key_text))[0]
+        # the input follows the label text, a relative locator is a script call
+        key_input = key_text.find_element(By.XPATH, "following::input[1]")
 
         key_input.clear()
         key_input.send_keys(value)
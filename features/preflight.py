@@ -0,0 +1,163 @@
+"""
+Check the environment of a run before any browser is started: OSIM, OSIDB,
+the Selenium grid, the OSIDB token and the configuration of the features.
+The checks run at once and everything found is reported in a few seconds,
+instead of a misconfigured run failing on the first login timeout.
+"""
+import json
+import os
+import sys
+import urllib.parse
+import warnings
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+from features.constants import (
+    BUGZILLA_API_KEY,
+    JIRA_API_KEY,
+    OSIDB_URL,
+    OSIM_URL,
+    PREFLIGHT_TIMEOUT
+)
+from features.grid import free_slots, grid_slots, grid_status
+from features.osidb_client import get_osidb_token
+
+
+OK, WARNING, FAILED = "ok", "warning", "failed"
+
+
+class PreflightFailed(Exception):
+    pass
+
+
+def check_osim():
+    # the dev server of OSIM uses a self-signed certificate
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        response = requests.get(OSIM_URL, timeout=PREFLIGHT_TIMEOUT, verify=False)
+    response.raise_for_status()
+    return OK, f"{OSIM_URL} answers {response.status_code}"
+
+
+def check_osidb():
+    """
+    Get an API token with the Kerberos ticket of the user and use it
+    to read the OSIDB status
+    """
+    if not OSIDB_URL:
+        return FAILED, "OSIDB_URL is not set"
+    try:
+        token = get_osidb_token()
+    except (RuntimeError, requests.RequestException) as e:
+        return FAILED, f"no access token from auth/token, is there a Kerberos ticket? {error_message(e)}"
+    response = requests.get(
+        urllib.parse.urljoin(OSIDB_URL, "osidb/api/v1/status"),
+        headers={"Authorization": f"Bearer {token}"}, timeout=PREFLIGHT_TIMEOUT)
+    response.raise_for_status()
+    status = response.json()
+    return OK, f"token acquired, OSIDB {status.get('version', '')} on {status.get('env', '')}"
+
+
+def check_grid():
+    status = grid_status()
+    if not status.get("ready"):
+        return FAILED, f"not ready: {status.get('message', '')}"
+    slots = grid_slots(status)
+    free = sum(free_slots(status).values())
+    if not free:
+        return WARNING, f"all {len(slots)} slots are busy, sessions will queue"
+    return OK, f"{free} of {len(slots)} slots free"
+
+
+def check_api_keys():
+    missing = [name for name, value in (("BUGZILLA_API_KEY", BUGZILLA_API_KEY), ("JIRA_API_KEY", JIRA_API_KEY))
+               if not value]
+    if missing:
+        return FAILED, f"{' and '.join(missing)} not set"
+    return OK, "set"
+
+
+def check_module_component_pairs():
+    value = os.getenv("AFFECTS_MODULE_COMPONENT_PAIR")
+    if not value:
+        return FAILED, "AFFECTS_MODULE_COMPONENT_PAIR is not set"
+    try:
+        pairs = json.loads(value)
+    except ValueError as e:
+        return FAILED, f"AFFECTS_MODULE_COMPONENT_PAIR is not valid JSON: {e}"
+    valid = isinstance(pairs, dict) and pairs and all(
+        isinstance(components, list) and components and all(isinstance(c, str) and c for c in components)
+        for components in pairs.values()
+    )
+    if not valid:
+        return FAILED, 'AFFECTS_MODULE_COMPONENT_PAIR must map modules to components, e.g. {"rhel-9": ["kernel"]}'
+    return OK, f"{len(pairs)} modules"
+
+
+def check_module_update_streams():
+    value = os.getenv("AFFECTS_MODULE_UPDATE_STREAM")
+    if not value:
+        return OK, "looked up in OSIDB"
+    try:
+        streams = json.loads(value)
+    except ValueError as e:
+        return FAILED, f"AFFECTS_MODULE_UPDATE_STREAM is not valid JSON: {e}"
+    if not isinstance(streams, dict) or not all(isinstance(s, str) and s for s in streams.values()):
+        return FAILED, 'AFFECTS_MODULE_UPDATE_STREAM must map modules to a stream, e.g. {"rhel-9": "rhel-9.4.z"}'
+    return OK, f"{len(streams)} modules"
+
+
+CHECKS = {
+    "OSIM": check_osim,
+    "OSIDB": check_osidb,
+    "Selenium grid": check_grid,
+    "API keys": check_api_keys,
+    "Affect modules": check_module_component_pairs,
+    "Affect update streams": check_module_update_streams,
+}
+
+
+def error_message(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)) and error.request is not None:
+        return f"can not reach {error.request.url} ({type(error).__name__})"
+    return str(error) or type(error).__name__
+
+
+def run_checks(checks=CHECKS, timeout=PREFLIGHT_TIMEOUT):
+    """
+    Run the checks concurrently, return {name: (status, message)}
+    """
+    executor = ThreadPoolExecutor(max_workers=len(checks))
+    futures = {name: executor.submit(check) for name, check in checks.items()}
+    wait(futures.values(), timeout=timeout * 2)
+    # a check still running is reported, not waited for
+    executor.shutdown(wait=False)
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            results[name] = (FAILED, f"no answer after {timeout * 2}s")
+        elif future.exception() is not None:
+            results[name] = (FAILED, error_message(future.exception()))
+        else:
+            results[name] = future.result()
+    return results
+
+
+def preflight_report(results):
+    lines = ["Preflight checks:"]
+    lines.extend(f"  {status:8} {name}: {message}" for name, (status, message) in results.items())
+    return "\n".join(lines)
+
+
+def preflight():
+    """
+    Run the checks and raise PreflightFailed when one of them failed
+    """
+    results = run_checks()
+    # behave captures the output of the hooks
+    print(preflight_report(results), file=sys.__stdout__, flush=True)
+    failed = sorted(name for name, (status, _) in results.items() if status == FAILED)
+    if failed:
+        raise PreflightFailed(f"Preflight checks failed: {', '.join(failed)}")
@@ -0,0 +1,338 @@
+"""
+Run the e2e features in parallel, following the data dependencies between them.
+
+Producer features (flaw creation) run as a whole, in a single behave process,
+because their scenarios pass data to each other. Consumer features are split
+into scenarios which are spread across the workers as soon as the flaws they
+need exist. When a producer fails, everything depending on it is skipped.
+
+A behave process is only started once the Selenium grid has a free slot for
+each of its sessions, --workers is an upper bound.
+
+Run it from the osim root directory:
+
+    python -m features.run --workers 4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from behave.parser import parse_file
+
+from features.constants import (
+    BROWSER_POOL_SIZE,
+    EMBARGOED_FLAW_UUID_KEY,
+    FLAW_ID_KEY,
+    FLAW_POOL_SIZE,
+    PREFLIGHT,
+    SESSION_BROKER_URL,
+    STEP_METRICS_TOP
+)
+from features.command_trace import merge_command_profiles
+from features.grid import GridSlots, NoGridSlot
+from features.preflight import PreflightFailed, preflight
+from features.run_data import RunDataStore
+from features.step_metrics import merge_step_metrics
+
+
+FEATURES_DIR = os.path.relpath(os.path.dirname(os.path.abspath(__file__)))
+
+# the browser of the sessions, see init_remote_firefox_browser()
+GRID_BROWSER = "firefox"
+
+# requires: features which must pass before this one starts
+# consumes: run data key -> feature producing it, copied to the namespace of the consumer
+# split: run every scenario in its own behave process, when they do not change a shared flaw
+FeatureJob = namedtuple("FeatureJob", ["name", "requires", "consumes", "split", "exclude_tags"])
+
+FEATURE_JOBS = (
+    FeatureJob("login", (), {}, False, ()),
+    FeatureJob("flaw_create_embargo", ("login",), {}, False, ()),
+    FeatureJob("flaw_create_public", ("login",), {}, False, ()),
+    FeatureJob("flaw_detail_embargo", (), {FLAW_ID_KEY: "flaw_create_embargo"}, True, ("skip",)),
+    FeatureJob("flaw_detail_public", (), {FLAW_ID_KEY: "flaw_create_public"}, True, ("skip",)),
+    FeatureJob(
+        "advance_search", (),
+        {FLAW_ID_KEY: "flaw_create_public", EMBARGOED_FLAW_UUID_KEY: "flaw_create_embargo"}, True, ()),
+    FeatureJob("flaw_list", (), {FLAW_ID_KEY: "flaw_create_public"}, True, ("skip",)),
+    FeatureJob("quick_search", (), {FLAW_ID_KEY: "flaw_create_public"}, True, ()),
+)
+
+# tags of the features leasing a flaw to every scenario, see FlawPool
+LEASE_TAGS = {"leased_public_flaw", "leased_embargoed_flaw"}
+
+Task = namedtuple("Task", ["job", "location", "workdir"])
+
+PASSED, FAILED, SKIPPED = "passed", "failed", "skipped"
+
+
+def feature_path(job):
+    return os.path.join(FEATURES_DIR, job.name + ".feature")
+
+
+def task_namespace(task):
+    return os.path.basename(task.workdir)
+
+
+def job_dependencies(job):
+    return set(job.requires) | set(job.consumes.values())
+
+
+def job_scenarios(job):
+    """
+    Return the scenarios of a feature which are not excluded by tags
+    """
+    feature = parse_file(feature_path(job))
+    return [
+        scenario for scenario in feature.scenarios
+        if not set(job.exclude_tags) & set(scenario.effective_tags)
+    ]
+
+
+def job_locations(job):
+    if not job.split:
+        return [feature_path(job)]
+    # without the pool the scenarios change the same FLAW_ID
+    if not FLAW_POOL_SIZE and LEASE_TAGS & set(parse_file(feature_path(job)).tags):
+        return [feature_path(job)]
+    return [f"{feature_path(job)}:{scenario.line}" for scenario in job_scenarios(job)]
+
+
+class Runner:
+
+    def __init__(self, jobs, workers, junit_directory, behave_args=(), wait_for_grid=True):
+        self.jobs = {job.name: job for job in jobs}
+        self.workers = workers
+        self.junit_directory = junit_directory
+        self.behave_args = list(behave_args)
+        self.status = {}
+        self.outputs = {}
+        self.remaining = {}
+        self.failed = set()
+        self.print_lock = threading.Lock()
+        self.tmp_dir = tempfile.mkdtemp(prefix="osim-e2e-")
+        # one database for the run, one namespace per behave process
+        self.run_data = RunDataStore(os.path.join(self.tmp_dir, "run_data.db"))
+        self.run_name = os.path.basename(self.tmp_dir)
+        # a process holds up to BROWSER_POOL_SIZE sessions, and one when they are not kept.
+        # With a session broker the processes attach to its sessions and need no slot.
+        self.grid_slots = None
+        if wait_for_grid and not SESSION_BROKER_URL:
+            self.grid_slots = GridSlots(self.run_name, GRID_BROWSER, max(BROWSER_POOL_SIZE, 1))
+
+    def task_env(self, task):
+        env = dict(os.environ)
+        # every behave process writes its own namespace, producers are read back
+        # once they finish and their records are copied to the namespaces of consumers
+        env["TMP_DATA_FILE"] = self.run_data.path
+        env["TMP_DATA_NAMESPACE"] = task_namespace(task)
+        # the first process logging in shares its auth state with the others
+        env["AUTH_STATE_FILE"] = os.path.join(self.tmp_dir, "auth_state.json")
+        # the environment was checked once for the whole run
+        env["PREFLIGHT"] = "false"
+        # the grid slots held by the run are found by the name of their sessions
+        env["GRID_SESSION_NAME"] = f"{self.run_name}/{task_namespace(task)}"
+        for key, producer in task.job.consumes.items():
+            self.run_data.set(key, self.outputs[producer][key], namespace=task_namespace(task))
+        return env
+
+    def run_task(self, task):
+        cmd = [
+            sys.executable, "-m", "behave", task.location,
+            "--junit", f"--junit-directory={task.workdir}", "--no-summary",
+        ]
+        cmd.extend(f"--tags=~@{tag}" for tag in task.job.exclude_tags)
+        cmd.extend(self.behave_args)
+
+        if self.grid_slots is not None:
+            try:
+                self.grid_slots.acquire()
+            except requests.RequestException as e:
+                with self.print_lock:
+                    print(f"===== {os.path.relpath(task.location)} not started, no grid status: {e}", flush=True)
+                return False
+            except NoGridSlot as e:
+                with self.print_lock:
+                    print(f"===== {os.path.relpath(task.location)} not started, {e}", flush=True)
+                return False
+        try:
+            result = subprocess.run(
+                cmd, env=self.task_env(task), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        finally:
+            if self.grid_slots is not None:
+                self.grid_slots.release()
+        with self.print_lock:
+            print(f"===== {os.path.relpath(task.location)} (exit {result.returncode})")
+            print(result.stdout, flush=True)
+        return result.returncode == 0
+
+    def new_tasks(self, job):
+        tasks = []
+        for index, location in enumerate(job_locations(job)):
+            workdir = os.path.join(self.tmp_dir, f"{job.name}-{index}")
+            os.makedirs(workdir)
+            tasks.append(Task(job, location, workdir))
+        return tasks
+
+    def read_outputs(self, job):
+        return self.run_data.items(namespace=f"{job.name}-0")
+
+    def finish_job(self, job):
+        if job.name in self.failed:
+            self.status[job.name] = FAILED
+            return
+
+        outputs = self.read_outputs(job)
+        produced = {key for other in self.jobs.values() for key, producer in other.consumes.items()
+                    if producer == job.name}
+        missing = sorted(produced - set(outputs))
+        if missing:
+            print(f"{job.name}.feature passed but did not produce {', '.join(missing)}", flush=True)
+            self.status[job.name] = FAILED
+            return
+
+        self.status[job.name] = PASSED
+        self.outputs[job.name] = outputs
+
+    def ready_jobs(self):
+        """
+        Return jobs whose dependencies are resolved, skipping the ones
+        with a failed or skipped dependency
+        """
+        ready = []
+        changed = True
+        while changed:
+            changed = False
+            for job in self.jobs.values():
+                if job.name in self.status or job.name in self.remaining or job in ready:
+                    continue
+                dependencies = job_dependencies(job)
+                if not all(dep in self.status for dep in dependencies):
+                    continue
+                if all(self.status[dep] == PASSED for dep in dependencies):
+                    ready.append(job)
+                    continue
+                broken = sorted(dep for dep in dependencies if self.status[dep] != PASSED)
+                print(f"{job.name}.feature skipped, depends on {', '.join(broken)}", flush=True)
+                self.status[job.name] = SKIPPED
+                # a skipped job may in turn skip its own dependents
+                changed = True
+        return ready
+
+    def run(self):
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                ready = self.ready_jobs()
+                while ready:
+                    for job in ready:
+                        tasks = self.new_tasks(job)
+                        if not tasks:
+                            self.finish_job(job)
+                            continue
+                        self.remaining[job.name] = len(tasks)
+                        for task in tasks:
+                            futures[executor.submit(self.run_task, task)] = task
+                    ready = self.ready_jobs()
+
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = futures.pop(future)
+                    if not future.result():
+                        self.failed.add(task.job.name)
+                    self.remaining[task.job.name] -= 1
+                    if self.remaining[task.job.name] == 0:
+                        del self.remaining[task.job.name]
+                        self.finish_job(task.job)
+
+        merge_junit_reports(self.tmp_dir, self.junit_directory, self.skipped_suites())
+        merge_step_metrics(self.tmp_dir, self.junit_directory, STEP_METRICS_TOP)
+        merge_command_profiles(self.tmp_dir, self.junit_directory, STEP_METRICS_TOP)
+        self.run_data.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        return all(status != FAILED for status in self.status.values())
+
+    def skipped_suites(self):
+        suites = []
+        for name, status in self.status.items():
+            if status != SKIPPED:
+                continue
+            job = self.jobs[name]
+            suite = ET.Element("testsuite", name=f"{name}.{parse_file(feature_path(job)).name}")
+            for scenario in job_scenarios(job):
+                case = ET.SubElement(suite, "testcase", classname=suite.get("name"), name=scenario.name, time="0")
+                ET.SubElement(case, "skipped", message="Required feature did not pass")
+            suites.append(suite)
+        return suites
+
+
+def merge_junit_reports(source_dir, junit_directory, extra_suites=()):
+    """
+    Merge the per-process behave JUnit reports into one file per feature.
+    A process running a single scenario reports the others as skipped, so a
+    testcase which actually ran wins over its skipped duplicates.
+    """
+    merged = {}
+    suites = []
+    for root, _, files in os.walk(source_dir):
+        suites.extend(
+            ET.parse(os.path.join(root, filename)).getroot() for filename in sorted(files)
+            if filename.startswith("TESTS-") and filename.endswith(".xml"))
+    suites.extend(extra_suites)
+
+    for suite in suites:
+        cases = merged.setdefault(suite.get("name"), {})
+        for case in suite.findall("testcase"):
+            key = (case.get("classname"), case.get("name"))
+            if key not in cases or cases[key].find("skipped") is not None:
+                cases[key] = case
+
+    os.makedirs(junit_directory, exist_ok=True)
+    for name, cases in merged.items():
+        cases = list(cases.values())
+        suite = ET.Element("testsuite", name=name)
+        suite.extend(cases)
+        suite.set("tests", str(len(cases)))
+        suite.set("errors", str(sum(1 for case in cases if case.find("error") is not None)))
+        suite.set("failures", str(sum(1 for case in cases if case.find("failure") is not None)))
+        suite.set("skipped", str(sum(1 for case in cases if case.find("skipped") is not None)))
+        suite.set("time", str(round(sum(float(case.get("time", 0)) for case in cases), 6)))
+        ET.ElementTree(suite).write(
+            os.path.join(junit_directory, f"TESTS-{name.split('.')[0]}.xml"), encoding="utf-8", xml_declaration=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run OSIM e2e features in parallel")
+    parser.add_argument("--workers", type=int, default=1, help="maximum number of parallel behave processes")
+    parser.add_argument(
+        "--no-grid-wait", dest="wait_for_grid", action="store_false",
+        help="start the behave processes without waiting for free Selenium grid slots")
+    parser.add_argument("--junit-directory", default="reports", help="where merged JUnit reports are written")
+    return parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, behave_args = parse_args(argv)
+    if PREFLIGHT:
+        try:
+            preflight()
+        except PreflightFailed as e:
+            print(e)
+            return 1
+    runner = Runner(FEATURE_JOBS, args.workers, args.junit_directory, behave_args, args.wait_for_grid)
+    return 0 if runner.run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Data the steps of a run hand to each other, e.g. the flaws created through
+the UI which later features open. It is kept in a SQLite database, so the
+behave processes of a parallel run can share it without losing writes.
+
+Every behave process reads and writes its own namespace, TMP_DATA_NAMESPACE.
+The parallel runner gives every process its own one and copies in it the
+records produced by the features it depends on. A plain behave run uses the
+default namespace, shared by the behave calls of a run, e.g. the features run
+one after the other by run_automation_test.sh. It is emptied when a behave
+call starts with a RUN_ID other than the one of the previous call.
+
+The UUIDs of the flaws opened by CVE ID are kept by OSIDB URL, across runs.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from features.common_utils import is_flaw_uuid
+from features.constants import OSIDB_URL, RUN_ID, TMP_DATA_FILE_NAME, TMP_DATA_NAMESPACE
+
+
+DEFAULT_NAMESPACE = "default"
+# namespace of the ID of the run which filled the default namespace
+RUN_NAMESPACE = "run"
+# namespace of the OSIDB tokens, by OSIDB URL, emptied by every behave call outside of a run
+TOKEN_NAMESPACE = "osidb_tokens"
+# prefix of the namespaces of the flaw UUIDs by CVE ID, one by OSIDB URL
+FLAW_UUID_NAMESPACE = "flaw_uuids"
+
+# a flaw created by a feature, flaw_id is the CVE ID or the UUID shown in the flaw list
+CreatedFlaw = namedtuple("CreatedFlaw", ["flaw_id", "uuid", "embargoed"])
+
+# a flaw of the pool, owner is the namespace of the process leasing it
+PooledFlaw = namedtuple("PooledFlaw", ["flaw_id", "uuid", "embargoed", "owner"])
+
+RECORD_TYPES = {cls.__name__: cls for cls in (CreatedFlaw, PooledFlaw)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_data (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def encode(value):
+    if type(value).__name__ in RECORD_TYPES:
+        return type(value).__name__, json.dumps(value._asdict())
+    return "json", json.dumps(value)
+
+
+def decode(kind, value):
+    value = json.loads(value)
+    return RECORD_TYPES[kind](**value) if kind in RECORD_TYPES else value
+
+
+class RunDataStore:
+    """
+    Values and typed records by namespace and key. Writes are atomic and
+    compare_and_set() only replaces the value it was given.
+    """
+
+    def __init__(self, path=TMP_DATA_FILE_NAME, namespace=TMP_DATA_NAMESPACE):
+        self.path = path
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        # it holds the OSIDB tokens, only the user can read it
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        # transactions are started explicitly, waiting for the other processes up to the timeout
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            # take the write lock at once, a read then write can not interleave with another process
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def read(self, connection, key, namespace):
+        row = connection.execute(
+            "SELECT type, value FROM run_data WHERE namespace = ? AND key = ?",
+            (namespace or self.namespace, key)).fetchone()
+        return None if row is None else decode(*row)
+
+    def write(self, connection, key, value, namespace):
+        connection.execute(
+            "INSERT OR REPLACE INTO run_data (namespace, key, type, value) VALUES (?, ?, ?, ?)",
+            (namespace or self.namespace, key) + encode(value))
+
+    def get(self, key, default=None, namespace=None):
+        with self.lock:
+            value = self.read(self.connection, key, namespace)
+        return default if value is None else value
+
+    def set(self, key, value, namespace=None):
+        with self.transaction() as connection:
+            self.write(connection, key, value, namespace)
+
+    def compare_and_set(self, key, expected, value, namespace=None):
+        """
+        Replace the value of a key only if it is still the expected one,
+        None for a missing key. Return whether it was replaced.
+        """
+        with self.transaction() as connection:
+            if self.read(connection, key, namespace) != expected:
+                return False
+            self.write(connection, key, value, namespace)
+            return True
+
+    def delete(self, key, namespace=None):
+        with self.transaction() as connection:
+            connection.execute(
+                "DELETE FROM run_data WHERE namespace = ? AND key = ?", (namespace or self.namespace, key))
+
+    def items(self, namespace=None):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key, type, value FROM run_data WHERE namespace = ?",
+                (namespace or self.namespace,)).fetchall()
+        return {key: decode(kind, value) for key, kind, value in rows}
+
+    def clear(self, namespace=None):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM run_data WHERE namespace = ?", (namespace or self.namespace,))
+
+    def close(self):
+        self.connection.close()
+
+
+_store = None
+
+
+def run_data():
+    """
+    Return the store of this behave process
+    """
+    global _store
+    if _store is None:
+        _store = RunDataStore()
+    return _store
+
+
+def start_run(run_id=RUN_ID):
+    """
+    Empty the default namespace and the OSIDB tokens when a new run
+    starts. Without a run ID the data of the previous behave calls is
+    kept, but not their tokens. The namespaces of a parallel run are
+    prepared by the runner.
+    """
+    if TMP_DATA_NAMESPACE != DEFAULT_NAMESPACE:
+        return
+    store = run_data()
+    with store.transaction() as connection:
+        if run_id and store.read(connection, "run_id", RUN_NAMESPACE) == run_id:
+            return
+        cleared = (DEFAULT_NAMESPACE, TOKEN_NAMESPACE) if run_id else (TOKEN_NAMESPACE,)
+        connection.executemany("DELETE FROM run_data WHERE namespace = ?", [(namespace,) for namespace in cleared])
+        if run_id:
+            store.write(connection, "run_id", run_id, RUN_NAMESPACE)
+
+
+def save_created_flaw(key, flaw):
+    run_data().set(key, flaw)
+
+
+# flaws leased by this process, by run data key, see FlawPool
+_leased = {}
+
+
+def lease_flaw(key, flaw):
+    _leased[key] = flaw
+
+
+def end_lease(key):
+    _leased.pop(key, None)
+
+
+def get_created_flaw(key):
+    """
+    Return the flaw leased to the scenario under a key, else the one
+    given by the environment variable of the key, else the one saved
+    under the key in this run
+    """
+    if key in _leased:
+        return _leased[key]
+
+    flaw_id = os.getenv(key)
+    if flaw_id is not None:
+        return CreatedFlaw(flaw_id, flaw_id if is_flaw_uuid(flaw_id) else None, None)
+
+    flaw = run_data().get(key)
+    if flaw is None:
+        raise KeyError(f"No flaw was saved as {key} in this run and {key} is not set")
+    return flaw
+
+
+def flaw_uuid_namespace(osidb_url=OSIDB_URL):
+    return f"{FLAW_UUID_NAMESPACE}:{osidb_url}"
+
+
+def get_cached_flaw_uuid(flaw_id):
+    return run_data().get(flaw_id, namespace=flaw_uuid_namespace())
+
+
+def cache_flaw_uuid(flaw_id, flaw_uuid):
+    run_data().set(flaw_id, flaw_uuid, namespace=flaw_uuid_namespace())
@@ -0,0 +1,350 @@
+"""
+A local process keeping logged-in and configured Firefox sessions on the grid
+between behave runs. A behave process checks a session out, attaches to it by
+its session ID and checks it back in instead of quitting it, so back-to-back
+runs skip the session start, the UI login and the API keys.
+
+A checked in session is brought back to the flaw list, and logged in and
+configured again if the scenario logged it out. Idle sessions are touched
+before the grid drops them, and a session not checked in after the lease
+timeout (a behave process killed) is taken back.
+
+Start it from the osim root directory, with the same environment as the
+features, and point the runs at it:
+
+    python -m features.session_broker --size 2 --port 4480
+    SESSION_BROKER_URL=http://localhost:4480 behave features/flaw_list.feature
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options
+
+from features.command_trace import trace_commands
+from features.constants import OSIM_URL, SELENIUM_URL
+from features.pages.base import track_requests
+from features.session_pool import close_extra_windows, log_out_session, quit_session
+
+
+# seconds between two touches of the idle sessions, the grid drops a session idle for 300s by default
+KEEPALIVE_INTERVAL = 60
+# seconds after which a session checked out and never checked in is taken back
+LEASE_TIMEOUT = 3600
+# seconds a behave process waits for a session
+CHECKOUT_TIMEOUT = 300
+
+
+class AttachedRemote(webdriver.Remote):
+    """
+    A driver of a session started by another process, attaching to the
+    session instead of creating one
+    """
+
+    def __init__(self, command_executor, session_id, capabilities=None):
+        self.attached_session_id = session_id
+        self.attached_capabilities = capabilities or {}
+        super().__init__(command_executor=command_executor, options=Options())
+
+    def start_session(self, capabilities):
+        self.session_id = self.attached_session_id
+        self.caps = self.attached_capabilities
+
+
+def detach(driver):
+    """
+    Close the connections of an attached driver, its session stays on the grid
+    """
+    driver.command_executor.close()
+
+
+class SessionBroker:
+    """
+    Hand out up to size prepared sessions. prepare() logs a browser in and
+    configures it, new() creates and prepares one.
+    """
+
+    def __init__(self, new, prepare, is_ready, size=2):
+        self.new = new
+        self.prepare = prepare
+        self.is_ready = is_ready
+        self.size = size
+        self.idle = {}
+        # session ID -> (driver, checkout time)
+        self.busy = {}
+        self.pending = 0
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+    def fill(self):
+        with self.condition:
+            missing = self.size - len(self.idle) - len(self.busy) - self.pending
+            self.pending += missing
+        for _ in range(missing):
+            self.executor.submit(self.add)
+
+    def add(self, driver=None, logged_out=False):
+        """
+        Prepare a session, a new one unless given, and make it available
+        """
+        try:
+            if driver is None:
+                driver = self.new()
+            elif not self.tidy(driver, logged_out):
+                quit_session(driver)
+                driver = self.new()
+        except Exception as e:
+            print(f"Can not prepare a session: {e}", file=sys.stderr, flush=True)
+            driver = None
+        with self.condition:
+            self.pending -= 1
+            if driver is not None:
+                self.idle[driver.session_id] = driver
+            # a session which could not be prepared is retried by the keepalive
+            self.condition.notify_all()
+
+    def tidy(self, driver, logged_out=False):
+        """
+        Bring a session back to the flaw list, logging it in and configuring
+        it again if it was logged out. Return False when it can not be used
+        anymore.
+        """
+        try:
+            close_extra_windows(driver)
+            driver.get(OSIM_URL)
+            if logged_out or not self.is_ready(driver):
+                self.prepare(driver)
+        except WebDriverException:
+            return False
+        return True
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """
+        Return an idle session, None when none is available in time
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while not self.idle:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+            session_id, driver = self.idle.popitem()
+            self.busy[session_id] = (driver, time.monotonic())
+            return driver
+
+    def checkin(self, session_id, logged_out=False):
+        """
+        Take a session back, return False for an unknown session
+        """
+        with self.condition:
+            if session_id not in self.busy:
+                return False
+            driver, _ = self.busy.pop(session_id)
+            self.pending += 1
+        self.executor.submit(self.add, driver, logged_out)
+        return True
+
+    def keep_alive(self):
+        with self.condition:
+            idle = list(self.idle.items())
+            expired = [session_id for session_id, (_, since) in self.busy.items()
+                       if time.monotonic() - since > LEASE_TIMEOUT]
+        for session_id, driver in idle:
+            try:
+                driver.current_url
+            except WebDriverException:
+                with self.condition:
+                    removed = self.idle.pop(session_id, None)
+                # a session checked out since the snapshot is its client's
+                if removed is not None:
+                    quit_session(driver)
+        for session_id in expired:
+            self.checkin(session_id)
+        self.fill()
+
+    def run_keepalive(self, stop, interval=KEEPALIVE_INTERVAL):
+        while not stop.wait(interval):
+            self.keep_alive()
+
+    def status(self):
+        with self.condition:
+            return {"size": self.size, "idle": len(self.idle), "busy": len(self.busy), "starting": self.pending}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.condition:
+            drivers = list(self.idle.values()) + [driver for driver, _ in self.busy.values()]
+            self.idle, self.busy = {}, {}
+        for driver in drivers:
+            quit_session(driver)
+
+
+class Handler(BaseHTTPRequestHandler):
+    broker = None
+
+    def respond(self, status, payload):
+        content = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        if content:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path.rstrip("/") != "/status":
+            return self.respond(404, {"detail": "Not found."})
+        self.respond(200, self.broker.status())
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts == ["sessions", "checkout"]:
+            query = urllib.parse.parse_qs(url.query)
+            driver = self.broker.checkout(float(query.get("timeout", [CHECKOUT_TIMEOUT])[0]))
+            if driver is None:
+                return self.respond(503, {"detail": "No session available."})
+            return self.respond(200, {
+                "session_id": driver.session_id, "executor": self.server.executor, "capabilities": driver.caps})
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "checkin":
+            logged_out = urllib.parse.parse_qs(url.query).get("logged_out") == ["true"]
+            if not self.broker.checkin(parts[1], logged_out):
+                return self.respond(404, {"detail": "Not found."})
+            return self.respond(204, None)
+        self.respond(404, {"detail": "Not found."})
+
+
+def serve(broker, port, host="127.0.0.1", executor=SELENIUM_URL, quiet=False):
+    handler = type("BrokerHandler", (Handler,), {"broker": broker})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.executor = executor
+    server.quiet = quiet
+    return server
+
+
+class BrokerSessionPool:
+    """
+    The session pool of a behave process using a session broker: sessions
+    are checked out and attached to, released sessions are checked in
+    """
+
+    def __init__(self, broker_url, command_profile=None, timeout=CHECKOUT_TIMEOUT):
+        self.broker_url = broker_url
+        self.command_profile = command_profile
+        self.timeout = timeout
+        self.checked_out = set()
+        # sessions logged out by a scenario, the broker configures them again
+        self.logged_out = set()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        response = requests.post(
+            urllib.parse.urljoin(self.broker_url, "sessions/checkout"),
+            params={"timeout": self.timeout}, timeout=self.timeout + 10)
+        response.raise_for_status()
+        session = response.json()
+        driver = track_requests(AttachedRemote(session["executor"], session["session_id"], session["capabilities"]))
+        if self.command_profile is not None:
+            trace_commands(driver, self.command_profile)
+        with self.lock:
+            self.checked_out.add(driver.session_id)
+        return driver
+
+    def is_logged_in(self, driver):
+        # the sessions handed out are logged in and configured
+        return True
+
+    def mark_logged_in(self, driver):
+        pass
+
+    def log_out(self, driver):
+        """
+        Log a session out, for the scenarios testing the login itself
+        """
+        log_out_session(driver)
+        with self.lock:
+            self.logged_out.add(driver.session_id)
+
+    def checkin(self, session_id):
+        with self.lock:
+            self.checked_out.discard(session_id)
+            logged_out = session_id in self.logged_out
+            self.logged_out.discard(session_id)
+        requests.post(
+            urllib.parse.urljoin(self.broker_url, f"sessions/{session_id}/checkin"),
+            params={"logged_out": "true"} if logged_out else None, timeout=10)
+
+    def release(self, driver):
+        detach(driver)
+        self.checkin(driver.session_id)
+
+    def close(self):
+        with self.lock:
+            checked_out = list(self.checked_out)
+        for session_id in checked_out:
+            self.checkin(session_id)
+
+
+def new_broker(size):
+    from features.auth_state import is_logged_in
+    from features.utils import init_remote_firefox_browser, login_with_valid_account, set_api_keys
+
+    def prepare(browser):
+        login_with_valid_account(browser)
+        set_api_keys(browser)
+
+    def new():
+        browser = init_remote_firefox_browser()
+        try:
+            prepare(browser)
+        except Exception:
+            quit_session(browser)
+            raise
+        return browser
+
+    return SessionBroker(new, prepare, is_logged_in, size)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep logged-in OSIM sessions on the grid between behave runs")
+    parser.add_argument("--size", type=int, default=2, help="number of sessions kept")
+    parser.add_argument("--port", type=int, default=4480)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--quiet", action="store_true", help="do not log the requests")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    broker = new_broker(args.size)
+    broker.fill()
+    stop = threading.Event()
+    threading.Thread(target=broker.run_keepalive, args=(stop,), daemon=True).start()
+    server = serve(broker, args.port, args.host, quiet=args.quiet)
+    print(f"Session broker listening on http://{args.host}:{args.port}, starting {args.size} sessions", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        broker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import threading
+import urllib.parse
+
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+
+from features.constants import OSIM_URL
+
+
+CLEAR_STORAGE_SCRIPT = "window.localStorage.clear(); window.sessionStorage.clear();"
+
+# the router of OSIM follows the history, this routes without loading the app
+ROUTE_SCRIPT = """
+window.history.pushState({}, '', arguments[0]);
+window.dispatchEvent(new PopStateEvent('popstate', {state: {}}));
+"""
+
+
+def is_osim_page(url):
+    osim = urllib.parse.urlsplit(OSIM_URL)
+    current = urllib.parse.urlsplit(url)
+    return (current.scheme, current.netloc) == (osim.scheme, osim.netloc)
+
+
+def close_extra_windows(driver):
+    """
+    Dismiss an open alert and close every tab but the first one
+    """
+    try:
+        driver.switch_to.alert.dismiss()
+    except NoAlertPresentException:
+        pass
+
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+
+def reset_session(driver):
+    """
+    Bring a browser back to a single tab on the OSIM home route, keeping
+    its login
+    """
+    close_extra_windows(driver)
+
+    if is_osim_page(driver.current_url):
+        driver.execute_script(ROUTE_SCRIPT, urllib.parse.urlsplit(OSIM_URL).path or "/")
+    else:
+        driver.get(OSIM_URL)
+
+
+def log_out_session(driver):
+    """
+    Bring a browser back to the state of a new one: a single tab,
+    no OSIM cookies or storage and no route
+    """
+    close_extra_windows(driver)
+
+    # cookies and storage can only be cleared from the OSIM origin
+    if not is_osim_page(driver.current_url):
+        driver.get(OSIM_URL)
+    driver.delete_all_cookies()
+    driver.execute_script(CLEAR_STORAGE_SCRIPT)
+    driver.get("about:blank")
+
+
+def quit_session(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+class SessionPool:
+    """
+    Keep browser sessions alive between scenarios. A released session is
+    reset and handed out again, a session that fails to reset is quit and
+    replaced by a new one. With size 0 every session is quit on release.
+
+    A session marked logged in keeps its login, the others are logged out
+    on release and have to log in again.
+    """
+
+    def __init__(self, factory, size=1):
+        self.factory = factory
+        self.size = size
+        self.idle = []
+        self.logged_in = set()
+        self.lock = threading.Lock()
+
+    def is_logged_in(self, driver):
+        with self.lock:
+            return driver.session_id in self.logged_in
+
+    def mark_logged_in(self, driver):
+        with self.lock:
+            self.logged_in.add(driver.session_id)
+
+    def log_out(self, driver):
+        """
+        Log a session out, for the scenarios testing the login itself
+        """
+        with self.lock:
+            self.logged_in.discard(driver.session_id)
+        log_out_session(driver)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                driver = self.idle.pop()
+            try:
+                # the grid may have dropped an idle session
+                driver.current_url
+            except WebDriverException:
+                self.forget(driver)
+                quit_session(driver)
+            else:
+                return driver
+
+        return self.factory()
+
+    def release(self, driver):
+        if self.size > 0:
+            try:
+                if self.is_logged_in(driver):
+                    reset_session(driver)
+                else:
+                    log_out_session(driver)
+            except WebDriverException:
+                self.forget(driver)
+                quit_session(driver)
+                driver = self.replacement()
+
+        with self.lock:
+            if driver is not None and len(self.idle) < self.size:
+                self.idle.append(driver)
+                return
+
+        if driver is not None:
+            self.forget(driver)
+            quit_session(driver)
+
+    def forget(self, driver):
+        with self.lock:
+            self.logged_in.discard(driver.session_id)
+
+    def replacement(self):
+        try:
+            return self.factory()
+        except WebDriverException:
+            # a new session is created on the next acquire instead
+            return None
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+            self.logged_in.clear()
+        for driver in idle:
+            quit_session(driver)
@@ -0,0 +1,242 @@
+"""
+Where the time of a run goes, recorded when STEP_METRICS is set. For every
+step and scenario the wall time is recorded with the number of WebDriver
+commands and the time spent in them, in explicit waits, in time.sleep outside
+of waits and in page navigations.
+The calls of page object methods are timed across the run.
+
+The metrics are written to step_metrics.json in the JUnit directory and the
+scenario metrics are added to the JUnit testcases as properties.
+"""
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.wait import WebDriverWait
+
+from features.pages.base import BasePage
+
+
+METRICS_FILE_NAME = "step_metrics.json"
+
+NAVIGATION_COMMANDS = {Command.GET, Command.GO_BACK, Command.GO_FORWARD, Command.REFRESH}
+
+COUNTERS = ("commands", "command_time", "wait_time", "sleep_time", "navigation_time")
+
+
+def new_record(**fields):
+    record = dict.fromkeys(COUNTERS, 0)
+    record.update(fields, wall_time=0, start=time.monotonic())
+    return record
+
+
+def close_record(record, status):
+    record["wall_time"] = time.monotonic() - record.pop("start")
+    record["status"] = status.name
+    for name in ("wall_time",) + COUNTERS[1:]:
+        record[name] = round(record[name], 3)
+    return record
+
+
+def page_classes(cls=BasePage):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from page_classes(subclass)
+
+
+class StepMetrics:
+    """
+    Collect the metrics of a behave process. install() wraps WebDriver,
+    the waits, time.sleep and the page object methods, the behave hooks
+    tell which scenario and step is running.
+    """
+
+    def __init__(self):
+        self.scenarios = []
+        self.methods = {}
+        self.scenario = None
+        self.step = None
+        # waits poll with sleeps and nest in page object helpers, count the outer one only
+        self.wait_depth = 0
+
+    def add(self, counter, value):
+        for record in (self.scenario, self.step):
+            if record is not None:
+                record[counter] += value
+
+    def install(self):
+        metrics = self
+
+        def timed_command(execute):
+            @functools.wraps(execute)
+            def wrapper(driver, driver_command, params=None):
+                start = time.monotonic()
+                try:
+                    return execute(driver, driver_command, params)
+                finally:
+                    elapsed = time.monotonic() - start
+                    metrics.add("commands", 1)
+                    metrics.add("command_time", elapsed)
+                    if driver_command in NAVIGATION_COMMANDS:
+                        metrics.add("navigation_time", elapsed)
+            return wrapper
+
+        def timed_wait(wait):
+            @functools.wraps(wait)
+            def wrapper(*args, **kwargs):
+                metrics.wait_depth += 1
+                start = time.monotonic()
+                try:
+                    return wait(*args, **kwargs)
+                finally:
+                    metrics.wait_depth -= 1
+                    if metrics.wait_depth == 0:
+                        metrics.add("wait_time", time.monotonic() - start)
+            return wrapper
+
+        def timed_sleep(sleep):
+            @functools.wraps(sleep)
+            def wrapper(seconds):
+                start = time.monotonic()
+                try:
+                    return sleep(seconds)
+                finally:
+                    if metrics.wait_depth == 0:
+                        metrics.add("sleep_time", time.monotonic() - start)
+            return wrapper
+
+        WebDriver.execute = timed_command(WebDriver.execute)
+        WebDriverWait.until = timed_wait(WebDriverWait.until)
+        WebDriverWait.until_not = timed_wait(WebDriverWait.until_not)
+        BasePage.wait_in_browser = timed_wait(BasePage.wait_in_browser)
+        time.sleep = timed_sleep(time.sleep)
+        for cls in page_classes():
+            for name, method in list(vars(cls).items()):
+                if inspect.isfunction(method) and not name.startswith("__"):
+                    setattr(cls, name, self.timed_method(f"{cls.__name__}.{name}", method))
+
+    def timed_method(self, name, method):
+        stats = self.methods.setdefault(name, {"calls": 0, "time": 0})
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats["calls"] += 1
+                stats["time"] += time.monotonic() - start
+        return wrapper
+
+    def start_scenario(self, scenario):
+        self.scenario = new_record(
+            feature=scenario.feature.name, name=scenario.name, location=str(scenario.location), steps=[])
+
+    def end_scenario(self, scenario):
+        if self.scenario is not None:
+            self.scenarios.append(close_record(self.scenario, scenario.status))
+        self.scenario = None
+
+    def start_step(self, step):
+        self.step = new_record(name=f"{step.keyword} {step.name}", location=str(step.location))
+
+    def end_step(self, step):
+        if self.step is not None and self.scenario is not None:
+            self.scenario["steps"].append(close_record(self.step, step.status))
+        self.step = None
+
+    def data(self):
+        methods = {
+            name: {"calls": stats["calls"], "time": round(stats["time"], 3)}
+            for name, stats in self.methods.items() if stats["calls"]
+        }
+        return {"scenarios": self.scenarios, "methods": methods}
+
+    def write(self, config, top):
+        """
+        Write the metrics, add them to the JUnit reports of the run
+        and print the slowest steps and page object methods
+        """
+        data = self.data()
+        directory = config.junit_directory
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, METRICS_FILE_NAME), "w") as f:
+            json.dump(data, f, indent=2)
+        if config.junit:
+            add_junit_properties(directory, data["scenarios"])
+        # behave captures the output of the hooks
+        print(slowest_report(data, top), file=sys.__stdout__)
+
+
+def add_junit_properties(junit_directory, scenarios):
+    """
+    Add the metrics of the scenarios to their testcases in the behave
+    JUnit reports
+    """
+    by_name = {(scenario["feature"], scenario["name"]): scenario for scenario in scenarios}
+    for filename in os.listdir(junit_directory):
+        if not (filename.startswith("TESTS-") and filename.endswith(".xml")):
+            continue
+        path = os.path.join(junit_directory, filename)
+        tree = ET.parse(path)
+        changed = False
+        for case in tree.getroot().findall("testcase"):
+            feature_name = case.get("classname", "").split(".", 1)[-1]
+            scenario = by_name.get((feature_name, case.get("name")))
+            if scenario is None or case.find("properties") is not None:
+                continue
+            properties = ET.Element("properties")
+            for name in ("wall_time",) + COUNTERS:
+                ET.SubElement(properties, "property", name=name, value=str(scenario[name]))
+            case.insert(0, properties)
+            changed = True
+        if changed:
+            tree.write(path, encoding="utf-8", xml_declaration=True)
+
+
+def merge_step_metrics(source_dir, junit_directory, top):
+    """
+    Merge the metrics of the behave processes of a parallel run
+    """
+    merged = {"scenarios": [], "methods": {}}
+    found = False
+    for root, _, files in os.walk(source_dir):
+        if METRICS_FILE_NAME not in files:
+            continue
+        found = True
+        with open(os.path.join(root, METRICS_FILE_NAME), "r") as f:
+            data = json.load(f)
+        merged["scenarios"].extend(data["scenarios"])
+        for name, stats in data["methods"].items():
+            total = merged["methods"].setdefault(name, {"calls": 0, "time": 0})
+            total["calls"] += stats["calls"]
+            total["time"] = round(total["time"] + stats["time"], 3)
+    if not found:
+        return
+
+    os.makedirs(junit_directory, exist_ok=True)
+    with open(os.path.join(junit_directory, METRICS_FILE_NAME), "w") as f:
+        json.dump(merged, f, indent=2)
+    print(slowest_report(merged, top))
+
+
+def slowest_report(data, top):
+    steps = sorted(
+        (step for scenario in data["scenarios"] for step in scenario["steps"]),
+        key=lambda step: step["wall_time"], reverse=True)[:top]
+    methods = sorted(data["methods"].items(), key=lambda item: item[1]["time"], reverse=True)[:top]
+
+    lines = [f"Slowest {len(steps)} steps (wall s, commands, wait s, sleep s, navigation s):"]
+    lines.extend(
+        f"  {step['wall_time']:8.3f} {step['commands']:5d} {step['wait_time']:8.3f} "
+        f"{step['sleep_time']:8.3f} {step['navigation_time']:8.3f}  {step['name']} ({step['location']})"
+        for step in steps)
+    lines.append(f"Slowest {len(methods)} page object methods (total s, calls):")
+    lines.extend(f"  {stats['time']:8.3f} {stats['calls']:5d}  {name}" for name, stats in methods)
+    return "\n".join(lines)
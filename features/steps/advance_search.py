@@ -1,11 +1,10 @@
-import time
 from pprint import pprint
 
 from behave import *
 
 from features.pages.advanced_search_page import AdvancedSearchPage
 from features.pages.flaw_detail_page import FlawDetailPage
-from features.common_utils import get_data_from_tmp_data_file
+from features.run_data import get_created_flaw
 from features.steps.common_steps import go_to_specific_flaw_detail_page
 from features.constants import EMBARGOED_FLAW_UUID_KEY
 from features.utils import go_to_advanced_search_page, is_sorted
@@ -32,26 +31,6 @@ def step_impl(context):
     advanced_search_page.first_flaw_exist()
 
 
-@given("I add lacking data to the flaw which for later search")
-def step_impl(context):
-    go_to_specific_flaw_detail_page(context.browser)
-
-    # add cvssV3 field
-    flaw_detail_page = FlawDetailPage(context.browser)
-    if not flaw_detail_page.get_cvssV3_score():
-        flaw_detail_page.set_cvssV3_field()
-        flaw_detail_page.click_btn('saveBtn')
-        flaw_detail_page.wait_msg('flawSavedMsg')
-        flaw_detail_page.wait_msg("cvssV3SavedMsg")
-
-    # add an acknowledgement
-    v = flaw_detail_page.acknowledgmentCountLabel.get_text()
-    reference_count = int(v.split(": ")[1])
-    if reference_count == 0:
-        flaw_detail_page.click_acknowledgments_dropdown_btn()
-        context.execute_steps('When I add an acknowledgment to the flaw')
-
-
 @when('I prepare the advance search keywords')
 def step_impl(context):
     # get all needed value for search
@@ -64,7 +43,8 @@ def step_impl(context):
     # use all search value to search the flaw, check the result
     advanced_search_page = AdvancedSearchPage(context.browser)
     # search flaw using prefetched value
-    context.fields_keywords["uuid"] = get_data_from_tmp_data_file(EMBARGOED_FLAW_UUID_KEY)
+    embargoed_flaw = get_created_flaw(EMBARGOED_FLAW_UUID_KEY)
+    context.fields_keywords["uuid"] = embargoed_flaw.uuid or embargoed_flaw.flaw_id
     for field in context.fields_keywords:
         value = context.fields_keywords[field]
         advanced_search_page.click_button_with_js("closeSelectRowBtn")
@@ -109,8 +89,8 @@ def step_impl(context):
         else:
             # cve_description, cvss_scores__score, mitigation, statement
             advanced_search_page.go_to_first_flaw_detail()
-            time.sleep(1)
             flaw_page = FlawDetailPage(context.browser)
+            flaw_page.wait_flaw_loaded()
             if field == 'cvss_scores__score':
                 value = flaw_page.get_cvssV3_score()
             else:
@@ -132,8 +112,8 @@ def step_impl(context):
             assert is_correct is True
         else:
             advanced_search_page.go_to_first_flaw_detail()
-            time.sleep(1)
             flaw_page = FlawDetailPage(context.browser)
+            flaw_page.wait_flaw_loaded()
             if field == 'cvss_scores__score':
                 value = flaw_page.get_cvssV3_score()
             else:
@@ -227,6 +207,7 @@ def step_impl(context):
     advanced_search_page.click_btn("createdBtn")
     advanced_search_page.click_btn('createdBtn')
     advanced_search_page.first_flaw_exist()
+    advanced_search_page.wait_page_settled()
 
     select_value_list = ["cvss_scores__score", "cwe_id", "major_incident_state", "source"]
     # select_value_list = ["cvss_scores__score", "major_incident_state", "source"]
@@ -235,7 +216,7 @@ def step_impl(context):
     # ascending
     for select_value in select_value_list:
         advanced_search_page.extendSortSelect.select_element_by_value(select_value)
-        time.sleep(3)
+        advanced_search_page.wait_page_settled()
         res = advanced_search_page.get_specified_field_search_result(select_value)
         result_dict[select_value] = {"asce": res}
 
@@ -243,7 +224,7 @@ def step_impl(context):
     # descending
     for select_value in select_value_list:
         advanced_search_page.extendSortSelect.select_element_by_value(select_value)
-        time.sleep(3)
+        advanced_search_page.wait_page_settled()
         res = advanced_search_page.get_specified_field_search_result(select_value)
         result_dict[select_value]["desc"] = res
 
@@ -2,6 +2,10 @@ import time
 
 from behave import given
 
+from features.auth_state import capture_auth_state, restore_auth_state
+from features.run_data import get_created_flaw
+from features.constants import FLAW_ID_KEY
+from features.flaw_fixtures import flaw_spec
 from features.utils import (
     login_with_valid_account,
     set_api_keys,
@@ -13,12 +17,33 @@ from features.utils import (
 
 @given('I am an analyst AND I am logged into OSIM')
 def step_impl(context):
-    context.browser = login_with_valid_account()
+    browser = context.session_pool.acquire()
+    # scenarios tagged ui_login test the login page itself
+    ui_login = "ui_login" in context.scenario.effective_tags
+    logged_in = context.session_pool.is_logged_in(browser)
+    if ui_login and logged_in:
+        context.session_pool.log_out(browser)
+    context.auth_injected = not ui_login and (
+        logged_in
+        or context.auth_state is not None and restore_auth_state(browser, context.auth_state)
+    )
+    if context.auth_injected:
+        context.session_pool.mark_logged_in(browser)
+    context.browser = browser if context.auth_injected else login_with_valid_account(browser)
 
 
 @given('I set the bugzilla api key and jira api key')
 def step_impl(context):
+    # an injected state is already configured
+    if context.auth_injected:
+        return
+
     set_api_keys(context.browser)
+    if context.auth_state is not None:
+        context.auth_state.save(capture_auth_state(context.browser))
+    # the next scenarios reuse the configured session
+    if "ui_login" not in context.scenario.effective_tags:
+        context.session_pool.mark_logged_in(context.browser)
 
 
 @given('I am on the flaw list')
@@ -39,3 +64,15 @@ def step_impl(context):
 @given('I go to the advanced search page')
 def step_impl(context):
     go_to_advanced_search_page(context.browser)
+
+
+@given('a {visibility} flaw is created through the OSIDB API')
+def step_impl(context, visibility):
+    spec = flaw_spec(context.table, embargoed=visibility == "embargoed")
+    context.flaw = context.flaw_factory.create(spec)
+
+
+@given('the flaw has at least')
+def step_impl(context):
+    flaw = get_created_flaw(FLAW_ID_KEY)
+    context.flaw = context.flaw_factory.ensure(flaw.uuid or flaw.flaw_id, flaw_spec(context.table))
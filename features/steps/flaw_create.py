@@ -1,20 +1,20 @@
-import os
 from datetime import datetime, timezone
 from behave import *
+from selenium.webdriver.support.wait import WebDriverWait
 
 from features.pages.advanced_search_page import AdvancedSearchPage
 from features.pages.flaw_detail_page import FlawDetailPage
 from features.utils import (
-    generate_cve,
     generate_cwe,
     generate_random_text,
+    get_flaw_uuid,
     go_to_advanced_search_page,
     go_to_specific_flaw_detail_page
 )
-from features.common_utils import write_data_to_tmp_data_file
+from features.common_utils import get_flaw_uuid_from_url
 from features.constants import FLAW_ID_KEY, EMBARGOED_FLAW_UUID_KEY
-
-MAX_RETRY = 5
+from features.cve_allocator import allocate_cve
+from features.run_data import CreatedFlaw, cache_flaw_uuid, get_created_flaw, run_data, save_created_flaw
 
 
 def create_flaw_with_valid_data(context, embargoed=False, with_optional=False):
@@ -32,30 +32,24 @@ def create_flaw_with_valid_data(context, embargoed=False, with_optional=False):
     flaw_create_page.set_document_text_field('comment#0', generate_random_text())
 
     if with_optional:
-        context.cve_id = generate_cve()
+        context.cve_id = allocate_cve()
         flaw_create_page.set_input_field('cveid', context.cve_id)
         flaw_create_page.set_input_field('cweid', generate_cwe())
         flaw_create_page.set_document_text_field('description', generate_random_text())
         flaw_create_page.set_document_text_field('statement', generate_random_text())
-        count = 0
-        while count < MAX_RETRY:
-            flaw_create_page.click_btn('createNewFlawBtn')
-            try:
-                flaw_create_page.wait_msg('flawCreatedMsg')
-            except Exception:
-                context.cve_id = generate_cve()
-                flaw_create_page.set_input_field('cveid', context.cve_id)
-                count += 1
-            else:
-                break
-    else:
-        flaw_create_page.click_btn('createNewFlawBtn')
-        flaw_create_page.wait_msg('flawCreatedMsg')
+    flaw_create_page.click_btn('createNewFlawBtn')
+    flaw_create_page.wait_msg('flawCreatedMsg')
 
+    # OSIM opens the created flaw by its UUID
+    context.flaw_uuid = WebDriverWait(context.browser, flaw_create_page.timeout).until(
+        lambda driver: get_flaw_uuid_from_url(driver.current_url))
     flaw_create_page.close_all_toast_msg()
 
 
 def check_created_flaw_exist(context, embargoed=False):
+    """
+    Search the created flaw and return its ID shown in the flaw list
+    """
     go_to_advanced_search_page(context.browser)
     advanced_search_page = AdvancedSearchPage(context.browser)
     if hasattr(context, 'cve_id'):
@@ -66,7 +60,9 @@ def check_created_flaw_exist(context, embargoed=False):
     advanced_search_page.first_flaw_exist()
     if embargoed:
         advanced_search_page.first_flaw_embargoed_flag_exist()
-    return advanced_search_page.get_first_flaw_id()
+    flaw_id = advanced_search_page.get_first_flaw_id()
+    cache_flaw_uuid(flaw_id, context.flaw_uuid)
+    return flaw_id
 
 
 @when('I open the flaw create page')
@@ -82,7 +78,7 @@ def step_impl(context):
 
 @then('A new flaw is created')
 def step_impl(context):
-    os.environ[FLAW_ID_KEY] = check_created_flaw_exist(context)
+    flaw_id = check_created_flaw_exist(context)
     # # check validation alert that flaw has no affect
     # advanced_search_page = AdvancedSearchPage(context.browser)
     # advanced_search_page.go_to_first_flaw_detail()
@@ -90,45 +86,40 @@ def step_impl(context):
     # flaw_page.click_btn("alertDropdownBtn")
     # flaw_page.click_btn("alertFlawDropdownBtn")
     # flaw_page.flawWithoutAffectErrorText.visibility_of_element_located()
-    write_data_to_tmp_data_file(FLAW_ID_KEY, os.environ[FLAW_ID_KEY])
+    save_created_flaw(FLAW_ID_KEY, CreatedFlaw(flaw_id, context.flaw_uuid, False))
 
 
 @when("I add a CVE ID to a flaw")
 def step_impl(context):
-    go_to_advanced_search_page(context.browser)
-    advanced_search_page = AdvancedSearchPage(context.browser)
-    flaw_id = os.environ[FLAW_ID_KEY]
-    if flaw_id.startswith('CVE-'):
-        advanced_search_page.select_field_and_value_to_search(
-            "cve_id", flaw_id)
-    else:
-        advanced_search_page.select_field_and_value_to_search(
-            "uuid", flaw_id)
-    advanced_search_page.click_btn("searchBtn")
-    advanced_search_page.first_flaw_exist()
-    advanced_search_page.go_to_first_flaw_detail()
+    context.created_flaw = get_created_flaw(FLAW_ID_KEY)
+    # FLAW_ID of the run data, which an exported FLAW_ID takes precedence over
+    context.saved_flaw = run_data().get(FLAW_ID_KEY)
+    context.flaw_uuid = context.created_flaw.uuid or get_flaw_uuid(context.created_flaw.flaw_id)
+    go_to_specific_flaw_detail_page(context.browser, context.flaw_uuid)
 
     flaw_detail_page = FlawDetailPage(context.browser)
-    context.cve_id = generate_cve()
+    context.cve_id = allocate_cve()
     flaw_detail_page.set_input_field('cveid', context.cve_id)
-    count = 0
-    while count < MAX_RETRY:
-        flaw_detail_page.click_btn('saveBtn')
-        try:
-            flaw_detail_page.wait_msg('flawSavedMsg')
-        except Exception:
-            context.cve_id = generate_cve()
-            flaw_detail_page.set_input_field('cveid', context.cve_id)
-            count += 1
-        else:
-            os.environ[FLAW_ID_KEY] = context.cve_id
-            break
+    flaw_detail_page.click_btn('saveBtn')
+    flaw_detail_page.wait_msg('flawSavedMsg')
 
 
 @then("The flaw CVE ID is saved")
 def step_impl(context):
-    go_to_specific_flaw_detail_page(context.browser)
-    write_data_to_tmp_data_file(FLAW_ID_KEY, os.environ[FLAW_ID_KEY])
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(context.flaw_uuid, 'cve_id', context.cve_id)
+        context.flaw_checks.verify()
+        cache_flaw_uuid(context.cve_id, context.flaw_uuid)
+    else:
+        # the flaw is found by its new CVE ID
+        flaw_id = check_created_flaw_exist(context)
+        assert flaw_id == context.cve_id, f"The flaw should be listed as {context.cve_id}, got {flaw_id}"
+
+    flaw = context.created_flaw
+    # the flaw is only replaced if no other step changed it meanwhile
+    saved = run_data().compare_and_set(
+        FLAW_ID_KEY, context.saved_flaw, CreatedFlaw(context.cve_id, context.flaw_uuid, flaw.embargoed))
+    assert saved, f"{FLAW_ID_KEY} changed while the CVE ID of {flaw.flaw_id} was saved"
 
 
 @when('I create new embargoed flaw with valid data')
@@ -138,8 +129,9 @@ def step_impl(context):
 
 @then('The flaw is created and marked as an embargoed flaw')
 def step_impl(context):
-    os.environ[FLAW_ID_KEY] = check_created_flaw_exist(context, embargoed=True)
-    write_data_to_tmp_data_file(EMBARGOED_FLAW_UUID_KEY, os.environ[FLAW_ID_KEY])
+    flaw = CreatedFlaw(check_created_flaw_exist(context, embargoed=True), context.flaw_uuid, True)
+    save_created_flaw(FLAW_ID_KEY, flaw)
+    save_created_flaw(EMBARGOED_FLAW_UUID_KEY, flaw)
 
 
 @when('I create flaw with valid data including optional fields')
@@ -1,29 +1,28 @@
-import time
 from datetime import date, datetime
 
 from behave import when, then
 from selenium.common import NoSuchElementException
 from selenium.webdriver.common.by import By
 
-from features.common_utils import get_data_from_tmp_data_file
-from features.steps.flaw_create import create_flaw_with_valid_data
+from features.cve_allocator import allocate_cve
+from features.flaw_checks import acknowledgment_label, osidb_datetime
+from features.run_data import get_created_flaw
 from features.utils import (
     is_sorted,
-    generate_cve,
     generate_cwe,
     generate_random_text,
+    get_created_flaw_uuid,
+    get_flaw_detail_url,
     go_to_specific_flaw_detail_page,
 )
 from features.pages.flaw_detail_page import FlawDetailPage
 from features.pages.home_page import HomePage
 from features.constants import (
     CVSS_COMMENT_FLAW_ID,
-    OSIM_URL,
     FLAW_ID_KEY
 )
 
 
-MAX_RETRY = 10
 DOCUMENT_TEXT_ACTION_FIELD_DICT = {
     # Exclude 'comment#0' because it's mandatory in creation
     'add': ['description', 'statement', 'mitigation'],
@@ -36,6 +35,20 @@ DROPDOWN_FIELDS = ['impact', 'source']
 INPUT_FIELDS = ['title', 'components', 'owner', 'contributors', 'cvssV3']
 COMMENT_TYPES = ['Public', 'Private', 'Internal']
 AFFECT_SORTABLE_FIELDS = ['Module', 'Component', 'Affectedness']
+# the OSIDB flaw fields behind the document text fields
+DOCUMENT_TEXT_OSIDB_FIELDS = {
+    'description': 'cve_description',
+    'statement': 'statement',
+    'mitigation': 'mitigation'
+}
+
+
+def reference_url(reference):
+    return reference['url']
+
+
+def reference_description(reference):
+    return reference['description']
 
 
 @when("I add new comments to the flaw")
@@ -52,7 +65,7 @@ def step_impl(context):
         flaw_detail_page.set_comment_value(comment_type, new_comment)
         flaw_detail_page.click_button_with_js('save' + comment_type + 'CommentBtn')
         flaw_detail_page.wait_msg(comment_type.lower() + "CommentSavedMsg")
-        time.sleep(2)
+        flaw_detail_page.wait_page_settled()
         context.new_comments.append(new_comment)
 
 
@@ -86,6 +99,13 @@ def step_impl(context, action):
 
 @then('The document text fields are updated')
 def step_impl(context):
+    if context.flaw_checks is not None:
+        flaw_uuid = get_created_flaw_uuid()
+        for field, text in context.texts.items():
+            context.flaw_checks.expect(flaw_uuid, DOCUMENT_TEXT_OSIDB_FIELDS[field], text, lambda v: v or '')
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     fields = context.texts.keys()
@@ -108,6 +128,12 @@ def step_impl(context):
 
 @then("A new acknowledgement added to the flaw")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect_item(
+            get_created_flaw_uuid(), 'acknowledgments', context.acknowledgement_value, acknowledgment_label)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_acknowledgments_dropdown_btn()
@@ -127,6 +153,13 @@ def step_impl(context):
 
 @then('The dropdown field values are updated')
 def step_impl(context):
+    if context.flaw_checks is not None:
+        flaw_uuid = get_created_flaw_uuid()
+        for field, value in zip(DROPDOWN_FIELDS, context.field_values):
+            context.flaw_checks.expect(flaw_uuid, field, value)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     for field in DROPDOWN_FIELDS:
@@ -151,6 +184,12 @@ def step_impl(context):
 
 @then("Acknowledgement is changed")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect_item(
+            get_created_flaw_uuid(), 'acknowledgments', context.acknowledgement_value, acknowledgment_label)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_acknowledgments_dropdown_btn()
@@ -169,6 +208,12 @@ def step_impl(context):
 
 @then("Acknowledgement is removed from flaw")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect_item(
+            get_created_flaw_uuid(), 'acknowledgments', context.ack_value, acknowledgment_label, present=False)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_acknowledgments_dropdown_btn()
@@ -217,23 +262,19 @@ def step_impl(context):
 @when("I update the CVE ID with a valid data")
 def step_impl(context):
     flaw_detail_page = FlawDetailPage(context.browser)
-    count = 0
-    while count < MAX_RETRY:
-        value = generate_cve()
-        flaw_detail_page.set_input_field('cveid', value)
-        flaw_detail_page.click_btn('saveBtn')
-        try:
-            flaw_detail_page.wait_msg('flawSavedMsg')
-        except Exception:
-            count += 1
-            continue
-        else:
-            context.value = value
-            break
+    context.value = allocate_cve()
+    flaw_detail_page.set_input_field('cveid', context.value)
+    flaw_detail_page.click_btn('saveBtn')
+    flaw_detail_page.wait_msg('flawSavedMsg')
 
 
 @then("The CVE ID is updated")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(get_created_flaw_uuid(), 'cve_id', context.value)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.check_text_exist(context.value)
@@ -255,6 +296,11 @@ def step_impl(context, action):
 
 @then("The CWE ID is updated")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(get_created_flaw_uuid(), 'cwe_id', context.field_value, lambda v: v or '')
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     v = flaw_detail_page.get_input_value('cweid')
@@ -272,9 +318,15 @@ def step_impl(context):
 
 @then("The Reported Date is updated")
 def step_impl(context):
+    expected = datetime.strftime(datetime.strptime(context.v, "%Y%m%d"), "%Y-%m-%d")
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(
+            get_created_flaw_uuid(), 'reported_dt', expected, lambda v: osidb_datetime(v, "%Y-%m-%d"))
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
-    expected = datetime.strftime(datetime.strptime(context.v, "%Y%m%d"), "%Y-%m-%d")
     get_value = flaw_detail_page.get_input_value("reportedDate")
     assert get_value == expected, f"get {get_value}, expected {expected}"
 
@@ -330,7 +382,7 @@ def add_a_reference_to_first_flaw(context, value, wait_msg, external=True):
     flaw_detail_page.click_button_with_js("saveReferenceBtn")
     flaw_detail_page.wait_msg(wait_msg)
     flaw_detail_page.click_btn("toastMsgCloseBtn")
-    time.sleep(2)
+    flaw_detail_page.wait_page_settled()
 
 
 @when("I add two external references to the flaw")
@@ -363,6 +415,13 @@ def step_impl(context):
 
 @then("Only one RHSB reference can be added")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        flaw_uuid = get_created_flaw_uuid()
+        context.flaw_checks.expect_item(flaw_uuid, 'references', context.first_value, reference_url)
+        context.flaw_checks.expect_item(flaw_uuid, 'references', context.second_value, reference_url, present=False)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_reference_dropdown_button()
@@ -412,6 +471,12 @@ def step_impl(context):
 
 @then("The reference is deleted from this flaw")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect_item(
+            get_created_flaw_uuid(), 'references', context.expected, reference_description, present=False)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_reference_dropdown_button()
@@ -434,6 +499,13 @@ def step_impl(context):
 
 @then("The reference information is changed")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        flaw_uuid = get_created_flaw_uuid()
+        context.flaw_checks.expect_item(flaw_uuid, 'references', context.expected, reference_url)
+        context.flaw_checks.expect_item(flaw_uuid, 'references', context.expected, reference_description)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_reference_dropdown_button()
@@ -449,6 +521,11 @@ def step_impl(context):
 
 @then("I got an error message and no RHSB reference added to the flaw")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect_item(get_created_flaw_uuid(), 'references', context.v, reference_url, present=False)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     flaw_detail_page.click_reference_dropdown_button()
@@ -466,6 +543,13 @@ def step_impl(context):
 
 @then("The embargoed flaw update is failed")
 def step_impl(context):
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(
+            get_created_flaw_uuid(), 'unembargo_dt', context.v, lambda v: osidb_datetime(v, "%Y%m%d%H%M"),
+            equal=False)
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     v = flaw_detail_page.get_input_value("publicDate")
@@ -483,10 +567,16 @@ def step_impl(context):
 
 @then("The embargoed flaw is updated")
 def step_impl(context):
+    format_v = datetime.strptime(context.v, "%Y%m%d%H%M").strftime("%Y-%m-%d %H:%M")
+    if context.flaw_checks is not None:
+        context.flaw_checks.expect(
+            get_created_flaw_uuid(), 'unembargo_dt', format_v, lambda v: osidb_datetime(v, "%Y-%m-%d %H:%M"))
+        context.flaw_checks.verify()
+        return
+
     go_to_specific_flaw_detail_page(context.browser)
     flaw_detail_page = FlawDetailPage(context.browser)
     v = flaw_detail_page.get_input_value("publicDate")
-    format_v = datetime.strptime(context.v, "%Y%m%d%H%M").strftime("%Y-%m-%d %H:%M")
     assert format_v in v, f"Public date should updated to a {format_v}, got {v}"
 
 
@@ -555,7 +645,7 @@ def step_impl(context):
     flaw_page.click_button_with_js("firstAffectRemoveBtn")
     flaw_page.click_btn('saveBtn')
     flaw_page.wait_msg('flawSavedMsg')
-    time.sleep(1)
+    flaw_page.wait_page_settled()
     flaw_page.click_button_with_js('msgClose')
     flaw_page.wait_msg('affectDeleteMsg')
 
@@ -593,7 +683,7 @@ def step_impl(context):
 def step_impl(context):
     flaw_page = FlawDetailPage(context.browser)
     context.ps_component1 = flaw_page.add_new_affect(affectedness_value="NEW", component=generate_random_text())
-    time.sleep(2)
+    flaw_page.wait_page_settled()
     flaw_page.close_all_toast_msg()
     flaw_page.bulk_delete_affects()
     flaw_page.click_btn('saveBtn')
@@ -691,17 +781,17 @@ def step_impl(context):
 
     # created date descending order
     flaw_detail_page.click_button_with_js("trackerCreatedDateOrder")
-    time.sleep(2)
+    flaw_detail_page.wait_page_settled()
     desc.append(flaw_detail_page.get_value_list_of_displayed_tracker_list("created_date"))
 
     # updated date ascending order
     flaw_detail_page.click_button_with_js("trackerUpdatedDateOrder")
-    time.sleep(2)
+    flaw_detail_page.wait_page_settled()
     asce.append(flaw_detail_page.get_value_list_of_displayed_tracker_list("updated_date"))
 
     # updated date descending order
     flaw_detail_page.click_button_with_js("trackerUpdatedDateOrder")
-    time.sleep(2)
+    flaw_detail_page.wait_page_settled()
     desc.append(flaw_detail_page.get_value_list_of_displayed_tracker_list("updated_date"))
 
     context.asce = asce
@@ -738,17 +828,24 @@ def step_impl(context):
     assert flaw_detail_page.get_unfiled_tracker_number() == n, "should deselect all trackers"
 
 
-@when('I click state button to update flaw state')
+@when('I click state button to update flaw state following workflow')
 def step_impl(context):
+    # the states are reached one after the other on the same flaw
     flaw_page = FlawDetailPage(context.browser)
-    flaw_page.click_button_with_js('promoteStateBtn')
-    flaw_page.wait_msg('flawPromotedMsg')
+    context.expected_states = [row['new_state'] for row in context.table]
+    context.states = []
+    for _ in context.expected_states:
+        flaw_page.click_button_with_js('promoteStateBtn')
+        flaw_page.wait_msg('flawPromotedMsg')
+        flaw_page.wait_page_settled()
+        context.states.append(flaw_page.read_field_values().get('stateText'))
+        flaw_page.close_all_toast_msg()
 
 
-@then('The flaw is updated to {new_state} following workflow')
-def step_impl(context, new_state):
-    flaw_page = FlawDetailPage(context.browser)
-    flaw_page.check_text_exist(new_state)
+@then('The flaw is updated to every state following workflow')
+def step_impl(context):
+    assert context.states == context.expected_states, \
+        f"Flaw states should be {context.expected_states}, got {context.states}"
 
 
 @when('I click reject button to reject a flaw')
@@ -799,7 +896,7 @@ def step_impl(context, new_state):
 @then('The flaw incident state is updated to {new_state}')
 def step_impl(context, new_state):
     flaw_page = FlawDetailPage(context.browser)
-    time.sleep(2)
+    flaw_page.wait_page_settled()
     _, v = flaw_page.get_select_value('incidentState')
     assert v == new_state, f"Incident state should be {new_state}, got {v}"
 
@@ -889,7 +986,6 @@ def step_impl(context):
         for _ in range(diff):
             flaw_detail_page.add_new_affect(component=generate_random_text(), affectedness_value="NEW")
             flaw_detail_page.close_all_toast_msg()
-            time.sleep(2)
 
     # change affect pagination to 5
     flaw_detail_page.change_affect_pagination(5)
@@ -936,16 +1032,15 @@ def step_impl(context):
     flaw_detail_page.select_affect_by_state()
 
 
-@when("I create a new flaw and add same module/component affect")
+@when("I add same module/component affect to the created flaw")
 def step_impl(context):
     flaw_detail_page = FlawDetailPage(context.browser)
     # get public flaw affect information
     affect = flaw_detail_page.get_affect_value()
-    # open a new tab, create a new flaw add same module/component affect to flaw
-    original_window = flaw_detail_page.open_new_tab(OSIM_URL)
-    flaw_detail_page.click_btn('createFlawLink')
-    create_flaw_with_valid_data(context, with_optional=True)
-    flaw_detail_page.close_all_toast_msg()
+    # open the created flaw in a new tab and add same module/component affect to it
+    context.cve_id = context.flaw["cve_id"]
+    original_window = flaw_detail_page.open_new_tab(get_flaw_detail_url(context.flaw["uuid"]))
+    flaw_detail_page.save_button_exist()
     flaw_detail_page.add_new_affect(module=affect.module, component=affect.component, affectedness_value="AFFECTED")
 
     flaw_detail_page.close_tab_return_to_original_window(original_window)
@@ -971,7 +1066,7 @@ def step_impl(context):
 @when("Sync tracker selections across tabs in Tracker Manager")
 def step_impl(context):
     flaw_detail_page = FlawDetailPage(context.browser)
-    flaw_detail_page.click_flaw_tab_in_tracker_manager(get_data_from_tmp_data_file(FLAW_ID_KEY))
+    flaw_detail_page.click_flaw_tab_in_tracker_manager(get_created_flaw(FLAW_ID_KEY).flaw_id)
     # select first tracker and check if the selection sync to another flaw tab
     product_stream = flaw_detail_page.get_unfiled_tracker_product_stream(row=1)
     context.product_stream = product_stream
@@ -980,7 +1075,7 @@ def step_impl(context):
     assert flaw_detail_page.is_tracker_selected(product_stream) is True
     flaw_detail_page.click_flaw_tab_in_tracker_manager(context.cve_id)
     assert flaw_detail_page.is_tracker_selected(product_stream) is True
-    flaw_detail_page.click_flaw_tab_in_tracker_manager(get_data_from_tmp_data_file(FLAW_ID_KEY))
+    flaw_detail_page.click_flaw_tab_in_tracker_manager(get_created_flaw(FLAW_ID_KEY).flaw_id)
 
 
 @when('Inspect selected trackers to file in Tracker Manager')
@@ -996,6 +1091,7 @@ def step_impl(context):
 @when('I file tracker for multiple flaw')
 def step_impl(context):
     flaw_detail_page = FlawDetailPage(context.browser)
+    flaw_detail_page.mark_errors_seen()
     flaw_detail_page.driver.find_element(By.XPATH, "//button[text()=' File 1 Trackers ']").click()
     # confirm if current flaw is low impact
     try:
@@ -1,17 +1,44 @@
-import time
 from behave import given, when, then
 
 from features.pages.advanced_search_page import AdvancedSearchPage
 from features.pages.flaw_detail_page import FlawDetailPage
 from features.pages.home_page import HomePage
 from features.utils import (
-        is_sorted,
         go_to_advanced_search_page,
         go_to_home_page,
         go_to_specific_flaw_detail_page
 )
 
 
+# pages of the flaw list loaded with 'Load More Flaws' before checking a sort
+LOAD_MORE_PAGES = 1
+
+
+def sort_difference(shown, listed):
+    """
+    Compare the (ID, value) rows of the flaw list with the ones OSIDB lists
+    for its query. Other scenarios may create flaws meanwhile, so the shown
+    flaws must be listed by OSIDB in the same order with the same values,
+    other flaws may come between them and flaws with the same value may
+    come in any order. Return the first difference or None.
+    """
+    positions = {flaw_id: position for position, (flaw_id, _) in enumerate(listed)}
+    # the last position OSIDB lists the rows of the previous values at, and of the current value
+    previous_last = group_last = -1
+    for row, (flaw_id, value) in enumerate(shown, 1):
+        position = positions.get(flaw_id)
+        if position is None:
+            return f"row {row} shows {flaw_id}, not in the first {len(listed)} flaws OSIDB lists"
+        if value != listed[position][1]:
+            return f"row {row} shows {value!r} for {flaw_id}, OSIDB lists {listed[position][1]!r}"
+        if row > 1 and value != shown[row - 2][1]:
+            previous_last, group_last = max(previous_last, group_last), -1
+        if position < previous_last:
+            return f"row {row} shows {flaw_id}, OSIDB lists it before {listed[previous_last][0]}"
+        group_last = max(group_last, position)
+    return None
+
+
 @when('I click the link of a flaw')
 def step_impl(context):
     home_page = HomePage(context.browser)
@@ -84,22 +111,23 @@ def step_impl(context):
         # skip title sort,  https://redhat.atlassian.net/browse/OSIDB-2903
         if field == 'title':
             continue
-        fieldbtn = field + "Btn"
-        home_page.click_btn(fieldbtn)
-        time.sleep(3)
-        desc_values = home_page.get_sort_field_values(field, sort_fields)
-        home_page.click_btn(fieldbtn)
-        time.sleep(3)
-        asce_values = home_page.get_sort_field_values(field, sort_fields)
-        value_dict[field] = {'desc': desc_values, 'asce': asce_values}
+        value_dict[field] = {}
+        for order in ['desc', 'asce']:
+            home_page.sort_flaw_list(field, order)
+            home_page.load_more_flaws(LOAD_MORE_PAGES)
+            shown = home_page.get_flaw_list_rows(field)
+            listed = home_page.get_osidb_flaw_list_rows(field, order, len(shown))
+            value_dict[field][order] = (shown, listed)
     context.value_dict = value_dict
 
 
 @then("The flaw list is sorted by the field")
 def step_impl(context):
     for k, v in context.value_dict.items():
-        for order, values in v.items():
-            assert is_sorted(values, order) is True, f"Sort by field {k} in {order} failed."
+        for order, (shown, listed) in v.items():
+            assert shown, f"No flaw listed when sorted by field {k} in {order}."
+            difference = sort_difference(shown, listed)
+            assert difference is None, f"Sort by field {k} in {order} failed: {difference}"
 
 
 @when("I check 'Open Issues' checkbox on home page")
@@ -109,9 +137,9 @@ def step_impl(context):
     # Sort flaw list by state and check if any closed ones. States:
     # NEW, TRIAGE, PRE_SECONDARY_ASSESSMENT, SECONDARY_ASSESSMENT, DONE
     home_page.click_btn('stateBtn')
-    time.sleep(3)
+    home_page.wait_page_settled()
     home_page.click_btn('stateBtn')
-    time.sleep(3)
+    home_page.wait_page_settled()
     context.state = home_page.get_specified_cell_value(1, 5)
 
 
@@ -176,6 +204,6 @@ def step_impl(context):
     home_page = HomePage(context.browser)
     home_page.firstFlaw.visibility_of_element_located()
     # Only firstFlaw.visibility_of_element_located can't work
-    time.sleep(1)
+    home_page.wait_page_settled()
     owner = home_page.get_field_value("owner")
     assert context.user_name == owner
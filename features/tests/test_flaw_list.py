@@ -0,0 +1,43 @@
+"""
+The check of the flaw list sort against the order OSIDB lists the flaws in.
+Run it from the osim root directory:
+
+    python -m pytest features/tests
+"""
+import unittest
+
+from features.steps.flaw_list import sort_difference
+
+
+class SortDifferenceTest(unittest.TestCase):
+
+    def test_same_order(self):
+        shown = [("A", "a"), ("B", "b"), ("C", "c")]
+        self.assertIsNone(sort_difference(shown, shown))
+
+    def test_flaws_between_the_shown_ones(self):
+        listed = [("N", "a"), ("A", "a"), ("M", "b"), ("B", "b")]
+        self.assertIsNone(sort_difference([("A", "a"), ("B", "b")], listed))
+
+    def test_same_values_in_any_order(self):
+        listed = [("A", "a"), ("C", "b"), ("B", "b"), ("D", "c")]
+        self.assertIsNone(sort_difference([("A", "a"), ("B", "b"), ("C", "b"), ("D", "c")], listed))
+
+    def test_wrong_order(self):
+        listed = [("B", "b"), ("A", "a")]
+        self.assertEqual(
+            sort_difference([("A", "a"), ("B", "b")], listed), "row 2 shows B, OSIDB lists it before A")
+
+    def test_wrong_order_after_a_tie(self):
+        # C ties with B, not with A which OSIDB lists after it
+        listed = [("C", "b"), ("A", "a"), ("B", "b")]
+        self.assertEqual(
+            sort_difference([("A", "a"), ("B", "b"), ("C", "b")], listed), "row 3 shows C, OSIDB lists it before A")
+
+    def test_missing_flaw(self):
+        self.assertEqual(
+            sort_difference([("A", "a")], [("B", "b")]), "row 1 shows A, not in the first 1 flaws OSIDB lists")
+
+    def test_different_value(self):
+        self.assertEqual(
+            sort_difference([("A", "a")], [("A", "b")]), "row 1 shows 'a' for A, OSIDB lists 'b'")
@@ -0,0 +1,191 @@
+"""
+The OSIDB stand-in answering requests without its HTTP server. Run it from
+the osim root directory:
+
+    python -m pytest features/tests
+"""
+import os
+import unittest
+
+from features.osidb_server import ApiError, OsidbStandIn, cvss2_score, cvss3_score
+
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "openapi-osidb.yml")
+
+AUTH = {"Authorization": "Bearer token"}
+
+
+class OsidbStandInTestCase(unittest.TestCase):
+
+    # the spec takes a while to parse, the stand-in is shared and emptied for every test
+    shared = None
+
+    def setUp(self):
+        if OsidbStandInTestCase.shared is None:
+            OsidbStandInTestCase.shared = OsidbStandIn(SPEC_PATH)
+        self.stand_in = OsidbStandInTestCase.shared
+        self.stand_in.store.records = {kind: {} for kind in self.stand_in.store.records}
+
+    def request(self, method, path, body=None, **query):
+        return self.stand_in.handle(method, path, {name: [str(value)] for name, value in query.items()}, AUTH, body)
+
+    def error(self, method, path, body=None, **query):
+        with self.assertRaises(ApiError) as raised:
+            self.request(method, path, body, **query)
+        return raised.exception
+
+    def create_flaw(self, **fields):
+        body = dict({"title": "Sample flaw", "comment_zero": "Report", "embargoed": False}, **fields)
+        status, flaw = self.request("POST", "/osidb/api/v2/flaws", body)
+        self.assertEqual(status, 201)
+        return flaw
+
+
+class CrudTest(OsidbStandInTestCase):
+
+    def test_create_and_get_a_flaw(self):
+        flaw = self.create_flaw(cve_id="CVE-1999-90001")
+        self.assertEqual(flaw["classification"]["state"], "NEW")
+        for flaw_id in (flaw["uuid"], "CVE-1999-90001"):
+            status, found = self.request("GET", f"/osidb/api/v2/flaws/{flaw_id}", include_fields="uuid,title")
+            self.assertEqual(status, 200)
+            self.assertEqual((found["uuid"], found["title"]), (flaw["uuid"], "Sample flaw"))
+            self.assertNotIn("comment_zero", found)
+
+    def test_required_fields(self):
+        error = self.error("POST", "/osidb/api/v2/flaws", {"title": "No report"})
+        self.assertEqual(error.status, 400)
+        self.assertEqual(set(error.payload), {"comment_zero", "embargoed"})
+
+    def test_cve_id_is_unique(self):
+        self.create_flaw(cve_id="CVE-1999-90001")
+        self.assertEqual(self.error("POST", "/osidb/api/v2/flaws", {
+            "title": "Copy", "comment_zero": "Report", "embargoed": False, "cve_id": "CVE-1999-90001",
+        }).payload, {"cve_id": ["Flaw with this cve id already exists."]})
+
+    def test_update_a_flaw(self):
+        flaw = self.create_flaw()
+        status, updated = self.request(
+            "PUT", f"/osidb/api/v2/flaws/{flaw['uuid']}", dict(flaw, title="New title", uuid="ignored"))
+        self.assertEqual((status, updated["title"], updated["uuid"]), (200, "New title", flaw["uuid"]))
+        # OSIDB does not delete flaws
+        self.assertEqual(self.error("DELETE", f"/osidb/api/v2/flaws/{flaw['uuid']}").status, 405)
+
+    def test_delete_a_reference(self):
+        flaw = self.create_flaw()
+        path = f"/osidb/api/v1/flaws/{flaw['uuid']}/references"
+        _, reference = self.request(
+            "POST", path, {"url": "https://www.example.com", "type": "EXTERNAL", "embargoed": False})
+        self.assertEqual(self.request("DELETE", f"{path}/{reference['uuid']}")[0], 200)
+        self.assertEqual(self.error("GET", f"{path}/{reference['uuid']}").status, 404)
+
+    def test_nested_records(self):
+        flaw = self.create_flaw()
+        self.request("POST", f"/osidb/api/v1/flaws/{flaw['uuid']}/comments", {"text": "A comment", "embargoed": False})
+        _, found = self.request("GET", f"/osidb/api/v2/flaws/{flaw['uuid']}")
+        self.assertEqual([comment["text"] for comment in found["comments"]], ["A comment"])
+
+    def test_token_required(self):
+        with self.assertRaises(ApiError) as raised:
+            self.stand_in.handle("GET", "/osidb/api/v2/flaws", {}, {}, None)
+        self.assertEqual(raised.exception.status, 401)
+
+
+class ListTest(OsidbStandInTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for title, impact in (("Beta", "LOW"), ("Alpha", "MODERATE"), ("Gamma", "LOW")):
+            self.create_flaw(title=title, impact=impact)
+
+    def titles(self, **query):
+        _, listed = self.request("GET", "/osidb/api/v2/flaws", **query)
+        return [flaw["title"] for flaw in listed["results"]]
+
+    def test_filter(self):
+        self.assertEqual(sorted(self.titles(impact="LOW")), ["Beta", "Gamma"])
+
+    def test_search(self):
+        self.assertEqual(self.titles(search="alp"), ["Alpha"])
+
+    def test_order(self):
+        self.assertEqual(self.titles(order="title"), ["Alpha", "Beta", "Gamma"])
+        self.assertEqual(self.titles(order="-title"), ["Gamma", "Beta", "Alpha"])
+        self.assertEqual(self.titles(order="-impact,title"), ["Alpha", "Beta", "Gamma"])
+
+    def test_pages(self):
+        _, listed = self.request("GET", "/osidb/api/v2/flaws", order="title", limit=2)
+        self.assertEqual((listed["count"], len(listed["results"])), (3, 2))
+        self.assertIn("offset=2", listed["next"])
+        self.assertEqual(self.titles(order="title", limit=2, offset=2), ["Gamma"])
+
+
+class BulkAffectsTest(OsidbStandInTestCase):
+
+    def affect(self, flaw, **fields):
+        return dict({
+            "flaw": flaw["uuid"], "ps_module": "rhel-9", "ps_component": "kernel",
+            "ps_update_stream": "rhel-9.4.z", "embargoed": False,
+        }, **fields)
+
+    def test_create(self):
+        flaw = self.create_flaw()
+        status, created = self.request("POST", "/osidb/api/v2/affects/bulk", [self.affect(flaw)])
+        self.assertEqual(status, 200)
+        # answered with the v2 Affect schema
+        self.assertEqual(created["results"][0]["ps_update_stream"], "rhel-9.4.z")
+        self.assertIn("tracker", created["results"][0])
+        _, found = self.request("GET", f"/osidb/api/v2/flaws/{flaw['uuid']}")
+        self.assertEqual([affect["ps_component"] for affect in found["affects"]], ["kernel"])
+
+    def test_invalid_item_creates_nothing(self):
+        flaw = self.create_flaw()
+        invalid = self.affect(flaw)
+        del invalid["ps_update_stream"]
+        error = self.error("POST", "/osidb/api/v2/affects/bulk", [self.affect(flaw), invalid])
+        self.assertEqual(error.payload, [{}, {"ps_update_stream": ["This field is required."]}])
+        self.assertEqual(self.stand_in.store.records["Affect"], {})
+
+    def test_update(self):
+        flaw = self.create_flaw()
+        _, created = self.request("POST", "/osidb/api/v2/affects/bulk", [self.affect(flaw)])
+        affect = created["results"][0]
+        missing = dict(affect, uuid="6a7c5d3e-0000-4000-8000-000000000001")
+        error = self.error("PUT", "/osidb/api/v2/affects/bulk", [missing])
+        self.assertEqual(error.payload, [{"detail": "Not found."}])
+        _, updated = self.request("PUT", "/osidb/api/v2/affects/bulk", [dict(affect, affectedness="AFFECTED")])
+        self.assertEqual(updated["results"][0]["affectedness"], "AFFECTED")
+        self.assertEqual(updated["results"][0]["uuid"], affect["uuid"])
+
+    def test_delete(self):
+        flaw = self.create_flaw()
+        _, created = self.request("POST", "/osidb/api/v2/affects/bulk", [self.affect(flaw)])
+        self.request("DELETE", "/osidb/api/v2/affects/bulk", [created["results"][0]["uuid"]])
+        self.assertEqual(self.stand_in.store.records["Affect"], {})
+
+
+class CvssScoreTest(OsidbStandInTestCase):
+
+    def test_cvss3_score(self):
+        self.assertEqual(cvss3_score("CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H"), 9.8)
+        self.assertEqual(cvss3_score("CVSS:3.1/AV:N/AC:L/PR:L/UI:N/S:C/C:L/I:L/A:N"), 6.4)
+        self.assertEqual(cvss3_score("CVSS:3.1/AV:L/AC:H/PR:H/UI:R/S:U/C:N/I:N/A:N"), 0)
+
+    def test_cvss2_score(self):
+        self.assertEqual(cvss2_score("AV:N/AC:L/Au:N/C:P/I:P/A:P"), 7.5)
+        self.assertEqual(cvss2_score("AV:L/AC:H/Au:M/C:N/I:N/A:C"), 3.7)
+
+    def test_invalid_vector(self):
+        with self.assertRaises(ValueError):
+            cvss3_score("CVSS:3.1/AV:X")
+
+    def test_score_of_a_new_cvss_score(self):
+        flaw = self.create_flaw()
+        _, score = self.request("POST", f"/osidb/api/v1/flaws/{flaw['uuid']}/cvss_scores", {
+            "cvss_version": "V3", "vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H", "embargoed": False,
+        })
+        self.assertEqual((score["score"], score["issuer"]), (9.8, "RH"))
+        error = self.error("POST", f"/osidb/api/v1/flaws/{flaw['uuid']}/cvss_scores", {
+            "cvss_version": "V3", "vector": "not a vector", "embargoed": False,
+        })
+        self.assertIn("vector", error.payload)
@@ -0,0 +1,183 @@
+"""
+Page objects run against the sanitized snapshots of features/tests/snapshots
+with FakeWebDriver, without OSIM, OSIDB or a browser. Run them from the osim
+root directory:
+
+    python -m pytest features/tests
+
+The scripts of the page objects are not run: FakeWebDriver answers them with
+its Python mirrors, so these tests check the Python side of the page objects
+and the mirrors, which MirroredScriptsTest keeps matched to the scripts by
+hash. Methods relying on other scripts, e.g. the flaw list sort state or the
+sent requests, are left out.
+"""
+import copy
+import hashlib
+import os
+import unittest
+import urllib.parse
+
+from features.constants import OSIM_URL
+from features.fake_webdriver import MIRRORED_SCRIPTS, FakeWebDriver
+from features.pages import base, flaw_detail_page
+from features.pages.base import resolve_template
+from features.pages.advanced_search_page import AdvancedSearchPage
+from features.pages.flaw_detail_page import Affect, FlawDetailPage
+from features.pages.home_page import HomePage
+from features.pages.settings_page import SettingsPage
+
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+
+
+def open_page(page_class, path):
+    driver = FakeWebDriver(SNAPSHOT_DIR)
+    driver.get(urllib.parse.urljoin(OSIM_URL, path))
+    page = page_class(driver)
+    page.timeout = 0
+    return page
+
+
+class MirroredScriptsTest(unittest.TestCase):
+
+    def test_scripts_match_their_mirror(self):
+        modules = (base, flaw_detail_page)
+        for name, digest in MIRRORED_SCRIPTS.items():
+            script = next(getattr(module, name) for module in modules if hasattr(module, name))
+            self.assertEqual(
+                hashlib.sha256(script.encode()).hexdigest(), digest,
+                f"{name} changed, update its mirror in FakeWebDriver then MIRRORED_SCRIPTS")
+
+
+class FlawDetailPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = open_page(FlawDetailPage, "flaws/CVE-2024-0001")
+
+    def test_get_affects(self):
+        self.assertEqual(self.page.get_affects(), [
+            Affect("sample-module", "sample-component", "AFFECTED", "DELEGATED", "MODERATE", "5.3"),
+            Affect("other-module", "other-component", "NEW", "", "LOW", ""),
+        ])
+
+    def test_get_affect_value(self):
+        self.assertEqual(self.page.get_affect_value(2).module, "other-module")
+
+    def test_affect_cell(self):
+        cell = self.page.driver.find_element(*self.page.loc("affectCell", row=2, column="component"))
+        self.assertEqual(cell.text, "other-component")
+
+    def test_free_text_locators_are_not_cached(self):
+        resolve_template.cache_clear()
+        self.page.loc("spanText", value="Sample flaw title")
+        self.page.loc("affectCell", row=1, column="module")
+        self.assertEqual(resolve_template.cache_info().currsize, 1)
+
+    def test_read_field_values(self):
+        values = self.page.read_field_values()
+        self.assertEqual(values["titleText"], "Sample flaw title")
+        self.assertEqual(values["cveidText"], "CVE-2024-0001")
+        self.assertEqual(values["cweidText"], "CWE-79")
+        self.assertEqual(values["impactText"], "MODERATE")
+        self.assertEqual(values["sourceText"], "GIT")
+        self.assertEqual(values["reportedDateText"], "20240101")
+        self.assertEqual(values["ownerText"], "tester@example.com")
+        self.assertEqual(values["stateText"], "NEW")
+        self.assertEqual(values["embargoedText"], "No")
+        self.assertEqual(values["comment#0Text"], "Sample report of the flaw.")
+        # labels missing from the page are left out
+        self.assertNotIn("publicDateFutureText", values)
+
+    def test_field_control_follows_typing(self):
+        owner = self.page.field_control("ownerText", "input")
+        owner.clear()
+        owner.send_keys("other@example.com")
+        self.assertEqual(self.page.read_field_values()["ownerText"], "other@example.com")
+
+    def rerender_field(self, label):
+        # a render replacing the field row with new nodes
+        row = self.page.driver.document().xpath(f"//span[text()='{label}']/ancestor::div[1]")[0]
+        row.getparent().replace(row, copy.deepcopy(row))
+
+    def test_select_follows_a_new_render(self):
+        self.page.field_index()
+        self.rerender_field("Impact")
+        self.assertEqual(self.page.get_select_value("impact")[1], "MODERATE")
+        self.rerender_field("Impact")
+        self.page.with_select_element("impact", lambda select: select.select_element_by_value("LOW"))
+        self.assertEqual(self.page.read_field_values()["impactText"], "LOW")
+
+    def test_get_trackers(self):
+        self.assertEqual(
+            [tracker.product_stream for tracker in self.page.get_trackers()], ["sample-stream-1"])
+
+
+class AdvancedSearchPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = open_page(AdvancedSearchPage, "search")
+
+    def test_get_result_flaw_ids(self):
+        self.assertEqual(self.page.get_result_flaw_ids(), [
+            "CVE-2024-0002", "CVE-2024-0001", "6a7c5d3e-0000-4000-8000-000000000001"])
+
+    def test_get_result_flaw_ids_first_n(self):
+        self.assertEqual(self.page.get_result_flaw_ids(1), ["CVE-2024-0002"])
+
+    def test_get_first_flaw_id(self):
+        self.assertEqual(self.page.get_first_flaw_id(), "CVE-2024-0002")
+
+    def test_cached_element_follows_reordered_rows(self):
+        self.assertEqual(self.page.cve_idText.text, "CVE-2024-0002")
+        # a re-sort reusing the row nodes
+        tbody = self.page.driver.document().xpath("//tbody")[0]
+        tbody.insert(0, tbody[1])
+        self.assertEqual(self.page.cve_idText.text, "CVE-2024-0001")
+
+
+class HomePageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = open_page(HomePage, "")
+
+    def test_get_flaw_list_rows(self):
+        # the badge lanes under the rows are not flaws
+        self.assertEqual(self.page.get_flaw_list_rows("owner"), [
+            ("CVE-2024-0002", ""),
+            ("CVE-2024-0001", "tester@example.com"),
+            ("6a7c5d3e-0000-4000-8000-000000000001", ""),
+        ])
+        self.assertEqual(
+            [value for _, value in self.page.get_flaw_list_rows("created")],
+            ["2024-01-05 10:00", "2024-01-01 09:30", "2023-12-31 23:59"])
+
+    def test_get_flaw_list_item_count(self):
+        self.assertEqual(self.page.get_flaw_list_item_count(), 3)
+
+    def test_get_specified_cell_value(self):
+        self.assertEqual(self.page.get_specified_cell_value(3, 2), "MODERATE")
+
+    def test_get_jira_username(self):
+        self.page.wait_jira_username()
+        self.assertEqual(self.page.get_jira_username(), "jira-tester")
+
+    def test_filter_checkboxes(self):
+        self.assertTrue(self.page.myIssuesCheckbox.is_selected())
+        self.assertTrue(self.page.openIssuesCheckbox.is_selected())
+        self.assertFalse(self.page.defaultFilterCheckbox.is_selected())
+
+
+class SettingsPageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.page = open_page(SettingsPage, "settings")
+
+    def key_input(self, label):
+        return self.page.driver.find_element(
+            "xpath", f"//span[text()='{label}']/ancestor::label//input")
+
+    def test_set_api_key(self):
+        self.page.set_api_key("bugzilla", "new-bugzilla-key")
+        self.page.set_api_key("jira", "new-jira-token")
+        self.assertEqual(self.key_input("Bugzilla API Key").get_property("value"), "new-bugzilla-key")
+        self.assertEqual(self.key_input("JIRA API Token").get_property("value"), "new-jira-token")
@@ -1,7 +1,5 @@
-import json
 import os
 import re
-import time
 
 import rstr
 import random
@@ -10,28 +8,32 @@ import urllib.parse
 
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
-from constants import (
-    OSIDB_URL,
+from features.constants import (
     OSIM_URL,
     SELENIUM_URL,
+    GRID_SESSION_NAME,
     BUGZILLA_API_KEY,
     JIRA_API_KEY,
     FLAW_ID_KEY
 )
-from common_utils import get_data_from_tmp_data_file
-from pages.login_page import LoginPage
-from pages.home_page import HomePage
-from pages.settings_page import SettingsPage
-from pages.flaw_detail_page import FlawDetailPage
-from pages.advanced_search_page import AdvancedSearchPage
-
-
-def init_remote_firefox_browser():
+from features.common_utils import is_flaw_uuid
+from features.command_trace import trace_commands
+from features.osidb_client import OsidbClient
+from features.run_data import cache_flaw_uuid, get_cached_flaw_uuid, get_created_flaw
+from features.pages.base import track_requests
+from features.pages.login_page import LoginPage
+from features.pages.home_page import HomePage
+from features.pages.settings_page import SettingsPage
+from features.pages.flaw_detail_page import FlawDetailPage
+
+
+def init_remote_firefox_browser(command_profile=None):
     """
     Init a remote firefox driver which we can use to test
     osim
+    :param command_profile: CommandProfile recording the commands sent
     :return: Remote selenium firefox driver
     """
     profile = webdriver.FirefoxProfile()
@@ -40,23 +42,30 @@ def init_remote_firefox_browser():
     op.profile = profile
     if 'CI' in os.environ:
         op.add_argument("-headless")
-    return webdriver.Remote(command_executor=SELENIUM_URL, options=op)
+    if GRID_SESSION_NAME:
+        op.set_capability("se:name", GRID_SESSION_NAME)
+    browser = track_requests(webdriver.Remote(command_executor=SELENIUM_URL, options=op))
+    if command_profile is not None:
+        trace_commands(browser, command_profile)
+    return browser
 
 
-def osim_login_page():
+def osim_login_page(browser=None):
     """
-    This function is used to get the index page of OSIM
+    This function is used to get the index page of OSIM, in a new
+    browser unless one is given
     """
-    browser = init_remote_firefox_browser()
+    if browser is None:
+        browser = init_remote_firefox_browser()
     browser.get(OSIM_URL)
     return browser
 
 
-def login_with_valid_account():
+def login_with_valid_account(browser=None):
     """
     This function defines the login.
     """
-    browser = osim_login_page()
+    browser = osim_login_page(browser)
     login_page = LoginPage(browser)
     login_page.login()
     return browser
@@ -70,8 +79,14 @@ def set_api_keys(browser):
     settings_page.set_api_key('bugzilla', BUGZILLA_API_KEY)
     settings_page.set_api_key('jira', JIRA_API_KEY)
 
-    # wait osim getting username from jira
-    time.sleep(2)
+    # wait osim getting username from jira, the request starts once the key
+    # is saved and may not be in flight yet
+    try:
+        home_page.wait_jira_username(settings_page.timeout)
+    except TimeoutException:
+        # a wrong key fails the steps using Jira
+        pass
+    settings_page.wait_page_settled()
 
     # open notification so that we can judge if operation succeed
     flaw_detail_page = FlawDetailPage(browser)
@@ -89,30 +104,48 @@ def go_to_home_page(browser):
     home_page.flaw_list_exist()
 
 
+def get_flaw_uuid(flaw_id):
+    """
+    Get the UUID of a flaw from its CVE ID, asking OSIDB only the first
+    time in a run
+    """
+    if is_flaw_uuid(flaw_id):
+        return flaw_id
+
+    flaw_uuid = get_cached_flaw_uuid(flaw_id)
+    if flaw_uuid is None:
+        flaw = OsidbClient().get(f"osidb/api/v2/flaws/{flaw_id}", include_fields="uuid")
+        flaw_uuid = flaw["uuid"]
+        cache_flaw_uuid(flaw_id, flaw_uuid)
+    return flaw_uuid
+
+
+def get_created_flaw_uuid(key=FLAW_ID_KEY):
+    """
+    Get the UUID of the flaw saved under a key in this run
+    """
+    flaw = get_created_flaw(key)
+    return get_flaw_uuid(flaw.uuid or flaw.flaw_id)
+
+
 def go_to_specific_flaw_detail_page(browser, flaw_id=None):
     """
     Go to a specific flaw detail page
     """
-    cve_id = flaw_id if flaw_id else get_data_from_tmp_data_file(FLAW_ID_KEY)
-
-    if cve_id.startswith("CVE-"):
-        go_to_home_page(browser)
-        home_page = HomePage(browser)
-        home_page.clear_text_with_js(home_page.quickSearchBox)
-        home_page.quickSearchBox.set_text(cve_id)
-        home_page.click_btn('quickSearchBtn')
-    else:
-        go_to_advanced_search_page(browser)
-        advanced_search_page = AdvancedSearchPage(browser)
-        advanced_search_page.select_field_and_value_to_search("uuid", cve_id)
-        advanced_search_page.click_btn("searchBtn")
-        advanced_search_page.first_flaw_exist()
-        advanced_search_page.go_to_first_flaw_detail()
+    flaw_uuid = get_flaw_uuid(flaw_id) if flaw_id else get_created_flaw_uuid()
+    browser.get(get_flaw_detail_url(flaw_uuid))
 
     flaw_detail_page = FlawDetailPage(browser)
     flaw_detail_page.save_button_exist()
 
 
+def get_flaw_detail_url(flaw_id):
+    """
+    Get the URL of a flaw detail page from the flaw UUID or CVE ID
+    """
+    return urllib.parse.urljoin(OSIM_URL, f"flaws/{flaw_id}")
+
+
 def generate_random_text(length=8):
     """
     This function is used to generate random text
@@ -130,25 +163,11 @@ def go_to_advanced_search_page(browser):
     home_page.click_button_with_js("advancedSearchBtn")
 
 
-def generate_cve():
-    cve_re_str = re.compile(r"CVE-(?:1999|2\d{3})-(?!0{4})(?:0\d{3}|[1-9]\d{3,7})")
-    return rstr.xeger(cve_re_str)
-
-
 def generate_cwe():
     cwe_re_str = re.compile(r"CWE-[1-9]\d*(\[auto\])?", flags=re.IGNORECASE)
     return rstr.xeger(cwe_re_str)
 
 
-def get_osidb_token():
-    url = urllib.parse.urljoin(OSIDB_URL, "auth/token")
-    cli = f"curl -H 'Content-Type: application/json' --negotiate -u  : {url} > token"
-    os.system(cli)
-    f = open("token", "r")
-    text = f.read()
-    return json.loads(text).get('access')
-
-
 def is_sorted(l, order):
     if order == 'desc':
         return l == sorted(l, key=lambda x: str.casefold(x), reverse=True)
@@ -15,6 +15,26 @@ run_behave() {
      return $?
 }
 
+# the behave calls below share the run data, e.g. the flaws created by flaw_create_*.feature
+export RUN_ID="${RUN_ID:-$(date +%s)-$$}"
+
+# SESSION_BROKER=true keeps logged-in sessions for all the behave calls below
+if [[ "${SESSION_BROKER:-false}" == "true" && ! -v SESSION_BROKER_URL ]]; then
+    python -m features.session_broker --port 4480 --quiet &
+    broker_pid=$!
+    trap 'kill $broker_pid' EXIT
+    export SESSION_BROKER_URL=http://127.0.0.1:4480
+    until curl -sf "$SESSION_BROKER_URL/status" > /dev/null; do
+        kill -0 $broker_pid || exit 1
+        sleep 1
+    done
+fi
+
+# a flaw created by flaw_create_*.feature was saved in the run data, or FLAW_ID is set
+flaw_created() {
+    python -c "from features.run_data import get_created_flaw; get_created_flaw('FLAW_ID')" 2> /dev/null
+}
+
 
 if ! run_behave features/login.feature; then
     echo "login to osim failed, skip the rest of tests"
@@ -33,7 +53,7 @@ else
     echo "flaw_create_public.feature failed, skip flaw_detail_public.feature"
 fi
 
-if [ -e tmp_data.txt ]
+if flaw_created
 then
     run_behave features/advance_search.feature
     run_behave features/flaw_list.feature --tags=~@skip
@@ -43,7 +63,7 @@ else
     flaw_list.feature, quick_search.feature"
 fi
 
-if [ -e tmp_data.txt ]
+if [ -e tmp_data.db ]
 then
-    rm tmp_data.txt
+    rm tmp_data.db
 fi